@@ -1,16 +1,48 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, Response, make_response
+from flask import Flask, g, has_request_context, request, jsonify, render_template, redirect, url_for, session, Response, make_response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
 from flask_migrate import Migrate
+import click
 from datetime import datetime, timedelta
 import requests
 import secrets
+import tempfile
 import hashlib
-import hmac
+import atexit
+import base64
+import json
 import os
+import re
+import threading
+import time
+from collections import defaultdict, namedtuple
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding for large goal lists
+    orjson = None
+
+from background import WorkerPool
+from deadline_sweeper import DeadlineSweeper
+from dedup import RecentKeys
+from embed_hub import EmbedHub
+from github_client import GitHubClient, RateLimitDeferred
+from health import HealthMonitor
+from matcher import ExactMatcher, MatcherCache, compile_matcher
+from metrics import MemoryMetricsStore, MetricsRegistry, SQLiteMetricsStore
+from query_log import QueryLog
+from migration_runner import MigrationRunner, load_migrations
+from precompressed import PrecompressedAsset
+from snapshot_cache import MemorySnapshotCache, NullSnapshotCache, SQLiteSnapshotCache
+from static_assets import StaticAssets, build_assets
+from webhook_body import WebhookBodyInvalid, WebhookBodyReader, WebhookBodyTooLarge
+
 load_dotenv()
 
 application = Flask(__name__)
@@ -23,6 +55,7 @@ application.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'devsecret')
 
 db = SQLAlchemy(application)
 migrate = Migrate(application, db)
+static_assets = StaticAssets(application)
 
 if not application.config['SECRET_KEY']:
     application.config['SECRET_KEY'] = secrets.token_hex(32)
@@ -33,6 +66,88 @@ application.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 application.config['SESSION_COOKIE_NAME'] = 'gitdone_session'
 application.config['SESSION_COOKIE_SECURE'] = os.environ.get('BASE_URL', '').startswith('https')
 
+# Outbound GitHub API calls (URLs are overridable so tests can point at a local fake server)
+application.config['GITHUB_API_URL'] = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+application.config['GITHUB_OAUTH_URL'] = os.environ.get('GITHUB_OAUTH_URL', 'https://github.com')
+application.config['GITHUB_CONNECT_TIMEOUT'] = float(os.environ.get('GITHUB_CONNECT_TIMEOUT', 3.05))
+application.config['GITHUB_READ_TIMEOUT'] = float(os.environ.get('GITHUB_READ_TIMEOUT', 10))
+application.config['GITHUB_MAX_RETRIES'] = int(os.environ.get('GITHUB_MAX_RETRIES', 3))
+application.config['GITHUB_RATE_LIMIT_RESERVE'] = int(os.environ.get('GITHUB_RATE_LIMIT_RESERVE', 50))
+# Token-less calls (e.g. the readiness probe) share the server IP's 60-an-hour quota
+application.config['GITHUB_ANONYMOUS_RATE_LIMIT_RESERVE'] = int(os.environ.get('GITHUB_ANONYMOUS_RATE_LIMIT_RESERVE', 5))
+# Events the shared repo webhook subscribes to; see WEBHOOK_EVENT_HANDLERS
+application.config['GITHUB_WEBHOOK_EVENTS'] = ['push', 'issues', 'pull_request', 'create']
+
+# Schema migrations run from `flask migrate-schema`; backfills update this many rows per transaction
+application.config['MIGRATION_BATCH_SIZE'] = int(os.environ.get('MIGRATION_BATCH_SIZE', 1000))
+application.config['MIGRATION_BACKFILL_PAUSE'] = float(os.environ.get('MIGRATION_BACKFILL_PAUSE', 0))
+
+# Webhook deliveries are queued and drained by background workers (0 disables the in-process pool)
+application.config['WEBHOOK_WORKERS'] = int(os.environ.get('WEBHOOK_WORKERS', 2))
+application.config['WEBHOOK_QUEUE_BATCH_SIZE'] = int(os.environ.get('WEBHOOK_QUEUE_BATCH_SIZE', 50))
+application.config['WEBHOOK_MAX_ATTEMPTS'] = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', 5))
+application.config['WEBHOOK_RETRY_BACKOFF'] = float(os.environ.get('WEBHOOK_RETRY_BACKOFF', 5))
+application.config['WEBHOOK_VISIBILITY_TIMEOUT'] = int(os.environ.get('WEBHOOK_VISIBILITY_TIMEOUT', 300))
+application.config['WEBHOOK_POLL_INTERVAL'] = float(os.environ.get('WEBHOOK_POLL_INTERVAL', 2))
+# Processed deliveries are deleted after these many seconds (dead letters are kept longer for inspection)
+application.config['WEBHOOK_DONE_RETENTION'] = int(os.environ.get('WEBHOOK_DONE_RETENTION', 24 * 3600))
+application.config['WEBHOOK_DEAD_RETENTION'] = int(os.environ.get('WEBHOOK_DEAD_RETENTION', 7 * 24 * 3600))
+application.config['WEBHOOK_PURGE_INTERVAL'] = float(os.environ.get('WEBHOOK_PURGE_INTERVAL', 600))
+# Deliveries larger than this are refused before they are read (GitHub caps payloads at 25 MB)
+application.config['WEBHOOK_MAX_BODY_BYTES'] = int(os.environ.get('WEBHOOK_MAX_BODY_BYTES', 25 * 1024 * 1024))
+# GitHub hooks for new goals are created in the background and retried with backoff
+application.config['WEBHOOK_PROVISION_WORKERS'] = int(os.environ.get('WEBHOOK_PROVISION_WORKERS', 1))
+application.config['WEBHOOK_PROVISION_MAX_ATTEMPTS'] = int(os.environ.get('WEBHOOK_PROVISION_MAX_ATTEMPTS', 5))
+application.config['WEBHOOK_PROVISION_BACKOFF'] = float(os.environ.get('WEBHOOK_PROVISION_BACKOFF', 10))
+application.config['WEBHOOK_PROVISION_BATCH_SIZE'] = int(os.environ.get('WEBHOOK_PROVISION_BATCH_SIZE', 20))
+# Redeliveries with an X-GitHub-Delivery id seen within the TTL are acknowledged but not processed again
+application.config['WEBHOOK_DEDUP_TTL'] = int(os.environ.get('WEBHOOK_DEDUP_TTL', 72 * 3600))
+application.config['WEBHOOK_DEDUP_CACHE_SIZE'] = int(os.environ.get('WEBHOOK_DEDUP_CACHE_SIZE', 10000))
+application.config['GOALS_PAGE_SIZE'] = int(os.environ.get('GOALS_PAGE_SIZE', 100))
+application.config['GOALS_MAX_PAGE_SIZE'] = int(os.environ.get('GOALS_MAX_PAGE_SIZE', 500))
+# POST /api/goals/bulk: items per request
+application.config['GOALS_BULK_MAX_ITEMS'] = int(os.environ.get('GOALS_BULK_MAX_ITEMS', 200))
+# The widget page is the same for every goal, so browsers and CDNs may keep it for a day
+application.config['EMBED_SHELL_MAX_AGE'] = int(os.environ.get('EMBED_SHELL_MAX_AGE', 86400))
+application.config['EMBED_ACTIVE_MAX_AGE'] = int(os.environ.get('EMBED_ACTIVE_MAX_AGE', 15))
+application.config['EMBED_BATCH_MAX_TOKENS'] = int(os.environ.get('EMBED_BATCH_MAX_TOKENS', 100))
+# Public goal snapshots for the widget endpoints: 'sqlite' (shared by the workers on a host), 'memory' or 'none'
+application.config['EMBED_SNAPSHOT_CACHE'] = os.environ.get('EMBED_SNAPSHOT_CACHE', 'sqlite')
+application.config['EMBED_SNAPSHOT_CACHE_PATH'] = os.environ.get(
+    'EMBED_SNAPSHOT_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'gitdone-embed-snapshots.sqlite3')
+)
+application.config['EMBED_SNAPSHOT_TTL'] = int(os.environ.get('EMBED_SNAPSHOT_TTL', 300))
+# Widget live updates: 'poll' (revalidate /data every 30 s) or 'stream' (SSE with a long-poll fallback).
+# Streams hold a worker thread per open widget, so only enable 'stream' with async workers (e.g. gunicorn -k gevent)
+application.config['EMBED_LIVE_UPDATES'] = os.environ.get('EMBED_LIVE_UPDATES', 'poll')
+# SSE heartbeat, cross-worker recheck and connection lifetime, in seconds
+application.config['EMBED_STREAM_HEARTBEAT'] = float(os.environ.get('EMBED_STREAM_HEARTBEAT', 20))
+application.config['EMBED_STREAM_RECHECK_INTERVAL'] = float(os.environ.get('EMBED_STREAM_RECHECK_INTERVAL', 60))
+application.config['EMBED_STREAM_MAX_SECONDS'] = float(os.environ.get('EMBED_STREAM_MAX_SECONDS', 600))
+application.config['EMBED_LONG_POLL_TIMEOUT'] = float(os.environ.get('EMBED_LONG_POLL_TIMEOUT', 25))
+# Goals without a working webhook are reconciled by polling GitHub (0 workers disables it)
+application.config['GOAL_RECONCILE_WORKERS'] = int(os.environ.get('GOAL_RECONCILE_WORKERS', 1))
+application.config['GOAL_RECONCILE_INTERVAL'] = int(os.environ.get('GOAL_RECONCILE_INTERVAL', 300))
+application.config['GOAL_RECONCILE_CONCURRENCY'] = int(os.environ.get('GOAL_RECONCILE_CONCURRENCY', 4))
+# Active goals past their deadline are moved to 'overdue' by a background sweeper
+application.config['DEADLINE_SWEEPER_ENABLED'] = os.environ.get('DEADLINE_SWEEPER_ENABLED', 'true').lower() == 'true'
+application.config['DEADLINE_SWEEP_BATCH_SIZE'] = int(os.environ.get('DEADLINE_SWEEP_BATCH_SIZE', 500))
+application.config['DEADLINE_SWEEP_MAX_SLEEP'] = float(os.environ.get('DEADLINE_SWEEP_MAX_SLEEP', 300))
+application.config['GOAL_MATCHER_CACHE_SIZE'] = int(os.environ.get('GOAL_MATCHER_CACHE_SIZE', 1024))
+# Prometheus metrics: 'sqlite' sums every worker on the host into each scrape, 'memory' reports this process only
+application.config['METRICS_STORE'] = os.environ.get('METRICS_STORE', 'sqlite')
+application.config['METRICS_PATH'] = os.environ.get(
+    'METRICS_PATH', os.path.join(tempfile.gettempdir(), 'gitdone-metrics.sqlite3')
+)
+application.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+# Development aid: log every statement per request, summarize it in X-SQL-Queries and warn on N+1 patterns
+application.config['SQL_QUERY_DEBUG'] = os.environ.get('SQL_QUERY_DEBUG', 'false').lower() == 'true'
+application.config['SQL_REPEAT_THRESHOLD'] = int(os.environ.get('SQL_REPEAT_THRESHOLD', 5))
+# Readiness is served from probes a background worker runs every interval (0 probes on demand instead)
+application.config['HEALTH_CHECK_INTERVAL'] = float(os.environ.get('HEALTH_CHECK_INTERVAL', 15))
+application.config['HEALTH_CHECK_MAX_AGE'] = float(os.environ.get('HEALTH_CHECK_MAX_AGE', 45))
+application.config['HEALTH_CHECK_TIMEOUT'] = float(os.environ.get('HEALTH_CHECK_TIMEOUT', 2))
+
 class User(db.Model):
     id = db.Column(db.Integer,primary_key = True)
     github_id = db.Column(db.String(100), unique=True, nullable = False)
@@ -42,6 +157,15 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default = datetime.utcnow, onupdate = datetime.utcnow)
 
 class Goal(db.Model):
+    __table_args__ = (
+        # Webhook dispatch looks up every active goal of one completion type on a repo
+        db.Index('ix_goal_repo_dispatch', 'repo_owner', 'repo_name', 'status', 'completion_type'),
+        # Keyset pagination of a user's goals in deadline order
+        db.Index('ix_goal_user_deadline', 'user_github_id', 'deadline', 'id'),
+        # Deadline sweeper: next active deadline and the batch of goals that just expired
+        db.Index('ix_goal_status_deadline', 'status', 'deadline'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_github_id = db.Column(db.String(100), nullable=False)
     title = db.Column(db.String(255), nullable=False)
@@ -51,13 +175,15 @@ class Goal(db.Model):
     repo_url = db.Column(db.String(500), nullable=False)
     completion_condition = db.Column(db.String(200), nullable=False)
     completion_type = db.Column(db.String(20), default='commit', nullable=False)  # 'commit' or 'issue'
-    status = db.Column(db.String(20), default='active')
+    status = db.Column(db.String(20), default='active')  # 'active', 'completed' or 'overdue'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     embed_token = db.Column(db.String(200), unique = True, nullable = True)
     repo_owner = db.Column(db.String(100), nullable = True)
     repo_name = db.Column(db.String(100), nullable = True)
     webhook_id = db.Column(db.String(100), nullable = True)
+    webhook_status = db.Column(db.String(20), nullable = True)  # 'pending', 'active' or 'failed'
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         base_url = os.environ.get('BASE_URL', 'http://localhost:5000')
@@ -75,12 +201,68 @@ class Goal(db.Model):
             'completion_condition': self.completion_condition,
             'completion_type': self.completion_type,
             'status': self.status,
+            'webhook_status': self.webhook_status,
             'created_at': self.created_at.isoformat() + 'Z',
             'completed_at': (self.completed_at.isoformat() + 'Z') if self.completed_at else None,
             'embed_token': self.embed_token,
             'embed_url': f'{base_url}/embed/{self.embed_token}' if self.embed_token else None
         }
 
+class RepoWebhook(db.Model):
+    """The single GitHub webhook shared by every goal on a repository."""
+    __table_args__ = (
+        db.UniqueConstraint('repo_owner', 'repo_name', name='uq_repo_webhook_repo'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    repo_owner = db.Column(db.String(100), nullable=False)
+    repo_name = db.Column(db.String(100), nullable=False)
+    hook_id = db.Column(db.String(100), nullable=True)
+    owner_github_id = db.Column(db.String(100), nullable=True)  # user whose token created the hook
+    goal_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Background provisioning: failed attempts so far and when the next one may run
+    provision_attempts = db.Column(db.Integer, default=0, nullable=False)
+    provision_after = db.Column(db.DateTime, nullable=True)
+    provision_error = db.Column(db.Text, nullable=True)
+
+class RepoPollState(db.Model):
+    """Polling state for a repository whose goals have no working webhook."""
+    __table_args__ = (
+        db.UniqueConstraint('repo_owner', 'repo_name', name='uq_repo_poll_state_repo'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    repo_owner = db.Column(db.String(100), nullable=False)
+    repo_name = db.Column(db.String(100), nullable=False)
+    etags = db.Column(db.Text, nullable=True)  # JSON {request url: ETag} from the last poll
+    polled_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+class SeenDelivery(db.Model):
+    """X-GitHub-Delivery ids that have been accepted, kept for WEBHOOK_DEDUP_TTL seconds."""
+    delivery_id = db.Column(db.String(100), primary_key=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class WebhookDelivery(db.Model):
+    """A verified GitHub delivery waiting for (or finished with) the webhook workers."""
+    __table_args__ = (
+        db.Index('ix_webhook_delivery_queue', 'status', 'available_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    delivery_id = db.Column(db.String(100), nullable=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'processing', 'done' or 'dead'
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    claimed_by = db.Column(db.String(32), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
 def parse_deadline(raw_deadline):
     """Parse a deadline string into a datetime.
     Supports ISO strings (with optional trailing Z), '%Y-%m-%dT%H:%M', and 'DD/MM/YYYY HH:MM'.
@@ -105,12 +287,151 @@ def parse_deadline(raw_deadline):
         pass
     raise ValueError('Invalid deadline format. Use DD/MM/YYYY HH:MM or ISO.')
 
+def active_goals_query(repo_owner, repo_name, completion_type):
+    """Query for the active goals of one completion type on a repository.
+    Only id and completion_condition are selected; the lookup is served by ix_goal_repo_dispatch.
+    """
+    return Goal.query.with_entities(Goal.id, Goal.completion_condition).filter_by(
+        repo_owner=repo_owner,
+        repo_name=repo_name,
+        status='active',
+        completion_type=completion_type
+    )
+
+def complete_goals(goal_ids):
+    """Mark the given goals completed in a single UPDATE and return how many changed.
+    Goals that are no longer active (e.g. completed by a concurrent delivery) are left untouched.
+    """
+    if not goal_ids:
+        return 0
+    completed = Goal.query.filter(
+        Goal.id.in_(goal_ids),
+        Goal.status == 'active'
+    ).update({'status': 'completed', 'completed_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    if completed:
+        publish_goal_changes(
+            token for (token,) in Goal.query.with_entities(Goal.embed_token).filter(Goal.id.in_(goal_ids))
+        )
+    return completed
+
+def create_metrics_registry():
+    store = MemoryMetricsStore()
+    if application.config['METRICS_STORE'] == 'sqlite':
+        try:
+            store = SQLiteMetricsStore(application.config['METRICS_PATH'])
+        except Exception as e:
+            print(f"Warning: shared metrics store unavailable, /metrics reports this process only: {e}")
+    return MetricsRegistry(store, flush_interval=application.config['METRICS_FLUSH_INTERVAL'])
+
+metrics = create_metrics_registry()
+# Values recorded since the last periodic flush would otherwise be lost when a worker exits
+atexit.register(metrics.flush)
+http_requests = metrics.counter(
+    'http_requests', 'HTTP requests by route and status code.', ['method', 'endpoint', 'status'])
+http_request_duration = metrics.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route.', ['method', 'endpoint'])
+http_request_db_queries = metrics.histogram(
+    'http_request_db_queries', 'SQL statements executed per HTTP request.', ['endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100))
+http_request_db_duration = metrics.histogram(
+    'http_request_db_duration_seconds', 'Time spent in SQL per HTTP request.', ['endpoint'])
+db_queries = metrics.counter('db_queries', 'SQL statements executed, including background workers.')
+db_query_duration = metrics.histogram('db_query_duration_seconds', 'SQL statement latency.')
+github_requests = metrics.counter(
+    'github_api_requests', 'GitHub API calls by endpoint and status code (status "error" for no response).',
+    ['method', 'path', 'status'])
+github_request_duration = metrics.histogram(
+    'github_api_request_duration_seconds', 'GitHub API call latency by endpoint.', ['method', 'path'])
+webhook_processing_duration = metrics.histogram(
+    'webhook_processing_seconds', 'Time to apply one queued webhook delivery, by event type and outcome.',
+    ['event', 'outcome'])
+webhook_goals_completed = metrics.counter(
+    'webhook_goals_completed', 'Goals completed by webhook deliveries, by completion type.', ['completion_type'])
+
+def github_path_template(url):
+    """The path of a GitHub URL with the repository and numeric ids replaced, to keep label values bounded."""
+    path = re.sub(r'^/repos/[^/]+/[^/]+', '/repos/{owner}/{repo}', urlsplit(url).path)
+    return re.sub(r'/\d+(?=/|$)', '/{id}', path)
+
+def observe_github_request(method, url, status, seconds):
+    path = github_path_template(url)
+    github_requests.inc(method=method, path=path, status=status or 'error')
+    github_request_duration.observe(seconds, method=method, path=path)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    db_queries.inc()
+    db_query_duration.observe(elapsed)
+    if has_request_context():
+        g.db_queries = g.get('db_queries', 0) + 1
+        g.db_seconds = g.get('db_seconds', 0.0) + elapsed
+        if 'query_log' in g:
+            g.query_log.record(statement, elapsed)
+
+with application.app_context():
+    event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+github = GitHubClient(
+    api_url=application.config['GITHUB_API_URL'],
+    oauth_url=application.config['GITHUB_OAUTH_URL'],
+    timeout=(application.config['GITHUB_CONNECT_TIMEOUT'], application.config['GITHUB_READ_TIMEOUT']),
+    max_retries=application.config['GITHUB_MAX_RETRIES'],
+    rate_limit_reserve=application.config['GITHUB_RATE_LIMIT_RESERVE'],
+    anonymous_rate_limit_reserve=application.config['GITHUB_ANONYMOUS_RATE_LIMIT_RESERVE'],
+    observer=observe_github_request
+)
+
+# Fast path for duplicate deliveries; the seen_delivery table is the cross-process record
+recent_deliveries = RecentKeys(
+    maxsize=application.config['WEBHOOK_DEDUP_CACHE_SIZE'],
+    ttl=application.config['WEBHOOK_DEDUP_TTL']
+)
+delivery_dedup_stats = {'table_hits': 0, 'purged': 0}
+
+# Open embed widget connections waiting for their goal to change
+embed_hub = EmbedHub()
+
+# Compiled commit-message matchers, one per repository with active commit goals
+goal_matchers = MatcherCache(maxsize=application.config['GOAL_MATCHER_CACHE_SIZE'])
+
+def goal_ref(reference):
+    """Normalize an issue/PR reference or tag name so '#7', ' 7' and 7 (or 'refs/tags/v1' and 'v1') compare equal."""
+    reference = str(reference).strip()
+    if reference.startswith('refs/tags/'):
+        reference = reference[len('refs/tags/'):]
+    return reference.lstrip('#')
+
+# How the conditions of each completion type are compiled: substrings of commit messages,
+# or exact references for issues, pull requests and tags
+GOAL_MATCHER_BUILDERS = {
+    'commit': compile_matcher,
+    'issue': lambda patterns: ExactMatcher(patterns, normalize=goal_ref),
+    'pr': lambda patterns: ExactMatcher(patterns, normalize=goal_ref),
+    'tag': lambda patterns: ExactMatcher(patterns, normalize=goal_ref),
+}
+
+def goal_matcher_for(repo_owner, repo_name, completion_type, goals):
+    """Return the cached matcher for every active goal of one completion type on a repo.
+    The entry is rebuilt whenever the set of (id, condition) pairs differs from what it was built from.
+    """
+    signature = tuple(sorted((goal.id, goal.completion_condition) for goal in goals))
+    build = GOAL_MATCHER_BUILDERS[completion_type]
+    return goal_matchers.get(
+        (repo_owner, repo_name, completion_type),
+        signature,
+        lambda: build((condition, goal_id) for goal_id, condition in signature)
+    )
+
+def invalidate_goal_matchers(repo_owner, repo_name):
+    for completion_type in GOAL_MATCHER_BUILDERS:
+        goal_matchers.invalidate((repo_owner, repo_name, completion_type))
+
 def create_github_webhook(access_token, owner, repo, webhook_url, secret):
-    api_url = f'https://api.github.com/repos/{owner}/{repo}/hooks'
-    headers ={
-        'Authorization':f'token {access_token}',
-        'Accept':'application/vnd.github.v3+json'
-    }
     payload = {
         'name':'web',
         'config':{
@@ -118,9 +439,9 @@ def create_github_webhook(access_token, owner, repo, webhook_url, secret):
             'content_type':'json',
             'secret':secret
         },
-        'events':['push', 'issues']
+        'events':application.config['GITHUB_WEBHOOK_EVENTS']
     }
-    response = requests.post(api_url,json = payload,headers = headers)
+    response = github.post(f'/repos/{owner}/{repo}/hooks', token=access_token, json=payload)
     if response.status_code == 201:
         return response.json()
     else:
@@ -128,18 +449,808 @@ def create_github_webhook(access_token, owner, repo, webhook_url, secret):
 
 def delete_github_webhook(access_token, owner, repo, webhook_id):
     """Delete a GitHub webhook for a repo"""
-    api_url = f'https://api.github.com/repos/{owner}/{repo}/hooks/{webhook_id}'
-    headers = {
-        'Authorization': f'token {access_token}',
-        'Accept': 'application/vnd.github.v3+json'
-    }
-    response = requests.delete(api_url, headers=headers)
+    response = github.delete(f'/repos/{owner}/{repo}/hooks/{webhook_id}', token=access_token)
     # 204 No Content on success; 404 if missing (treat as already deleted)
     if response.status_code in (204, 404):
         return True
     print("Failed to delete webhook:", response.status_code, response.text)
     return False
     
+def repo_webhook_record(repo_owner, repo_name, user_github_id):
+    """Fetch the shared webhook record for a repo, creating one that counts the repo's existing goals if needed."""
+    repo_hook = RepoWebhook.query.filter_by(repo_owner=repo_owner, repo_name=repo_name).first()
+    if repo_hook:
+        return repo_hook
+    # Goals created before webhooks were shared have no record yet: count them, and adopt one of
+    # their hooks so deleting a legacy goal can neither release the shared hook early nor orphan its own
+    existing = Goal.query.filter_by(repo_owner=repo_owner, repo_name=repo_name) \
+        .with_entities(Goal.webhook_id, Goal.user_github_id).order_by(Goal.id).all()
+    hook_id, owner_github_id = next(((hook_id, owner) for hook_id, owner in existing if hook_id),
+                                    (None, user_github_id))
+    try:
+        repo_hook = RepoWebhook(repo_owner=repo_owner, repo_name=repo_name, hook_id=hook_id,
+                                owner_github_id=owner_github_id, goal_count=len(existing))
+        db.session.add(repo_hook)
+        db.session.commit()
+    except IntegrityError:
+        # Another request created it first
+        db.session.rollback()
+        repo_hook = RepoWebhook.query.filter_by(repo_owner=repo_owner, repo_name=repo_name).first()
+    return repo_hook
+
+def adjust_repo_webhook_count(repo_hook_id, delta):
+    """Atomically add delta to a shared webhook's goal count; the caller commits."""
+    return RepoWebhook.query.filter_by(id=repo_hook_id).update(
+        {'goal_count': RepoWebhook.goal_count + delta}, synchronize_session=False
+    )
+
+def ensure_repo_webhook(repo_hook, access_token, base_url):
+    """Create the repo's GitHub webhook unless it already has one, and return the hook id."""
+    if repo_hook.hook_id:
+        return repo_hook.hook_id
+    repo_owner, repo_name = repo_hook.repo_owner, repo_hook.repo_name
+    webhook_data = create_github_webhook(
+        access_token, repo_owner, repo_name, f'{base_url}/api/github-webhook', application.config['SECRET_KEY']
+    )
+    if not webhook_data:
+        return None
+    return claim_repo_webhook(repo_hook, str(webhook_data.get('id')), access_token)
+
+def claim_repo_webhook(repo_hook, hook_id, access_token):
+    """Record a freshly created GitHub hook as the repo's shared hook and return the hook id in use."""
+    claimed = RepoWebhook.query.filter_by(id=repo_hook.id, hook_id=None).update(
+        {'hook_id': hook_id}, synchronize_session=False
+    )
+    db.session.commit()
+    if not claimed:
+        # A concurrent request registered the repo's hook first; drop the duplicate we just made
+        delete_github_webhook(access_token, repo_hook.repo_owner, repo_hook.repo_name, hook_id)
+        db.session.refresh(repo_hook)
+        return repo_hook.hook_id
+    return hook_id
+
+def release_repo_webhook(repo_hook, fallback_user_github_id):
+    """Delete the shared webhook (on GitHub and locally) once no goal on the repo is left.
+    Returns True if the GitHub hook was removed.
+    """
+    repo_owner, repo_name, hook_id = repo_hook.repo_owner, repo_hook.repo_name, repo_hook.hook_id
+    owner_github_id = repo_hook.owner_github_id
+    removed = RepoWebhook.query.filter(
+        RepoWebhook.id == repo_hook.id,
+        RepoWebhook.goal_count <= 0
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    if not removed or not hook_id:
+        return False
+
+    # Prefer the token that created the hook; fall back to the user deleting the last goal
+    for github_id in dict.fromkeys((owner_github_id, fallback_user_github_id)):
+        user = User.query.filter_by(github_id=github_id).first() if github_id else None
+        if user and user.access_token and delete_github_webhook(user.access_token, repo_owner, repo_name, hook_id):
+            return True
+    return False
+
+class WebhookPayloadError(ValueError):
+    """A delivery that can never be processed, so it goes straight to the dead-letter state."""
+
+def webhook_repo(payload):
+    """(owner, name) of the repository a delivery is about."""
+    repo_full_name = (payload.get('repository') or {}).get('full_name')
+    if not repo_full_name or '/' not in repo_full_name:
+        raise WebhookPayloadError('Payload missing repository name')
+    repo_owner, repo_name = repo_full_name.split('/', 1)
+    return repo_owner, repo_name
+
+def complete_matching_goals(repo_owner, repo_name, completion_type, texts):
+    """Complete the active goals of one type on a repo whose condition matches any of the texts."""
+    goals = active_goals_query(repo_owner, repo_name, completion_type).all()
+    if not goals:
+        return 0
+    matched_ids = goal_matcher_for(repo_owner, repo_name, completion_type, goals).search_all(texts)
+    completed = complete_goals(sorted(matched_ids))
+    if completed:
+        invalidate_goal_matchers(repo_owner, repo_name)
+        webhook_goals_completed.inc(completed, completion_type=completion_type)
+    return completed
+
+def handle_push_event(payload):
+    repo_owner, repo_name = webhook_repo(payload)
+    ref = payload.get('ref') or ''
+    if ref.startswith('refs/tags/'):
+        # Pushing a tag also arrives as a 'create' event; whichever is processed first completes the goal
+        if payload.get('deleted'):
+            return 0
+        return complete_matching_goals(repo_owner, repo_name, 'tag', [ref])
+    commit_messages = [commit.get('message', '') for commit in payload.get('commits') or []]
+    return complete_matching_goals(repo_owner, repo_name, 'commit', commit_messages)
+
+def handle_issues_event(payload):
+    if payload.get('action') != 'closed':
+        return 0
+    repo_owner, repo_name = webhook_repo(payload)
+    issue_number = (payload.get('issue') or {}).get('number')
+    if not issue_number:
+        raise WebhookPayloadError('Payload missing repository or issue information')
+    return complete_matching_goals(repo_owner, repo_name, 'issue', [issue_number])
+
+def handle_pull_request_event(payload):
+    pull_request = payload.get('pull_request') or {}
+    if payload.get('action') != 'closed' or not pull_request.get('merged'):
+        return 0
+    repo_owner, repo_name = webhook_repo(payload)
+    pr_number = payload.get('number') or pull_request.get('number')
+    if not pr_number:
+        raise WebhookPayloadError('Payload missing pull request number')
+    return complete_matching_goals(repo_owner, repo_name, 'pr', [pr_number])
+
+def handle_create_event(payload):
+    if payload.get('ref_type') != 'tag':
+        return 0
+    repo_owner, repo_name = webhook_repo(payload)
+    if not payload.get('ref'):
+        raise WebhookPayloadError('Payload missing tag name')
+    return complete_matching_goals(repo_owner, repo_name, 'tag', [payload['ref']])
+
+# GitHub event type (X-GitHub-Event) -> handler returning how many goals it completed
+WEBHOOK_EVENT_HANDLERS = {
+    'push': handle_push_event,
+    'issues': handle_issues_event,
+    'pull_request': handle_pull_request_event,
+    'create': handle_create_event,
+}
+
+def process_webhook_event(event_type, payload):
+    """Apply one GitHub event to the matching goals and return how many were completed."""
+    handler = WEBHOOK_EVENT_HANDLERS.get(event_type)
+    if handler is None:
+        return 0
+    return handler(payload)
+
+def claim_webhook_deliveries(batch_size):
+    """Claim up to batch_size due deliveries for this worker and return them.
+    Deliveries stuck in 'processing' longer than the visibility timeout are claimed again.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=application.config['WEBHOOK_VISIBILITY_TIMEOUT'])
+    claimable = db.or_(
+        db.and_(WebhookDelivery.status == 'pending', WebhookDelivery.available_at <= now),
+        db.and_(WebhookDelivery.status == 'processing', WebhookDelivery.claimed_at < stale_before)
+    )
+    candidate_ids = [row.id for row in WebhookDelivery.query.with_entities(WebhookDelivery.id)
+                     .filter(claimable).order_by(WebhookDelivery.id).limit(batch_size)]
+    if not candidate_ids:
+        return []
+
+    # The status/claimed_at filter is repeated so only one worker wins each row
+    claim_token = secrets.token_hex(8)
+    WebhookDelivery.query.filter(WebhookDelivery.id.in_(candidate_ids), claimable).update(
+        {'status': 'processing', 'claimed_by': claim_token, 'claimed_at': now},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return WebhookDelivery.query.filter_by(claimed_by=claim_token, status='processing') \
+        .order_by(WebhookDelivery.id).all()
+
+def drain_webhook_queue(batch_size=None):
+    """Process one batch of queued deliveries and return how many were handled."""
+    deliveries = claim_webhook_deliveries(batch_size or application.config['WEBHOOK_QUEUE_BATCH_SIZE'])
+    for delivery in deliveries:
+        attempts = (delivery.attempts or 0) + 1
+        retry_at = None
+        started = time.perf_counter()
+        try:
+            payload = json.loads(delivery.payload)
+            if not isinstance(payload, dict):
+                raise WebhookPayloadError('Payload is not a JSON object')
+            process_webhook_event(delivery.event_type, payload)
+            status, error = 'done', None
+        except (WebhookPayloadError, ValueError) as e:
+            db.session.rollback()
+            status, error = 'dead', str(e)
+        except Exception as e:
+            db.session.rollback()
+            error = str(e)
+            if attempts >= application.config['WEBHOOK_MAX_ATTEMPTS']:
+                status = 'dead'
+            else:
+                # Exponential backoff before the delivery becomes claimable again
+                status = 'pending'
+                delay = application.config['WEBHOOK_RETRY_BACKOFF'] * (2 ** (attempts - 1))
+                retry_at = datetime.utcnow() + timedelta(seconds=delay)
+        event_label = delivery.event_type if delivery.event_type in WEBHOOK_EVENT_HANDLERS else 'other'
+        webhook_processing_duration.observe(time.perf_counter() - started, event=event_label,
+                                            outcome='retry' if status == 'pending' else status)
+
+        delivery.attempts = attempts
+        delivery.status = status
+        delivery.last_error = error
+        delivery.claimed_by = None
+        delivery.processed_at = datetime.utcnow()
+        if retry_at:
+            delivery.available_at = retry_at
+        db.session.commit()
+    return len(deliveries)
+
+def reclaim_expired_delivery_id(delivery_id):
+    """Refresh a seen_delivery row that has outlived the TTL so its id can be processed again.
+    Returns True if the row was expired (and is now renewed), False if it is a live duplicate.
+    """
+    expired_before = datetime.utcnow() - timedelta(seconds=application.config['WEBHOOK_DEDUP_TTL'])
+    renewed = SeenDelivery.query.filter(
+        SeenDelivery.delivery_id == delivery_id,
+        SeenDelivery.received_at < expired_before
+    ).update({'received_at': datetime.utcnow()}, synchronize_session=False)
+    return bool(renewed)
+
+def purge_seen_deliveries():
+    """Delete seen_delivery rows older than the TTL and return how many went."""
+    expired_before = datetime.utcnow() - timedelta(seconds=application.config['WEBHOOK_DEDUP_TTL'])
+    purged = SeenDelivery.query.filter(SeenDelivery.received_at < expired_before).delete(synchronize_session=False)
+    db.session.commit()
+    delivery_dedup_stats['purged'] += purged
+    return purged
+
+def purge_webhook_deliveries():
+    """Delete done and dead deliveries older than their retention and return how many went."""
+    now = datetime.utcnow()
+    purged = 0
+    for status, retention in (('done', 'WEBHOOK_DONE_RETENTION'), ('dead', 'WEBHOOK_DEAD_RETENTION')):
+        processed_before = now - timedelta(seconds=application.config[retention])
+        purged += WebhookDelivery.query.filter(
+            WebhookDelivery.status == status,
+            WebhookDelivery.processed_at < processed_before
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return purged
+
+def webhook_queue_stats():
+    """Queue depth by status plus the age of the oldest delivery still waiting."""
+    counts = dict(
+        db.session.query(WebhookDelivery.status, db.func.count(WebhookDelivery.id))
+        .group_by(WebhookDelivery.status).all()
+    )
+    oldest_pending = db.session.query(db.func.min(WebhookDelivery.received_at)) \
+        .filter(WebhookDelivery.status == 'pending').scalar()
+    return {
+        'pending': counts.get('pending', 0),
+        'processing': counts.get('processing', 0),
+        'done': counts.get('done', 0),
+        'dead': counts.get('dead', 0),
+        'oldest_pending_age_seconds': (
+            int((datetime.utcnow() - oldest_pending).total_seconds()) if oldest_pending else 0
+        ),
+        'workers': webhook_workers.workers if webhook_workers.running else 0,
+        'dedup': {
+            'memory_hits': recent_deliveries.hits,
+            'table_hits': delivery_dedup_stats['table_hits'],
+            'misses': recent_deliveries.misses - delivery_dedup_stats['table_hits'],
+            'purged': delivery_dedup_stats['purged']
+        }
+    }
+
+# Monotonic time of this process's next retention purge
+webhook_purge_due = {'at': 0.0}
+
+def _drain_webhook_queue_in_context():
+    with application.app_context():
+        try:
+            handled = drain_webhook_queue()
+            if time.monotonic() >= webhook_purge_due['at']:
+                webhook_purge_due['at'] = time.monotonic() + application.config['WEBHOOK_PURGE_INTERVAL']
+                purge_webhook_deliveries()
+            return handled
+        finally:
+            db.session.remove()
+
+webhook_workers = WorkerPool(
+    'webhook-worker',
+    _drain_webhook_queue_in_context,
+    workers=application.config['WEBHOOK_WORKERS'],
+    idle_interval=application.config['WEBHOOK_POLL_INTERVAL']
+)
+
+def mark_repo_goals_webhook(repo_owner, repo_name, webhook_status, hook_id=None):
+    """Set the provisioning outcome on a repo's goals; the caller commits.
+    A created hook is attached to every goal that has none yet, including ones an earlier attempt
+    marked failed. A failure only touches the goals still waiting.
+    """
+    goals = Goal.query.filter_by(repo_owner=repo_owner, repo_name=repo_name)
+    if hook_id:
+        return goals.filter(Goal.webhook_id.is_(None)).update(
+            {'webhook_status': webhook_status, 'webhook_id': hook_id}, synchronize_session=False
+        )
+    return goals.filter_by(webhook_status='pending').update({'webhook_status': webhook_status},
+                                                            synchronize_session=False)
+
+def provision_pending_webhooks(batch_size=None):
+    """Create the shared GitHub hook for repos that have goals waiting on one.
+    Each repo is claimed with a conditional UPDATE on provision_after, so concurrent
+    provisioners never call GitHub for the same repo. Returns how many repos were handled.
+    """
+    base_url = os.environ.get('BASE_URL')
+    if not base_url:
+        return 0
+    batch_size = batch_size or application.config['WEBHOOK_PROVISION_BATCH_SIZE']
+    now = datetime.utcnow()
+    due = db.or_(RepoWebhook.provision_after.is_(None), RepoWebhook.provision_after <= now)
+    repo_hooks = RepoWebhook.query.filter(due, db.exists().where(
+        Goal.repo_owner == RepoWebhook.repo_owner,
+        Goal.repo_name == RepoWebhook.repo_name,
+        Goal.webhook_status == 'pending'
+    )).order_by(RepoWebhook.id).limit(batch_size).all()
+
+    handled = 0
+    for repo_hook in repo_hooks:
+        # Hold the repo for a visibility timeout; a crashed provisioner's claim simply expires
+        lease_until = now + timedelta(seconds=application.config['WEBHOOK_VISIBILITY_TIMEOUT'])
+        claimed = RepoWebhook.query.filter(RepoWebhook.id == repo_hook.id, due) \
+            .update({'provision_after': lease_until}, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            continue
+        handled += 1
+        repo_owner, repo_name = repo_hook.repo_owner, repo_hook.repo_name
+
+        hook_id, error, deferred_until = None, None, None
+        try:
+            user = provisioning_user(repo_hook)
+            if user is None:
+                error = 'No user with a GitHub token owns a goal on this repository'
+            else:
+                hook_id = ensure_repo_webhook(repo_hook, user.access_token, base_url)
+                if not hook_id:
+                    error = 'GitHub refused to create the webhook'
+        except RateLimitDeferred as e:
+            db.session.rollback()
+            error, deferred_until = str(e), datetime.utcfromtimestamp(e.reset_at)
+        except Exception as e:
+            db.session.rollback()
+            error = str(e)
+
+        if deferred_until:
+            # Not the repo's fault: wait for the token's quota to reset without using up an attempt
+            values = {'provision_error': error, 'provision_after': deferred_until}
+        elif hook_id:
+            mark_repo_goals_webhook(repo_owner, repo_name, 'active', hook_id)
+            values = {'provision_attempts': 0, 'provision_after': None, 'provision_error': None}
+        else:
+            attempts = (repo_hook.provision_attempts or 0) + 1
+            if attempts >= application.config['WEBHOOK_PROVISION_MAX_ATTEMPTS']:
+                print(f"Warning: giving up on webhook for {repo_owner}/{repo_name}: {error}")
+                mark_repo_goals_webhook(repo_owner, repo_name, 'failed')
+                values = {'provision_attempts': 0, 'provision_after': None, 'provision_error': error}
+            else:
+                delay = application.config['WEBHOOK_PROVISION_BACKOFF'] * (2 ** (attempts - 1))
+                values = {'provision_attempts': attempts, 'provision_error': error,
+                          'provision_after': datetime.utcnow() + timedelta(seconds=delay)}
+        RepoWebhook.query.filter_by(id=repo_hook.id).update(values, synchronize_session=False)
+        db.session.commit()
+    return handled
+
+def provisioning_user(repo_hook):
+    """The user whose token creates a repo's hook: the record's owner, else any user waiting on it."""
+    if repo_hook.owner_github_id:
+        user = User.query.filter_by(github_id=repo_hook.owner_github_id).first()
+        if user and user.access_token:
+            return user
+    waiting = db.session.query(Goal.user_github_id).filter_by(
+        repo_owner=repo_hook.repo_owner, repo_name=repo_hook.repo_name, webhook_status='pending'
+    )
+    return User.query.filter(User.github_id.in_(waiting), User.access_token.isnot(None)).first()
+
+def _provision_pending_webhooks_in_context():
+    with application.app_context():
+        try:
+            return provision_pending_webhooks()
+        finally:
+            db.session.remove()
+
+webhook_provisioner = WorkerPool(
+    'webhook-provisioner',
+    _provision_pending_webhooks_in_context,
+    workers=application.config['WEBHOOK_PROVISION_WORKERS'],
+    idle_interval=application.config['WEBHOOK_POLL_INTERVAL']
+)
+
+# What the reconciler fetches for each completion type: (API path suffix, query parameters)
+RECONCILE_RESOURCES = {
+    'commit': ('commits', {'per_page': 100}),
+    'issue': ('issues', {'state': 'closed', 'per_page': 100}),
+    'pr': ('pulls', {'state': 'closed', 'sort': 'updated', 'direction': 'desc', 'per_page': 100}),
+    'tag': ('tags', {'per_page': 100}),
+}
+
+def parse_github_time(value):
+    """GitHub timestamps ('2030-01-01T12:00:00Z') as naive UTC datetimes, or None."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ') if value else None
+    except ValueError:
+        return None
+
+def polled_goal_matches(goal, completion_type, items):
+    """Whether anything in a polled GitHub listing satisfies the goal; only activity after it was created counts."""
+    condition = goal.completion_condition
+    for item in items:
+        if completion_type == 'commit':
+            commit = item.get('commit') or {}
+            happened = parse_github_time((commit.get('committer') or {}).get('date'))
+            hit = condition in (commit.get('message') or '')
+        elif completion_type == 'issue':
+            if 'pull_request' in item:
+                continue
+            happened = parse_github_time(item.get('closed_at'))
+            hit = goal_ref(condition) == goal_ref(item.get('number'))
+        elif completion_type == 'pr':
+            happened = parse_github_time(item.get('merged_at'))
+            hit = goal_ref(condition) == goal_ref(item.get('number'))
+        else:
+            # Tag listings carry no dates; a tag that already exists satisfies the goal
+            happened = goal.created_at
+            hit = goal_ref(condition) == goal_ref(item.get('name'))
+        if hit and happened and happened >= goal.created_at:
+            return True
+    return False
+
+def fetch_with_etag(path, params, token, etag):
+    """GET a GitHub listing, revalidating with If-None-Match. Returns (status code, ETag, JSON or None).
+    A 304 costs nothing against the rate limit.
+    """
+    headers = {'If-None-Match': etag} if etag else {}
+    response = github.get(path, token=token, params=params, headers=headers)
+    if response.status_code == 304:
+        return 304, etag, None
+    if response.status_code != 200:
+        return response.status_code, None, None
+    return 200, response.headers.get('ETag'), response.json()
+
+def claim_poll_state(repo_owner, repo_name, now):
+    """Claim a repo for this polling round; None if it was polled within GOAL_RECONCILE_INTERVAL."""
+    state = RepoPollState.query.filter_by(repo_owner=repo_owner, repo_name=repo_name).first()
+    if state is None:
+        try:
+            state = RepoPollState(repo_owner=repo_owner, repo_name=repo_name)
+            db.session.add(state)
+            db.session.commit()
+        except IntegrityError:
+            # Another process started polling it first
+            db.session.rollback()
+            state = RepoPollState.query.filter_by(repo_owner=repo_owner, repo_name=repo_name).first()
+    due_before = now - timedelta(seconds=application.config['GOAL_RECONCILE_INTERVAL'])
+    claimed = RepoPollState.query.filter(
+        RepoPollState.id == state.id,
+        db.or_(RepoPollState.polled_at.is_(None), RepoPollState.polled_at <= due_before)
+    ).update({'polled_at': now}, synchronize_session=False)
+    db.session.commit()
+    return state if claimed else None
+
+def reconcile_goals():
+    """Complete goals that have no working webhook by polling GitHub, one set of requests per repo.
+
+    Only the first page (100 items) of each listing is read, filtered to activity since the
+    oldest waiting goal. ETags are kept per request URL, so an unchanged listing is a free 304.
+    Returns how many repos were polled.
+    """
+    no_webhook = db.or_(
+        Goal.webhook_status == 'failed',
+        db.and_(Goal.webhook_status.is_(None), Goal.webhook_id.is_(None))
+    )
+    goals = Goal.query.with_entities(
+        Goal.id, Goal.user_github_id, Goal.repo_owner, Goal.repo_name,
+        Goal.completion_type, Goal.completion_condition, Goal.created_at
+    ).filter(Goal.status == 'active', Goal.repo_owner.isnot(None), Goal.repo_name.isnot(None),
+             Goal.completion_type.in_(list(RECONCILE_RESOURCES)), no_webhook).all()
+    goals_by_repo = defaultdict(list)
+    for goal in goals:
+        goals_by_repo[(goal.repo_owner, goal.repo_name)].append(goal)
+    if not goals_by_repo:
+        return 0
+
+    tokens = dict(User.query.with_entities(User.github_id, User.access_token).filter(
+        User.github_id.in_({goal.user_github_id for goal in goals}), User.access_token.isnot(None)
+    ).all())
+    now = datetime.utcnow()
+    plans = {}
+    for (repo_owner, repo_name), repo_goals in goals_by_repo.items():
+        token = next((tokens[goal.user_github_id] for goal in repo_goals if goal.user_github_id in tokens), None)
+        if token is None:
+            continue
+        state = claim_poll_state(repo_owner, repo_name, now)
+        if state is None:
+            continue
+        etags = json.loads(state.etags) if state.etags else {}
+        requests_for_repo = []
+        for completion_type in sorted({goal.completion_type for goal in repo_goals}):
+            resource, params = RECONCILE_RESOURCES[completion_type]
+            params = dict(params)
+            if completion_type in ('commit', 'issue'):
+                since = min(goal.created_at for goal in repo_goals if goal.completion_type == completion_type)
+                params['since'] = since.strftime('%Y-%m-%dT%H:%M:%SZ')
+            path = f'/repos/{repo_owner}/{repo_name}/{resource}'
+            url = f"{path}?{'&'.join(f'{key}={value}' for key, value in sorted(params.items()))}"
+            requests_for_repo.append((completion_type, url, path, params, etags.get(url)))
+        plans[(repo_owner, repo_name)] = (state.id, token, requests_for_repo)
+    if not plans:
+        return 0
+
+    workers = max(1, min(application.config['GOAL_RECONCILE_CONCURRENCY'], len(plans)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='goal-reconciler') as pool:
+        futures = {
+            (repo_key, completion_type, url): pool.submit(fetch_with_etag, path, params, token, etag)
+            for repo_key, (state_id, token, requests_for_repo) in plans.items()
+            for completion_type, url, path, params, etag in requests_for_repo
+        }
+
+    matched_ids = []
+    for repo_key, (state_id, token, requests_for_repo) in plans.items():
+        etags, errors = {}, []
+        for completion_type, url, path, params, etag in requests_for_repo:
+            try:
+                status_code, new_etag, items = futures[(repo_key, completion_type, url)].result()
+            except Exception as e:
+                errors.append(f'{completion_type}: {e}')
+                continue
+            if status_code not in (200, 304):
+                errors.append(f'{completion_type}: HTTP {status_code}')
+                continue
+            if new_etag:
+                etags[url] = new_etag
+            if items:
+                matched_ids.extend(
+                    goal.id for goal in goals_by_repo[repo_key]
+                    if goal.completion_type == completion_type and polled_goal_matches(goal, completion_type, items)
+                )
+        RepoPollState.query.filter_by(id=state_id).update(
+            {'etags': json.dumps(etags), 'last_error': '; '.join(errors) or None}, synchronize_session=False
+        )
+        db.session.commit()
+
+    if complete_goals(matched_ids):
+        for repo_key in plans:
+            invalidate_goal_matchers(*repo_key)
+    return len(plans)
+
+def _reconcile_goals_in_context():
+    with application.app_context():
+        try:
+            reconcile_goals()
+        finally:
+            db.session.remove()
+        # Always report idle so the pool sleeps a full interval between rounds
+        return 0
+
+goal_reconciler = WorkerPool(
+    'goal-reconciler',
+    _reconcile_goals_in_context,
+    workers=min(1, application.config['GOAL_RECONCILE_WORKERS']),
+    idle_interval=application.config['GOAL_RECONCILE_INTERVAL']
+)
+
+def sweep_overdue_goals(now=None, batch_size=None):
+    """Move active goals whose deadline has passed to 'overdue' in batched UPDATEs.
+    Returns the next active deadline so the sweeper knows when to wake up next.
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or application.config['DEADLINE_SWEEP_BATCH_SIZE']
+    while True:
+        expired = Goal.query.with_entities(Goal.id, Goal.embed_token, Goal.repo_owner, Goal.repo_name) \
+            .filter(Goal.status == 'active', Goal.deadline <= now) \
+            .order_by(Goal.deadline).limit(batch_size).all()
+        if not expired:
+            break
+        Goal.query.filter(
+            Goal.id.in_([goal.id for goal in expired]),
+            Goal.status == 'active'
+        ).update({'status': 'overdue'}, synchronize_session=False)
+        db.session.commit()
+        for repo_key in {(goal.repo_owner, goal.repo_name) for goal in expired}:
+            invalidate_goal_matchers(*repo_key)
+        publish_goal_changes(goal.embed_token for goal in expired)
+        if len(expired) < batch_size:
+            break
+    return db.session.query(db.func.min(Goal.deadline)).filter(Goal.status == 'active').scalar()
+
+def _sweep_overdue_goals_in_context(now):
+    with application.app_context():
+        try:
+            return sweep_overdue_goals(now)
+        finally:
+            db.session.remove()
+
+deadline_sweeper = DeadlineSweeper(
+    _sweep_overdue_goals_in_context,
+    max_sleep=application.config['DEADLINE_SWEEP_MAX_SLEEP']
+)
+
+def probe_database():
+    with application.app_context():
+        try:
+            db.session.execute(text('SELECT 1'))
+        finally:
+            db.session.remove()
+    return 'ok'
+
+def probe_github():
+    # /rate_limit does not count against the rate limit, unlike /zen
+    response = github.get('/rate_limit', timeout=application.config['HEALTH_CHECK_TIMEOUT'], retries=0)
+    if response.status_code != 200:
+        raise RuntimeError(f'status {response.status_code}')
+    return 'ok'
+
+health_monitor = HealthMonitor(max_age=application.config['HEALTH_CHECK_MAX_AGE'])
+health_monitor.register('database', probe_database)
+# GitHub being slow or down degrades the report but must not take the node out of rotation
+health_monitor.register('github_api', probe_github, critical=False)
+health_probes = WorkerPool(
+    'health-probe',
+    health_monitor.refresh,
+    workers=1 if application.config['HEALTH_CHECK_INTERVAL'] > 0 else 0,
+    idle_interval=application.config['HEALTH_CHECK_INTERVAL']
+)
+
+@application.before_request
+def start_background_workers():
+    webhook_workers.start()
+    webhook_provisioner.start()
+    goal_reconciler.start()
+    health_probes.start()
+    if application.config['DEADLINE_SWEEPER_ENABLED']:
+        deadline_sweeper.start()
+
+@application.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if application.config['SQL_QUERY_DEBUG']:
+        g.query_log = QueryLog()
+
+@application.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # The route rule, not the path, so goal ids and tokens do not become label values
+        endpoint = request.endpoint or 'unmatched'
+        http_requests.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        http_request_duration.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+        http_request_db_queries.observe(g.get('db_queries', 0), endpoint=endpoint)
+        http_request_db_duration.observe(g.get('db_seconds', 0.0), endpoint=endpoint)
+    query_log = g.pop('query_log', None)
+    if query_log is not None:
+        response.headers['X-SQL-Queries'] = query_log.summary()
+        response.headers['Server-Timing'] = f'db;dur={query_log.total_seconds * 1000:.1f};desc="{query_log.count} queries"'
+        repeated = query_log.repeated(application.config['SQL_REPEAT_THRESHOLD'])
+        if repeated:
+            print(f"Warning: possible N+1 in {request.method} {request.path}: "
+                  f"ran {repeated[0][1]} times: {repeated[0][0]}\n{query_log.describe()}")
+    return response
+
+@application.cli.command('webhook-worker')
+def run_webhook_worker():
+    """Drain the webhook queue and provision pending hooks in the foreground (for a dedicated worker process)."""
+    pools = [
+        WorkerPool(
+            'webhook-worker',
+            _drain_webhook_queue_in_context,
+            workers=max(1, application.config['WEBHOOK_WORKERS']),
+            idle_interval=application.config['WEBHOOK_POLL_INTERVAL']
+        ),
+        WorkerPool(
+            'webhook-provisioner',
+            _provision_pending_webhooks_in_context,
+            workers=max(1, application.config['WEBHOOK_PROVISION_WORKERS']),
+            idle_interval=application.config['WEBHOOK_POLL_INTERVAL']
+        )
+    ]
+    for pool in pools:
+        pool.start()
+    try:
+        while all(pool.running for pool in pools):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for pool in pools:
+            pool.stop()
+
+@application.cli.command('reconcile-goals')
+def run_goal_reconciler():
+    """Poll GitHub once for goals without a working webhook (e.g. from cron)."""
+    polled = reconcile_goals()
+    click.echo(f'Polled {polled} repo(s)')
+
+@application.cli.command('update-webhook-events')
+def update_webhook_events():
+    """Subscribe existing shared hooks to every event in GITHUB_WEBHOOK_EVENTS."""
+    events = application.config['GITHUB_WEBHOOK_EVENTS']
+    updated = 0
+    for repo_hook in RepoWebhook.query.filter(RepoWebhook.hook_id.isnot(None)).all():
+        user = provisioning_user(repo_hook)
+        if user is None:
+            click.echo(f"{repo_hook.repo_owner}/{repo_hook.repo_name}: no token available, skipped")
+            continue
+        response = github.patch(f'/repos/{repo_hook.repo_owner}/{repo_hook.repo_name}/hooks/{repo_hook.hook_id}',
+                                token=user.access_token, json={'events': events})
+        if response.status_code == 200:
+            updated += 1
+        else:
+            click.echo(f"{repo_hook.repo_owner}/{repo_hook.repo_name}: GitHub answered {response.status_code}")
+    click.echo(f"Updated {updated} hook(s) to {', '.join(events)}")
+
+@application.cli.command('migrate-schema')
+@click.option('--status', 'show_status', is_flag=True, help='List applied and pending migrations without running any.')
+@click.option('--to', 'target', type=int, default=None, help='Stop after this migration version.')
+@click.option('--batch-size', type=int, default=None, help='Rows per backfill transaction.')
+def migrate_schema(show_status, target, batch_size):
+    """Apply pending schema migrations from migrations/ (run once per deploy, before the new code serves traffic)."""
+    runner = MigrationRunner(
+        db.engine,
+        load_migrations(os.path.join(application.root_path, 'migrations')),
+        db.metadata,
+        batch_size=batch_size or application.config['MIGRATION_BATCH_SIZE'],
+        backfill_pause=application.config['MIGRATION_BACKFILL_PAUSE'],
+        echo=click.echo
+    )
+    if show_status:
+        applied = runner.applied()
+        for migration in runner.migrations:
+            state = f'applied {applied[migration.version]:%Y-%m-%d %H:%M}' if migration.version in applied else 'pending'
+            click.echo(f'{migration.version:04d} {migration.name:<32} {state}')
+        return
+    done = runner.run(target)
+    click.echo(f'Applied {len(done)} migration(s)' if done else 'Database schema is already up to date.')
+
+@application.cli.command('build-assets')
+def build_static_assets():
+    """Write content-hashed copies of the static assets and their manifest to static/dist."""
+    manifest = build_assets(application.static_folder)
+    static_assets.load()
+    click.echo(f'Fingerprinted {len(manifest)} asset(s) into static/dist')
+
+@application.cli.command('consolidate-webhooks')
+@click.option('--dry-run', is_flag=True, help='Report what would change without touching GitHub or the database.')
+def consolidate_webhooks(dry_run):
+    """Collapse per-goal webhooks into one shared, reference-counted hook per repository."""
+    goals = Goal.query.filter(Goal.repo_owner.isnot(None), Goal.repo_name.isnot(None)) \
+        .order_by(Goal.repo_owner, Goal.repo_name, Goal.id).all()
+    by_repo = {}
+    for goal in goals:
+        by_repo.setdefault((goal.repo_owner, goal.repo_name), []).append(goal)
+
+    tokens = {user.github_id: user.access_token for user in User.query.all()}
+    removed_hooks = 0
+    for (repo_owner, repo_name), repo_goals in by_repo.items():
+        repo_hook = RepoWebhook.query.filter_by(repo_owner=repo_owner, repo_name=repo_name).first()
+        hook_owners = {}
+        for goal in repo_goals:
+            if goal.webhook_id:
+                hook_owners.setdefault(goal.webhook_id, goal.user_github_id)
+        keep = repo_hook.hook_id if repo_hook and repo_hook.hook_id else next(iter(hook_owners), None)
+        duplicates = [hook_id for hook_id in hook_owners if hook_id != keep]
+
+        click.echo(f"{repo_owner}/{repo_name}: {len(repo_goals)} goal(s), keeping hook {keep}, "
+                   f"removing {len(duplicates)} duplicate(s)")
+        if dry_run:
+            continue
+
+        for hook_id in duplicates:
+            token = tokens.get(hook_owners[hook_id])
+            try:
+                if token and delete_github_webhook(token, repo_owner, repo_name, hook_id):
+                    removed_hooks += 1
+                else:
+                    click.echo(f"  could not delete hook {hook_id}; remove it from the repository settings")
+            except Exception as e:
+                click.echo(f"  could not delete hook {hook_id}: {e}")
+
+        if repo_hook is None:
+            repo_hook = RepoWebhook(repo_owner=repo_owner, repo_name=repo_name)
+            db.session.add(repo_hook)
+        repo_hook.hook_id = keep
+        repo_hook.goal_count = len(repo_goals)
+        if keep and not repo_hook.owner_github_id:
+            repo_hook.owner_github_id = hook_owners.get(keep)
+        for goal in repo_goals:
+            goal.webhook_id = keep
+        db.session.commit()
+
+    click.echo(f"Consolidated {len(by_repo)} repositories; removed {removed_hooks} duplicate hook(s).")
+
 @application.route('/')
 def index():
     response = make_response(render_template('index.html', username=session.get('username')))
@@ -173,74 +1284,76 @@ def manifest():
     response.headers['Cache-Control'] = 'no-cache'
     return response
 
+WEBHOOK_BODY_CHUNK_SIZE = 64 * 1024
+
 @application.route('/api/github-webhook', methods=['POST'])
 def github_webhook():
+    """Verify a GitHub delivery, queue it for the webhook workers and acknowledge it immediately."""
     signature_header = request.headers.get('X-Hub-Signature-256')
     if not signature_header:
         return jsonify({'error': 'Request is missing signature header'}), 403
-    hash_object = hmac.new(
-        application.config['SECRET_KEY'].encode('utf-8'),
-        msg=request.data,
-        digestmod=hashlib.sha256
-    )
-    expected_signature = "sha256=" + hash_object.hexdigest()
+    max_bytes = application.config['WEBHOOK_MAX_BODY_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({'error': f'Payload exceeds {max_bytes} bytes'}), 413
+
+    # One pass over the body: size check, HMAC and parse advance together chunk by chunk
+    reader = WebhookBodyReader(application.config['SECRET_KEY'], max_bytes, expected_size=request.content_length)
+    try:
+        while True:
+            chunk = request.stream.read(WEBHOOK_BODY_CHUNK_SIZE)
+            if not chunk:
+                break
+            reader.feed(chunk)
+    except WebhookBodyTooLarge as e:
+        return jsonify({'error': str(e)}), 413
 
-    if not hmac.compare_digest(expected_signature, signature_header):
+    if not reader.verify(signature_header):
         return jsonify({'error': 'Invalid signature. Request rejected.'}), 403
+    try:
+        payload = reader.payload()
+    except WebhookBodyInvalid as e:
+        return jsonify({'error': str(e)}), 400
 
-    payload = request.get_json()
-    event_type = request.headers.get('X-GitHub-Event')
-    
-    if event_type == 'push':
-        repo_full_name = payload.get('repository', {}).get('full_name')
-        if not repo_full_name:
-            return jsonify({'status': 'Payload missing repository name'}), 400
-        
-        repo_owner, repo_name = repo_full_name.split('/')
-        goal = Goal.query.filter_by(
-            repo_owner=repo_owner, 
-            repo_name=repo_name, 
-            status='active',
-            completion_type='commit'
-        ).first()
-
-        if not goal:
-            return jsonify({'status': 'No active goal for this repository with commit completion type'}), 200
-
-        for commit in payload.get('commits', []):
-            commit_message = commit.get('message', '')
-            if goal.completion_condition in commit_message:
-                goal.status = 'completed'
-                goal.completed_at = datetime.utcnow()
-                db.session.commit()
-                break
-    
-    elif event_type == 'issues':
-        action = payload.get('action')
-        if action == 'closed':
-            repo_full_name = payload.get('repository', {}).get('full_name')
-            issue_number = payload.get('issue', {}).get('number')
-            
-            if not repo_full_name or not issue_number:
-                return jsonify({'status': 'Payload missing repository or issue information'}), 400
-            
-            repo_owner, repo_name = repo_full_name.split('/')
-            goal = Goal.query.filter_by(
-                repo_owner=repo_owner,
-                repo_name=repo_name,
-                status='active',
-                completion_type='issue'
-            ).first()
-            
-            if not goal:
-                return jsonify({'status': 'No active goal for this repository with issue completion type'}), 200
-            
-            if str(issue_number) == goal.completion_condition or f"#{issue_number}" == goal.completion_condition:
-                goal.status = 'completed'
-                goal.completed_at = datetime.utcnow()
-                db.session.commit()
+    delivery_id = request.headers.get('X-GitHub-Delivery')
+    if delivery_id and recent_deliveries.seen(delivery_id):
+        return jsonify({'status': 'duplicate'}), 200
+
+    delivery = WebhookDelivery(
+        delivery_id=delivery_id,
+        event_type=request.headers.get('X-GitHub-Event') or 'unknown',
+        # Only the fields the handlers read are queued, not the whole delivery
+        payload=json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    )
+    try:
+        if delivery_id:
+            # The primary key makes a redelivery racing on another worker fail here
+            db.session.add(SeenDelivery(delivery_id=delivery_id))
+        db.session.add(delivery)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        if not reclaim_expired_delivery_id(delivery_id):
+            delivery_dedup_stats['table_hits'] += 1
+            recent_deliveries.add(delivery_id)
+            return jsonify({'status': 'duplicate'}), 200
+        db.session.add(delivery)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Database error: {str(e)}'}), 500
 
-    return jsonify({'status': 'received'}), 200
+    if delivery_id:
+        recent_deliveries.add(delivery_id)
+        if recent_deliveries.misses % 500 == 0:
+            purge_seen_deliveries()
+    webhook_workers.wake()
+    return jsonify({'status': 'queued', 'delivery': delivery.id}), 202
+
+@application.route('/api/github-webhook/queue')
+def webhook_queue_status():
+    if 'user_github_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    return jsonify(webhook_queue_stats()), 200
 
 @application.route('/auth/github')
 def github_auth():
@@ -275,7 +1388,7 @@ def github_callback():
     if not client_id or not client_secret:
         return "Error: GitHub OAuth not configured properly", 500
     
-    token_url = 'https://github.com/login/oauth/access_token'
+    token_url = f"{github.oauth_url}/login/oauth/access_token"
     payload = {
         'client_id': client_id,
         'client_secret': client_secret,
@@ -284,7 +1397,7 @@ def github_callback():
     headers = {'Accept': 'application/json'}
     
     try:
-        token_response = requests.post(token_url, json=payload, headers=headers)
+        token_response = github.post(token_url, json=payload, headers=headers)
         token_response.raise_for_status()
         token_data = token_response.json()
         
@@ -298,11 +1411,8 @@ def github_callback():
     except requests.RequestException as e:
         return f"Error communicating with GitHub: {str(e)}", 500
     
-    user_url = 'https://api.github.com/user'
-    headers = {'Authorization': f'token {access_token}'}
-    
     try:
-        user_response = requests.get(user_url, headers=headers)
+        user_response = github.get('/user', token=access_token)
         user_response.raise_for_status()
         user_data = user_response.json()
         
@@ -339,14 +1449,202 @@ def github_callback():
         db.session.rollback()
         return f"Database error: {str(e)}", 500
 
+# Columns each public goal field is built from, so /api/goals?fields= selects only what it returns
+GOAL_FIELD_COLUMNS = {
+    'id': ('id',),
+    'user_github_id': ('user_github_id',),
+    'title': ('title',),
+    'details': ('details',),
+    'deadline': ('deadline',),
+    'deadline_display': ('deadline_display', 'deadline'),
+    'repo_url': ('repo_url',),
+    'completion_condition': ('completion_condition',),
+    'completion_type': ('completion_type',),
+    'status': ('status',),
+    'webhook_status': ('webhook_status',),
+    'created_at': ('created_at',),
+    'completed_at': ('completed_at',),
+    'embed_token': ('embed_token',),
+    'embed_url': ('embed_token',)
+}
+GOAL_DERIVED_FIELDS = {'deadline', 'deadline_display', 'created_at', 'completed_at', 'embed_url'}
+
+def serialize_goal_rows(rows, column_names, fields, base_url):
+    """Serialize column-projected goal rows in bulk, producing the same values as Goal.to_dict().
+
+    `column_names` gives the order of the selected columns in each row. Everything that does not
+    depend on the row (field plan, column positions, embed URL prefix) is worked out once, and each
+    deadline is formatted once for both `deadline` and `deadline_display`.
+    """
+    position = {name: index for index, name in enumerate(column_names)}
+    plain = tuple(field for field in fields if field not in GOAL_DERIVED_FIELDS)
+    if len(plain) > 1:
+        pick = itemgetter(*(position[field] for field in plain))
+    elif plain:
+        single = position[plain[0]]
+        pick = lambda row: (row[single],)
+    else:
+        pick = lambda row: ()
+
+    want_deadline = 'deadline' in fields
+    want_display = 'deadline_display' in fields
+    want_created = 'created_at' in fields
+    want_completed = 'completed_at' in fields
+    want_embed_url = 'embed_url' in fields
+    deadline_at = position.get('deadline')
+    display_at = position.get('deadline_display')
+    created_at = position.get('created_at')
+    completed_at = position.get('completed_at')
+    token_at = position.get('embed_token')
+    embed_prefix = f'{base_url}/embed/'
+
+    serialized = []
+    append = serialized.append
+    for row in rows:
+        goal = dict(zip(plain, pick(row)))
+        if want_deadline or want_display:
+            deadline = row[deadline_at]
+            iso = deadline.isoformat() if deadline else None
+            if want_deadline:
+                goal['deadline'] = iso + 'Z' if iso else None
+            if want_display:
+                # Same as strftime('%d/%m/%Y %H:%M'), sliced from the ISO string already built
+                goal['deadline_display'] = row[display_at] or (
+                    f'{iso[8:10]}/{iso[5:7]}/{iso[:4]} {iso[11:16]}' if iso else None
+                )
+        if want_created:
+            value = row[created_at]
+            goal['created_at'] = value.isoformat() + 'Z' if value else None
+        if want_completed:
+            value = row[completed_at]
+            goal['completed_at'] = value.isoformat() + 'Z' if value else None
+        if want_embed_url:
+            token = row[token_at]
+            goal['embed_url'] = embed_prefix + token if token else None
+        append(goal)
+    return serialized
+
+def json_response(payload):
+    """jsonify() equivalent that encodes with orjson when it is installed."""
+    if orjson is None:
+        return jsonify(payload)
+    return application.response_class(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), mimetype='application/json')
+
+def encode_goal_cursor(deadline, goal_id):
+    raw = json.dumps([deadline.isoformat(), goal_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_goal_cursor(cursor):
+    """Return the (deadline, id) a page cursor points after; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        deadline, goal_id = json.loads(raw)
+        return datetime.fromisoformat(deadline), int(goal_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+
 @application.route('/api/goals', methods=['GET'])
 def get_goals():
+    """List the user's goals ordered by (deadline, id), one keyset page at a time.
+    Query params: limit, cursor (from X-Next-Cursor), status, completion_type and fields (comma-separated).
+    """
     if 'user_github_id' not in session:
         return jsonify({'error':'Not authenticated'}),401
     user_id = session['user_github_id']
-    #goals = Goal.query.filter_by(user_github_id = user_id).order_by(Goal.created_at.desc()).all()
-    goals = Goal.query.filter_by(user_github_id = user_id).order_by(Goal.deadline.asc()).all()
-    return jsonify([goal.to_dict() for goal in goals])
+
+    try:
+        limit = int(request.args.get('limit', application.config['GOALS_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, application.config['GOALS_MAX_PAGE_SIZE']))
+
+    fields = list(GOAL_FIELD_COLUMNS)
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in GOAL_FIELD_COLUMNS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    # id and deadline are always selected because the next cursor is built from them
+    column_names = {'id', 'deadline'}
+    for field in fields:
+        column_names.update(GOAL_FIELD_COLUMNS[field])
+    column_names = sorted(column_names)
+    query = db.session.query(*(getattr(Goal, name) for name in column_names)) \
+        .filter(Goal.user_github_id == user_id)
+
+    if request.args.get('status'):
+        query = query.filter(Goal.status == request.args['status'])
+    if request.args.get('completion_type'):
+        query = query.filter(Goal.completion_type == request.args['completion_type'])
+    if request.args.get('cursor'):
+        try:
+            after_deadline, after_id = decode_goal_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(db.or_(
+            Goal.deadline > after_deadline,
+            db.and_(Goal.deadline == after_deadline, Goal.id > after_id)
+        ))
+
+    rows = query.order_by(Goal.deadline.asc(), Goal.id.asc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    base_url = os.environ.get('BASE_URL', 'http://localhost:5000')
+    response = json_response(serialize_goal_rows(rows, column_names, fields, base_url))
+    if has_more:
+        next_cursor = encode_goal_cursor(rows[-1].deadline, rows[-1].id)
+        next_args = {key: value for key, value in request.args.items() if key != 'cursor'}
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("get_goals", cursor=next_cursor, **next_args)}>; rel="next"'
+
+    # Let the browser revalidate the page cheaply instead of re-downloading it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag(weak=True)
+    return response.make_conditional(request)
+
+def goal_from_payload(data, user_id):
+    """Validate a goal creation payload and build the (unsaved) Goal.
+    Raises ValueError with a user-facing message when the payload is invalid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Goal must be a JSON object')
+    if not all(k in data for k in ('title','details','deadline','repo_url','completion_condition')):
+        raise ValueError('Missing required fields')
+    for field in ('title', 'details', 'completion_condition'):
+        if not isinstance(data[field], str) or not data[field].strip():
+            raise ValueError(f'{field} must be a non-empty string')
+    try:
+        repo_url = data.get('repo_url')
+        repo_owner,repo_name = repo_url.rstrip('/').split('/')[-2:]
+        if '.git' in repo_name:
+            repo_name = repo_name.replace('.git','')
+    except (AttributeError, ValueError, IndexError):
+        raise ValueError('Invalid repository URL. Use format: https://github.com/owner/repo')
+    completion_type = data.get('completion_type', 'commit')
+
+    if completion_type not in ['commit', 'issue', 'pr', 'tag', 'manual']:
+        raise ValueError('Invalid completion_type. Must be one of "commit", "issue", "pr", "tag", or "manual"')
+
+    parsed_deadline = parse_deadline(data.get('deadline'))
+    # 🔥 Reject past deadlines
+    if parsed_deadline < datetime.utcnow():
+        raise ValueError('Deadline cannot be in the past')
+
+    return Goal(
+        user_github_id=user_id,
+        title=data.get('title'),
+        details=data.get('details'),
+        deadline=parsed_deadline,
+        deadline_display=data.get('deadline_display') or parsed_deadline.strftime('%d/%m/%Y %H:%M'),
+        repo_url=repo_url,
+        completion_condition=data.get('completion_condition'),
+        completion_type=completion_type,
+        repo_owner=repo_owner,
+        repo_name=repo_name,
+        embed_token=secrets.token_urlsafe(16)
+    )
 
 @application.route('/api/goals', methods=['POST'])
 def create_goal():
@@ -367,61 +1665,108 @@ def create_goal():
     if not user:
         return jsonify({'error':'User not found'}),404
     try:
-        repo_url = data.get('repo_url')
-        repo_owner,repo_name = repo_url.rstrip('/').split('/')[-2:]
-        if '.git' in repo_name:
-            repo_name = repo_name.replace('.git','')
-    except (ValueError, IndexError):
-        return jsonify({'error':'Invalid repository URL. Use format: https://github.com/owner/repo'}),400
-    embed_token = secrets.token_urlsafe(16)
-    completion_type = data.get('completion_type', 'commit')
-
-    if completion_type not in ['commit', 'issue', 'pr', 'tag', 'manual']:
-        return jsonify({'error':'Invalid completion_type. Must be one of "commit", "issue", "pr", "tag", or "manual"'}), 400
+        goal = goal_from_payload(data, user_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    repo_owner, repo_name = goal.repo_owner, goal.repo_name
+    # The hook is created by the background provisioner; the goal is usable as soon as it is saved
+    if os.environ.get('BASE_URL'):
+        goal.webhook_status = 'pending'
 
     try:
-        raw_deadline = data.get('deadline')
-        parsed_deadline = parse_deadline(raw_deadline)
-
-        # 🔥 Reject past deadlines
-        if parsed_deadline < datetime.utcnow():
-            return jsonify({'error': 'Deadline cannot be in the past'}), 400
-
-        goal = Goal(
-            user_github_id=user_id,
-            title=data.get('title'),
-            details=data.get('details'),
-            deadline=parsed_deadline,
-            deadline_display=data.get('deadline_display') or parsed_deadline.strftime('%d/%m/%Y %H:%M'),
-            repo_url=data.get('repo_url'),
-            completion_condition=data.get('completion_condition'),
-            completion_type=completion_type,
-            repo_owner=repo_owner,
-            repo_name=repo_name,
-            embed_token=embed_token
-        )
+        # Every goal on a repo shares one webhook; count this goal against it
+        repo_hook = repo_webhook_record(repo_owner, repo_name, user_id)
         db.session.add(goal)
+        if not adjust_repo_webhook_count(repo_hook.id, 1):
+            # The record was released by a concurrent delete; start a fresh one
+            repo_hook = RepoWebhook(repo_owner=repo_owner, repo_name=repo_name, owner_github_id=user_id, goal_count=1)
+            db.session.add(repo_hook)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Database error: {str(e)}'}), 500
-    
-    base_url = os.environ.get('BASE_URL')
-    if not base_url:
-        return jsonify(goal.to_dict()), 201
+    invalidate_goal_matchers(repo_owner, repo_name)
+    deadline_sweeper.schedule(goal.deadline)
+    if goal.webhook_status == 'pending':
+        webhook_provisioner.wake()
+
+    return jsonify(goal.to_dict()), 201
+
+@application.route('/api/goals/bulk', methods=['POST'])
+def create_goals_bulk():
+    """Create many goals in one transaction; their repos' shared webhooks are provisioned in the background.
+    Every item is validated before anything is written; any invalid item rejects the whole batch.
+    """
+    if 'user_github_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    data = request.get_json(silent=True)
+    items = data.get('goals') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty list of goals'}), 400
+    max_items = application.config['GOALS_BULK_MAX_ITEMS']
+    if len(items) > max_items:
+        return jsonify({'error': f'At most {max_items} goals per request'}), 413
+
+    user_id = session['user_github_id']
+    user = User.query.filter_by(github_id=user_id).first()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    goals, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            goals.append(goal_from_payload(item, user_id))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        return jsonify({'error': 'Invalid goals; nothing was created', 'results': errors}), 400
+
+    # As in create_goal, hooks are created by the background provisioner, which retries failures
+    pending = bool(os.environ.get('BASE_URL'))
+    goals_by_repo = defaultdict(list)
+    for goal in goals:
+        if pending:
+            goal.webhook_status = 'pending'
+        goals_by_repo[(goal.repo_owner, goal.repo_name)].append(goal)
+
+    # Records are created (and committed) first; the counts then change in the same transaction as
+    # the goal inserts, so a failed batch leaves every count as it was
+    repo_hook_ids = {repo_key: repo_webhook_record(*repo_key, user_id).id for repo_key in goals_by_repo}
     try:
-        webhook_url = f'{base_url}/api/github-webhook'
-        webhook_secret = application.config['SECRET_KEY']
-        webhook_data = create_github_webhook(
-            user.access_token,repo_owner, repo_name, webhook_url, webhook_secret
-        )
-        if webhook_data:
-            goal.webhook_id = str(webhook_data.get('id'))
-            db.session.commit()
+        for (repo_owner, repo_name), repo_goals in goals_by_repo.items():
+            if not adjust_repo_webhook_count(repo_hook_ids[(repo_owner, repo_name)], len(repo_goals)):
+                # The record was released by a concurrent delete; start a fresh one
+                db.session.add(RepoWebhook(repo_owner=repo_owner, repo_name=repo_name,
+                                           owner_github_id=user_id, goal_count=len(repo_goals)))
+        db.session.add_all(goals)
+        db.session.flush()
+        # Read before commit expires them, so none of this costs a per-goal SELECT afterwards
+        goal_ids = [goal.id for goal in goals]
+        deadlines = [goal.deadline for goal in goals]
+        db.session.commit()
     except Exception as e:
-        print(f"Warning: Failed to create webhook: {str(e)}")
-    
-    return jsonify(goal.to_dict()), 201
+        db.session.rollback()
+        # Drop the records this batch created for repos that still have no goal
+        RepoWebhook.query.filter(
+            RepoWebhook.id.in_(repo_hook_ids.values()),
+            RepoWebhook.goal_count <= 0,
+            RepoWebhook.hook_id.is_(None)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return jsonify({'error': f'Database error: {str(e)}'}), 500
+    for repo_key in goals_by_repo:
+        invalidate_goal_matchers(*repo_key)
+    for deadline in deadlines:
+        deadline_sweeper.schedule(deadline)
+
+    if pending:
+        webhook_provisioner.wake()
+    # Refresh every expired goal with one SELECT rather than one per goal in to_dict()
+    Goal.query.filter(Goal.id.in_(goal_ids)).all()
+
+    results = [{'index': index, 'goal': goal.to_dict(), 'webhook': goal.webhook_status or 'skipped'}
+               for index, goal in enumerate(goals)]
+    return jsonify({'results': results}), 201
 
 @application.route('/api/goals/<int:goal_id>', methods=['DELETE'])
 def delete_goal(goal_id):
@@ -434,19 +1779,32 @@ def delete_goal(goal_id):
     if not goal:
         return jsonify({'error': 'Goal not found'}), 404
 
-    # Attempt to delete GitHub webhook if we have the information
-    if goal.webhook_id and goal.repo_owner and goal.repo_name:
-        user = User.query.filter_by(github_id=user_github_id).first()
-        if user and user.access_token:
-            try:
-                delete_github_webhook(user.access_token, goal.repo_owner, goal.repo_name, goal.webhook_id)
-            except Exception as e:
-                # Log and continue; we still delete the local goal to avoid dangling state
-                print(f"Error deleting GitHub webhook {goal.webhook_id} for {goal.repo_owner}/{goal.repo_name}: {e}")
+    repo_hook = None
+    if goal.repo_owner and goal.repo_name:
+        repo_hook = RepoWebhook.query.filter_by(repo_owner=goal.repo_owner, repo_name=goal.repo_name).first()
+    # Goals created before webhooks were shared own their hook outright
+    legacy_hook_id = goal.webhook_id if repo_hook is None else None
 
     # Delete the goal from the database
+    repo_key = (goal.repo_owner, goal.repo_name)
+    embed_token = goal.embed_token
     db.session.delete(goal)
+    if repo_hook:
+        adjust_repo_webhook_count(repo_hook.id, -1)
     db.session.commit()
+    invalidate_goal_matchers(*repo_key)
+    publish_goal_changes([embed_token])
+
+    try:
+        if repo_hook:
+            release_repo_webhook(repo_hook, user_github_id)
+        elif legacy_hook_id and repo_key[0] and repo_key[1]:
+            user = User.query.filter_by(github_id=user_github_id).first()
+            if user and user.access_token:
+                delete_github_webhook(user.access_token, repo_key[0], repo_key[1], legacy_hook_id)
+    except Exception as e:
+        # Log and continue; the local goal is already gone so nothing is left dangling here
+        print(f"Error deleting GitHub webhook for {repo_key[0]}/{repo_key[1]}: {e}")
 
     return jsonify({'status': 'deleted'}), 200
 
@@ -491,6 +1849,9 @@ def update_goal(goal_id):
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         goal.deadline = parsed
+        # Moving the deadline of an expired goal into the future gives it another chance
+        if goal.status == 'overdue' and parsed > datetime.utcnow():
+            goal.status = 'active'
         # update the display string if provided in payload, otherwise store a formatted version
         if 'deadline_display' in data and data.get('deadline_display'):
             goal.deadline_display = data.get('deadline_display')
@@ -511,32 +1872,98 @@ def update_goal(goal_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Database error: {str(e)}'}), 500
+    invalidate_goal_matchers(goal.repo_owner, goal.repo_name)
+    publish_goal_changes([goal.embed_token])
+    if goal.status == 'active':
+        deadline_sweeper.schedule(goal.deadline)
 
     return jsonify(goal.to_dict()), 200
 
+embed_shells = {}
+embed_shells_lock = threading.Lock()
+
+def embed_shell(theme):
+    """The widget page for a theme, rendered and compressed once per process.
+    Nothing goal-specific is in it: the page reads its token from the URL and fetches the data endpoint.
+    """
+    shell = embed_shells.get(theme)
+    if shell is None:
+        with embed_shells_lock:
+            shell = embed_shells.get(theme)
+            if shell is None:
+                max_age = application.config['EMBED_SHELL_MAX_AGE']
+                shell = embed_shells[theme] = PrecompressedAsset(
+                    render_template('embed.html', theme=theme,
+                                    live_updates=application.config['EMBED_LIVE_UPDATES']),
+                    'text/html',
+                    cache_control=f'public, max-age={max_age}, s-maxage={max_age}, stale-while-revalidate={max_age}'
+                )
+    return shell
+
 @application.route('/embed/<token>')
 def embed_widget(token):
-    goal = Goal.query.filter_by(embed_token=token).first()
-    if not goal:
-        return "Widget not found", 404
-    
     # Read theme paramter, default to 'dark'
     theme = request.args.get('theme', 'dark')
     if theme not in ['light', 'dark']:
         theme = 'dark'
-    
-    response = make_response(render_template('embed.html', goal=goal, theme=theme))
+
+    # Unknown tokens are reported by the data endpoint, so a view never touches the database here
+    response = embed_shell(theme).response(request, application.response_class)
     response.headers['X-Frame-Options'] = 'ALLOWALL'
     return response
 
-@application.route('/api/embed/<token>/data')
-def embed_data(token):
-    goal = Goal.query.filter_by(embed_token=token).first()
-    if not goal:
-        return jsonify({'error': 'Goal not found'}), 404
-    
-    now_utc = datetime.utcnow()
-    
+# The goal fields embed_state() reads; cached per embed token so widget views skip the database
+GoalSnapshot = namedtuple('GoalSnapshot', ['id', 'title', 'details', 'deadline', 'status', 'completion_condition',
+                                           'completed_at', 'created_at', 'updated_at'])
+SNAPSHOT_DATETIME_FIELDS = ('deadline', 'completed_at', 'created_at', 'updated_at')
+
+def create_snapshot_cache():
+    backend = application.config['EMBED_SNAPSHOT_CACHE']
+    ttl = application.config['EMBED_SNAPSHOT_TTL']
+    if backend == 'sqlite':
+        try:
+            return SQLiteSnapshotCache(application.config['EMBED_SNAPSHOT_CACHE_PATH'], ttl=ttl)
+        except Exception as e:
+            print(f"Warning: snapshot cache unavailable, widget data is read from the database: {e}")
+            return NullSnapshotCache(ttl=ttl)
+    if backend == 'memory':
+        return MemorySnapshotCache(ttl=ttl)
+    return NullSnapshotCache(ttl=ttl)
+
+# The TTL is the safety net for a view that read a goal just before a write it then cached over
+embed_snapshots = create_snapshot_cache()
+
+def encode_snapshot(snapshot):
+    values = snapshot._asdict()
+    for field in SNAPSHOT_DATETIME_FIELDS:
+        if values[field] is not None:
+            values[field] = values[field].isoformat()
+    return values
+
+def decode_snapshot(values):
+    values = dict(values)
+    for field in SNAPSHOT_DATETIME_FIELDS:
+        if values.get(field) is not None:
+            values[field] = datetime.fromisoformat(values[field])
+    return GoalSnapshot(**values)
+
+def embed_snapshots_for(tokens):
+    """{token: GoalSnapshot} for the tokens that exist, from the cache where possible and one IN query otherwise."""
+    snapshots = {token: decode_snapshot(values) for token, values in embed_snapshots.get_many(tokens).items()}
+    missing = [token for token in tokens if token not in snapshots]
+    if missing:
+        loaded = {
+            goal.embed_token: GoalSnapshot(*(getattr(goal, field) for field in GoalSnapshot._fields))
+            for goal in Goal.query.filter(Goal.embed_token.in_(missing))
+        }
+        embed_snapshots.set_many({token: encode_snapshot(snapshot) for token, snapshot in loaded.items()})
+        snapshots.update(loaded)
+    return snapshots
+
+def embed_state(goal, now_utc):
+    """Build the public widget payload for a goal (or its GoalSnapshot) along with its ETag and Last-Modified.
+    The validators depend only on goal state, never on the clock, so unchanged goals revalidate with a 304.
+    """
     if goal.status == 'completed':
         time_remaining = 0
         is_overdue = False
@@ -544,8 +1971,8 @@ def embed_data(token):
         time_left = goal.deadline - now_utc
         time_remaining = max(0, int(time_left.total_seconds()))
         is_overdue = time_left.total_seconds() <= 0
-    
-    response_data = {
+
+    payload = {
         'title': goal.title,
         'details': goal.details,
         'deadline': goal.deadline.isoformat() + 'Z',  # UTC with Z suffix
@@ -558,165 +1985,252 @@ def embed_data(token):
         'goal_id': goal.id,
         'server_time_utc': now_utc.isoformat() + 'Z'
     }
-    
-    response = jsonify(response_data)
+
+    etag_data = f"{goal.id}-{goal.status}-{goal.deadline.isoformat()}-{goal.completed_at}-{goal.updated_at}-{is_overdue}"
+    etag = hashlib.md5(etag_data.encode()).hexdigest()
+    # An active goal turns overdue when its deadline passes, so that instant counts as a modification
+    last_modified = max(filter(None, (goal.updated_at or goal.created_at, goal.completed_at,
+                                      goal.deadline if is_overdue else None)), default=None)
+    return payload, etag, last_modified
+
+def add_embed_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Cache-Control, Pragma'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Cache-Control, Pragma, If-None-Match'
+    response.headers['Access-Control-Expose-Headers'] = 'ETag, Last-Modified, Date'
     response.headers['Access-Control-Max-Age'] = '3600'
-    
-    if goal.status == 'completed':
-        response.headers['Cache-Control'] = 'public, max-age=3600, s-maxage=3600'
+    return response
+
+def publish_goal_changes(embed_tokens):
+    """Drop the cached snapshots of these goals and wake any open widget streams for them.
+    Every write to a goal's public state ends here, after its commit.
+    """
+    tokens = [token for token in embed_tokens if token]
+    embed_snapshots.delete_many(tokens)
+    for token in tokens:
+        embed_hub.publish(token)
+
+def embed_cache_control(goal_statuses):
+    """Completed goals never change again; anything still running is only cached briefly."""
+    goal_statuses = list(goal_statuses)
+    if goal_statuses and all(status == 'completed' for status in goal_statuses):
+        return 'public, max-age=3600, s-maxage=3600'
+    # Widgets count down client-side, so a briefly cached copy of an active goal is still correct
+    max_age = application.config['EMBED_ACTIVE_MAX_AGE']
+    return f'public, max-age={max_age}, s-maxage={max_age}'
+
+@application.route('/api/embed/batch', methods=['GET', 'POST'], provide_automatic_options=False)
+def embed_batch():
+    """Widget payloads for many embed tokens in one request, keyed by token (null for unknown tokens).
+    Tokens come from ?tokens=a,b,c, or for long lists a POSTed form field or JSON list of the same name;
+    a form POST is a CORS simple request, so it needs no preflight either.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        raw_tokens = data.get('tokens') if isinstance(data, dict) else request.form.get('tokens', '')
     else:
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-    
-    import hashlib
-    etag_data = f"{goal.id}-{goal.status}-{time_remaining}-{goal.completed_at}"
-    etag = hashlib.md5(etag_data.encode()).hexdigest()
-    response.headers['ETag'] = f'"{etag}"'
+        raw_tokens = request.args.get('tokens', '')
+    if isinstance(raw_tokens, str):
+        raw_tokens = raw_tokens.split(',')
+    if not isinstance(raw_tokens, list):
+        return add_embed_cors_headers(jsonify({'error': 'tokens must be a list'})), 400
+    tokens = list(dict.fromkeys(str(token).strip() for token in raw_tokens if str(token).strip()))
+    if not tokens:
+        return add_embed_cors_headers(jsonify({'error': 'No tokens given'})), 400
+    max_tokens = application.config['EMBED_BATCH_MAX_TOKENS']
+    if len(tokens) > max_tokens:
+        return add_embed_cors_headers(jsonify({'error': f'At most {max_tokens} tokens per request'})), 413
+
+    goals = embed_snapshots_for(tokens)
+    now = datetime.utcnow()
+    payloads, etags, modified = {}, [], []
+    for token in tokens:
+        goal = goals.get(token)
+        if goal is None:
+            payloads[token] = None
+            etags.append(f'{token}:-')
+            continue
+        payload, etag, last_modified = embed_state(goal, now)
+        payloads[token] = payload
+        etags.append(f'{token}:{etag}')
+        if last_modified:
+            modified.append(last_modified)
+
+    # The combined validator changes whenever any one widget's would
+    etag = hashlib.md5('|'.join(etags).encode()).hexdigest()
+    if request.method == 'GET' and request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = jsonify(payloads)
+    add_embed_cors_headers(response)
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    if request.method == 'GET':
+        response.headers['Cache-Control'] = embed_cache_control(goal.status for goal in goals.values())
+    response.set_etag(etag)
+    if modified:
+        response.last_modified = max(modified)
+    return response
+
+@application.route('/api/embed/cache')
+def embed_cache_stats():
+    """Hit rate of the widget snapshot cache in this worker."""
+    if 'user_github_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    return jsonify(embed_snapshots.stats())
+
+@application.route('/api/embed/batch', methods=['OPTIONS'])
+def embed_batch_options():
+    response = add_embed_cors_headers(make_response())
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+@application.route('/api/embed/<token>/data', provide_automatic_options=False)
+def embed_data(token):
+    goal = embed_snapshots_for([token]).get(token)
+    if not goal:
+        return jsonify({'error': 'Goal not found'}), 404
+
+    payload, etag, last_modified = embed_state(goal, datetime.utcnow())
+
+    if request.if_none_match.contains(etag) or (
+        not request.if_none_match and last_modified and request.if_modified_since
+        and request.if_modified_since.replace(tzinfo=None) >= last_modified.replace(microsecond=0)
+    ):
+        response = make_response('', 304)
+    else:
+        response = jsonify(payload)
+    add_embed_cors_headers(response)
+    response.headers['Cache-Control'] = embed_cache_control([goal.status])
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
     
     return response
 
+def _current_embed_state(token):
+    """Re-read a goal for a long-lived connection and release the DB connection straight away."""
+    try:
+        goal = Goal.query.filter_by(embed_token=token).first()
+        return embed_state(goal, datetime.utcnow()) if goal else None
+    finally:
+        db.session.remove()
+
+@application.route('/api/embed/<token>/stream')
+def embed_stream(token):
+    """Server-Sent Events stream that pushes the widget payload whenever the goal changes.
+    Changes made in this process arrive through embed_hub immediately; changes made by other
+    workers are picked up by the periodic recheck.
+    """
+    if application.config['EMBED_LIVE_UPDATES'] != 'stream':
+        return add_embed_cors_headers(jsonify({'error': 'Live updates are disabled'})), 404
+    if not Goal.query.filter_by(embed_token=token).with_entities(Goal.id).first():
+        return jsonify({'error': 'Goal not found'}), 404
+    db.session.remove()
+
+    heartbeat = application.config['EMBED_STREAM_HEARTBEAT']
+    recheck_interval = application.config['EMBED_STREAM_RECHECK_INTERVAL']
+    max_seconds = application.config['EMBED_STREAM_MAX_SECONDS']
+
+    def generate():
+        with embed_hub.listen(token) as listener:
+            # Reconnect after a few seconds once the server closes the stream
+            yield 'retry: 5000\n\n'
+            last_etag = None
+            last_check = 0
+            started = time.monotonic()
+            changed = True
+            while True:
+                if changed or time.monotonic() - last_check >= recheck_interval:
+                    last_check = time.monotonic()
+                    state = _current_embed_state(token)
+                    if state is None:
+                        yield 'event: deleted\ndata: {}\n\n'
+                        return
+                    payload, etag, _ = state
+                    if etag != last_etag:
+                        last_etag = etag
+                        yield f'event: goal\nid: {etag}\ndata: {json.dumps(payload)}\n\n'
+                    else:
+                        yield ': keepalive\n\n'
+                else:
+                    yield ': keepalive\n\n'
+                remaining = max_seconds - (time.monotonic() - started)
+                if remaining <= 0:
+                    return
+                changed = listener.wait(min(heartbeat, remaining))
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    add_embed_cors_headers(response)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@application.route('/api/embed/<token>/poll')
+def embed_long_poll(token):
+    """Long-poll fallback for clients without EventSource.
+    Answers at once if the goal's ETag differs from ?etag=, otherwise waits for a change
+    (up to EMBED_LONG_POLL_TIMEOUT seconds) and returns 304 if none happens.
+    """
+    if application.config['EMBED_LIVE_UPDATES'] != 'stream':
+        return add_embed_cors_headers(jsonify({'error': 'Live updates are disabled'})), 404
+    known_etag = request.args.get('etag', '').strip('"')
+    state = _current_embed_state(token)
+    if state is None:
+        return add_embed_cors_headers(jsonify({'error': 'Goal not found'})), 404
+
+    if state[1] == known_etag:
+        deadline = time.monotonic() + application.config['EMBED_LONG_POLL_TIMEOUT']
+        with embed_hub.listen(token) as listener:
+            while state is not None and state[1] == known_etag:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                listener.wait(min(remaining, application.config['EMBED_STREAM_RECHECK_INTERVAL']))
+                state = _current_embed_state(token)
+        if state is None:
+            return add_embed_cors_headers(jsonify({'error': 'Goal not found'})), 404
+
+    payload, etag, _ = state
+    response = make_response('', 304) if etag == known_etag else jsonify(payload)
+    add_embed_cors_headers(response)
+    response.headers['Cache-Control'] = 'no-store'
+    response.set_etag(etag)
+    return response
+
 @application.route('/api/embed/<token>/data', methods=['OPTIONS'])
 def embed_data_options(token):
-    response = make_response()
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Cache-Control, Pragma'
-    response.headers['Access-Control-Max-Age'] = '3600'
-    return response
+    return add_embed_cors_headers(make_response())
 
-@application.route('/api/migrate/schema', methods=['POST'])
-def migrate_schema():
-    """Generic schema migration endpoint that syncs database with current model definitions"""
-    migrations_applied = []
-    try:
-        try:
-        # Check if the old 'description' column exists
-            result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'goal' AND column_name = 'description'
-            """))
-        
-            if result.fetchone():
-                db.session.execute(text("""
-                    ALTER TABLE goal 
-                    DROP COLUMN description
-                """))
-                migrations_applied.append("Dropped legacy column 'goal.description'")
-        except Exception as e:
-            db.session.rollback()
-            return jsonify({
-                'status': 'error',
-                'message': f'Failed to drop legacy description column: {str(e)}'
-            }), 500
-        
-        goal_columns = {
-            'title': 'VARCHAR(255)',
-            'details': 'TEXT',
-            'deadline_display': 'VARCHAR(25)'
-        }
-        
-        for column_name, column_type in goal_columns.items():
-            # Check if column exists
-            result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'goal' AND column_name = :column_name
-            """), {'column_name': column_name})
-            
-            if not result.fetchone():
-                # Add the column
-                db.session.execute(text(f"""
-                    ALTER TABLE goal 
-                    ADD COLUMN {column_name} {column_type}
-                """))
-                migrations_applied.append(f"Added column 'goal.{column_name}'")
-                
-                # Special handling for deadline_display - populate existing records
-                if column_name == 'deadline_display':
-                    db.session.execute(text("""
-                        UPDATE goal 
-                        SET deadline_display = TO_CHAR(deadline, 'DD/MM/YYYY HH24:MI')
-                        WHERE deadline_display IS NULL
-                    """))
-                    migrations_applied.append("Populated existing deadline_display values")
-        
-        # Check and add missing columns for User table
-        user_columns = {
-            # 'new_column': 'VARCHAR(100)'
-        }
-        
-        for column_name, column_type in user_columns.items():
-            result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'user' AND column_name = :column_name
-            """), {'column_name': column_name})
-            
-            if not result.fetchone():
-                db.session.execute(text(f"""
-                    ALTER TABLE "user" 
-                    ADD COLUMN {column_name} {column_type}
-                """))
-                migrations_applied.append(f"Added column 'user.{column_name}'")
-        
-        db.session.commit()
-        
-        if migrations_applied:
-            return jsonify({
-                'status': 'success',
-                'message': f'Schema migration completed successfully!',
-                'migrations_applied': migrations_applied
-            }), 200
-        else:
-            return jsonify({
-                'status': 'success',
-                'message': 'Database schema is already up to date.',
-                'migrations_applied': []
-            }), 200
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({
-            'status': 'error',
-            'message': f'Schema migration failed: {str(e)}'
-        }), 500
+@application.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint; with the sqlite store the values cover every worker on the host."""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@application.route('/api/health/live')
+def health_live():
+    """Liveness: the process is up and serving requests. Does no I/O."""
+    return jsonify({
+        'service': 'git-done-api',
+        'timestamp': datetime.utcnow().isoformat(),
+        'status': 'alive'
+    }), 200
 
 @application.route('/api/health')
+@application.route('/api/health/ready')
 def health_check():
-    health_status = {
+    """Readiness from the last probe results; 503 only when a critical check is failing or stale."""
+    if health_monitor.is_stale():
+        # Startup, or no probe worker in this process: probe now (skipped if a probe is already running)
+        health_monitor.refresh()
+    ready, status, checks = health_monitor.report()
+    return jsonify({
         'service': 'git-done-api',
         'timestamp': datetime.utcnow().isoformat(),
-        'status': 'healthy',
-        'checks': {}
-    }
-    # Check database connection
-    try:
-        db.session.execute(text('SELECT 1'))
-        health_status['checks']['database'] = 'healthy'
-    except Exception as e:
-        health_status['checks']['database'] = f'unhealthy: {str(e)}'
-        health_status['status'] = 'degraded'
-
-    # Check GitHub API availability
-    try:
-        github_response = requests.get('https://api.github.com/zen', timeout=2)
-        if github_response.status_code == 200:
-            health_status['checks']['github_api'] = 'healthy'
-        else:
-            health_status['checks']['github_api'] = f'degraded: status {github_response.status_code}'
-            health_status['status'] = 'degraded'
-    except Exception as e:
-        health_status['checks']['github_api'] = f'unhealthy: {str(e)}'
-        health_status['status'] = 'degraded'
-    
-    # Return appropriate status code
-    status_code = 200 if health_status['status'] == 'healthy' else 503
-    return jsonify(health_status), status_code
+        'status': status,
+        'checks': checks
+    }), 200 if ready else 503
 
 # New route to download goal as .ics file
 @application.route('/api/goals/<int:goal_id>/calendar')
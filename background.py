@@ -0,0 +1,62 @@
+"""Thread-based worker pools for work that should not run on the request path."""
+import threading
+import time
+
+
+class WorkerPool:
+    """Run a drain function repeatedly on a fixed number of daemon threads.
+
+    `drain` is called with no arguments and returns how many items it handled.
+    When it handles nothing the thread sleeps for `idle_interval` seconds, or
+    until `wake()` is called because new work has arrived.
+    """
+
+    def __init__(self, name, drain, workers=1, idle_interval=1.0):
+        self.name = name
+        self.drain = drain
+        self.workers = workers
+        self.idle_interval = idle_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Start the worker threads once; later calls are no-ops."""
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            self._stopping.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'{self.name}-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def wake(self):
+        """Tell idle workers that new work is available."""
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        """Ask the workers to exit after their current drain and wait for them."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._lock:
+            self._threads = []
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                handled = self.drain()
+            except Exception as e:
+                print(f"Warning: {self.name} worker failed: {e}")
+                handled = 0
+                time.sleep(self.idle_interval)
+            if not handled:
+                self._wakeup.wait(self.idle_interval)
+                self._wakeup.clear()
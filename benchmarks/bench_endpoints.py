@@ -0,0 +1,335 @@
+"""Load-test the hot endpoints against a seeded database and compare with a stored baseline.
+
+Seeds a synthetic dataset (goals spread over many users and repos), starts the app on a
+local threaded server (or targets --url), and drives each scenario at the given
+concurrency, reporting throughput and p50/p95/p99 latency. Everything runs offline: the
+GitHub API URL points at a closed local port.
+
+Run from the repository root:
+    python -m benchmarks.bench_endpoints --goals 10000 --concurrency 8 --requests 2000
+    python -m benchmarks.bench_endpoints --goals 10000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_endpoints --goals 10000 --baseline benchmarks/baseline.json --max-regression 0.2
+
+The database is a SQLite file in the temp directory unless --database-url (or
+BENCH_DATABASE_URL) names a reachable Postgres; its name must contain "bench" or "test"
+because the goal, user and webhook tables are emptied before seeding. Client and server
+share one process here, so absolute numbers are pessimistic; point --url at a gunicorn
+server using the same database for production-like figures.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+BENCH_DIR = os.path.join(tempfile.gettempdir(), 'gitdone-bench')
+SCENARIOS = ('webhook_push', 'webhook_issues', 'embed_data', 'embed_page', 'goals_list')
+COMPLETION_TYPES = (('commit', 0.7), ('issue', 0.15), ('pr', 0.1), ('tag', 0.05))
+SEED_CHUNK = 10000
+
+
+def choose_database(url):
+    """The database URL to benchmark: a reachable Postgres if one was named, else a SQLite file."""
+    url = url or os.environ.get('BENCH_DATABASE_URL')
+    if url:
+        database = make_url(url).database or ''
+        if 'bench' not in database and 'test' not in database:
+            sys.exit(f'Refusing to seed {database!r}: use a database whose name contains "bench" or "test"')
+        try:
+            with create_engine(url).connect() as connection:
+                connection.execute(text('SELECT 1'))
+            return url
+        except Exception as e:
+            print(f'{url} is not available ({e.__class__.__name__}); falling back to SQLite')
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    return f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+
+
+def configure_environment(database_url, secret):
+    # Must run before the application is imported: it reads its configuration at import time
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SECRET_KEY'] = secret
+    os.environ['GITHUB_API_URL'] = 'http://127.0.0.1:9'
+    os.environ.pop('BASE_URL', None)
+    for name in ('WEBHOOK_WORKERS', 'WEBHOOK_PROVISION_WORKERS', 'GOAL_RECONCILE_WORKERS', 'HEALTH_CHECK_INTERVAL'):
+        os.environ[name] = '0'
+    os.environ['DEADLINE_SWEEPER_ENABLED'] = 'false'
+    os.environ.setdefault('EMBED_SNAPSHOT_CACHE_PATH', os.path.join(BENCH_DIR, 'snapshots.sqlite3'))
+    os.environ.setdefault('METRICS_PATH', os.path.join(BENCH_DIR, 'metrics.sqlite3'))
+
+
+class Dataset:
+    """What the load generators need to know about the seeded rows."""
+
+    def __init__(self, users, repos, tokens, conditions):
+        self.users = users
+        self.repos = repos
+        self.tokens = tokens
+        self.conditions = conditions
+
+
+def seed(db, models, goal_count, user_count, repo_count, rng):
+    """Replace the goal, user and webhook rows with a synthetic dataset and return a Dataset."""
+    Goal, User, tables = models
+    with db.engine.begin() as connection:
+        for table in tables:
+            connection.execute(table.delete())
+
+    users = [f'bench-user-{index}' for index in range(user_count)]
+    repos = [(f'owner{index % 97}', f'repo{index}') for index in range(repo_count)]
+    db.session.execute(User.__table__.insert(), [
+        {'github_id': user, 'username': user, 'access_token': 'bench-token'} for user in users
+    ])
+
+    now = datetime.utcnow()
+    types, weights = zip(*COMPLETION_TYPES)
+    tokens, conditions = [], {}
+    for start in range(0, goal_count, SEED_CHUNK):
+        rows = []
+        for index in range(start, min(start + SEED_CHUNK, goal_count)):
+            completion_type = rng.choices(types, weights)[0]
+            repo_owner, repo_name = repos[index % repo_count]
+            condition = {'commit': f'#task-{index}', 'issue': str(index % 5000 + 1),
+                         'pr': str(index % 5000 + 1), 'tag': f'v{index}'}[completion_type]
+            token = f'bench-{index}'
+            deadline = now + timedelta(minutes=rng.randint(60, 60 * 24 * 90))
+            rows.append({
+                'user_github_id': users[index % user_count], 'title': f'Goal {index}',
+                'details': 'Synthetic benchmark goal', 'deadline': deadline,
+                'deadline_display': deadline.strftime('%d/%m/%Y %H:%M'),
+                'repo_url': f'https://github.com/{repo_owner}/{repo_name}', 'completion_condition': condition,
+                'completion_type': completion_type, 'status': 'active', 'created_at': now, 'updated_at': now,
+                'embed_token': token, 'repo_owner': repo_owner, 'repo_name': repo_name
+            })
+            tokens.append(token)
+            conditions.setdefault((repo_owner, repo_name, completion_type), []).append(condition)
+        db.session.execute(Goal.__table__.insert(), rows)
+        db.session.commit()
+    return Dataset(users, repos, tokens, conditions)
+
+
+def sign(secret, body):
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), msg=body, digestmod=hashlib.sha256).hexdigest()
+
+
+def push_payload(dataset, rng):
+    repo_owner, repo_name = rng.choice(dataset.repos)
+    commit_conditions = dataset.conditions.get((repo_owner, repo_name, 'commit'), [])
+    commits = []
+    for _ in range(rng.randint(1, 5)):
+        message = 'Refactor the widget ' + ' '.join(rng.choices(['cache', 'api', 'docs', 'tests', 'ui'], k=6))
+        if commit_conditions and rng.random() < 0.2:
+            message += ' ' + rng.choice(commit_conditions)
+        commits.append({'id': uuid.uuid4().hex, 'message': message, 'author': {'name': 'bench'}})
+    return {'ref': 'refs/heads/main', 'repository': {'full_name': f'{repo_owner}/{repo_name}'}, 'commits': commits}
+
+
+def issues_payload(dataset, rng):
+    repo_owner, repo_name = rng.choice(dataset.repos)
+    return {'action': 'closed', 'issue': {'number': rng.randint(1, 5000)},
+            'repository': {'full_name': f'{repo_owner}/{repo_name}'}}
+
+
+def request_factories(dataset, secret, session_cookies):
+    """scenario -> function(rng) returning (method, path, kwargs) for one request."""
+    def webhook(event_type, make_payload):
+        def build(rng):
+            body = json.dumps(make_payload(dataset, rng)).encode('utf-8')
+            return 'POST', '/api/github-webhook', {'data': body, 'headers': {
+                'Content-Type': 'application/json', 'X-GitHub-Event': event_type,
+                'X-GitHub-Delivery': str(uuid.uuid4()), 'X-Hub-Signature-256': sign(secret, body)
+            }}
+        return build
+
+    return {
+        'webhook_push': webhook('push', push_payload),
+        'webhook_issues': webhook('issues', issues_payload),
+        'embed_data': lambda rng: ('GET', f'/api/embed/{rng.choice(dataset.tokens)}/data', {}),
+        'embed_page': lambda rng: ('GET', f'/embed/{rng.choice(dataset.tokens)}', {}),
+        'goals_list': lambda rng: ('GET', '/api/goals', {'cookies': rng.choice(session_cookies)}),
+    }
+
+
+def session_cookies(application, users, count=200):
+    """Signed Flask session cookies for a sample of the seeded users."""
+    serializer = application.session_interface.get_signing_serializer(application)
+    name = application.config['SESSION_COOKIE_NAME']
+    return [{name: serializer.dumps({'user_github_id': user, 'username': user})} for user in users[:count]]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def run_scenario(base_url, build, requests_total, concurrency, seed_value):
+    """Send requests_total requests over `concurrency` threads; return the scenario's statistics."""
+    import requests
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(requests_total))
+
+    def worker(worker_index):
+        rng = random.Random(seed_value * 1000 + worker_index)
+        http = requests.Session()
+        local_latencies, local_errors = [], 0
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            method, path, kwargs = build(rng)
+            started = time.perf_counter()
+            try:
+                response = http.request(method, base_url + path, timeout=30, **kwargs)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            local_latencies.append(time.perf_counter() - started)
+            local_errors += failed
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Regressions beyond max_regression (a fraction) against the baseline, as readable strings."""
+    regressions = []
+    for scenario, current in results.items():
+        previous = baseline.get('results', {}).get(scenario)
+        if not previous:
+            continue
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - max_regression):
+            regressions.append(f"{scenario}: throughput {current['throughput_rps']} < "
+                               f"{previous['throughput_rps']} req/s")
+        for metric in ('p95_ms', 'p99_ms'):
+            if current[metric] > previous[metric] * (1 + max_regression):
+                regressions.append(f'{scenario}: {metric} {current[metric]} > {previous[metric]}')
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{scenario}: {current['errors']} errors (baseline {previous['errors']})")
+    return regressions
+
+
+def start_server(application):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, application, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name='bench-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--goals', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=None, help='Default: one per 20 goals.')
+    parser.add_argument('--repos', type=int, default=None, help='Default: one per 50 goals.')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per scenario.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--url', default=None, help='Benchmark an already running server instead of a local one.')
+    parser.add_argument('--reuse', action='store_true', help='Keep the dataset from the previous run.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--baseline', help='Compare with this baseline and exit 1 on a regression.')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    parser.add_argument('--save-baseline', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    database_url = choose_database(args.database_url)
+    secret = os.environ.get('BENCH_SECRET_KEY', 'bench-secret')
+    configure_environment(database_url, secret)
+    from application import (Goal, RepoPollState, RepoWebhook, SeenDelivery, User, WebhookDelivery,  # noqa: E402
+                             application, db, embed_snapshots)
+
+    rng = random.Random(args.seed)
+    users = args.users or max(1, args.goals // 20)
+    repos = args.repos or max(1, args.goals // 50)
+    with application.app_context():
+        db.create_all()
+        if args.reuse and Goal.query.count() == args.goals:
+            rows = db.session.query(Goal.embed_token, Goal.repo_owner, Goal.repo_name,
+                                    Goal.completion_type, Goal.completion_condition).all()
+            conditions = {}
+            for _, owner, name, completion_type, condition in rows:
+                conditions.setdefault((owner, name, completion_type), []).append(condition)
+            dataset = Dataset([user.github_id for user in User.query.all()],
+                              sorted({(owner, name) for _, owner, name, _, _ in rows}),
+                              [row[0] for row in rows], conditions)
+        else:
+            started = time.perf_counter()
+            models = (Goal, User, [WebhookDelivery.__table__, SeenDelivery.__table__, RepoPollState.__table__,
+                                   RepoWebhook.__table__, Goal.__table__, User.__table__])
+            dataset = seed(db, models, args.goals, users, repos, rng)
+            print(f'Seeded {args.goals} goals, {users} users, {repos} repos in {time.perf_counter() - started:.1f}s')
+        embed_snapshots.clear()
+        db.session.remove()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server, base_url = start_server(application)
+    factories = request_factories(dataset, secret, session_cookies(application, dataset.users))
+
+    dialect = make_url(database_url).get_backend_name()
+    print(f'{dialect}, {args.goals} goals, concurrency {args.concurrency}, {args.requests} requests per scenario')
+    print(f'{"scenario":<16} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    results = {}
+    for index, scenario in enumerate(args.scenarios):
+        stats = run_scenario(base_url, factories[scenario], args.requests, args.concurrency, args.seed + index)
+        results[scenario] = stats
+        print(f"{scenario:<16} {stats['throughput_rps']:>9} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+              f"{stats['p99_ms']:>8} {stats['errors']:>7}")
+    if server is not None:
+        server.shutdown()
+
+    config = {'database': dialect, 'goals': args.goals, 'users': users, 'repos': repos,
+              'concurrency': args.concurrency, 'requests': args.requests}
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline_file:
+            json.dump({'config': config, 'results': results}, baseline_file, indent=2, sort_keys=True)
+        print(f'Baseline written to {args.save_baseline}')
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('config') != config:
+            print(f"Warning: baseline was recorded with {baseline.get('config')}, this run used {config}")
+        regressions = compare(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions beyond {args.max_regression:.0%} of the baseline')
+
+
+if __name__ == '__main__':
+    main()
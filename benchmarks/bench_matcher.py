@@ -0,0 +1,60 @@
+"""Compare the commit-message automaton with the naive per-goal substring loop.
+
+Run from the repository root:
+    python -m benchmarks.bench_matcher --goals 10 100 1000 --commits 20
+"""
+import argparse
+import random
+import string
+import timeit
+
+from matcher import AhoCorasick, compile_matcher
+
+
+def make_conditions(count, rng):
+    return [(f'#{"".join(rng.choices(string.ascii_lowercase, k=8))}', goal_id) for goal_id in range(count)]
+
+
+def make_messages(count, conditions, rng):
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(500)]
+    messages = []
+    for _ in range(count):
+        message = ' '.join(rng.choices(words, k=rng.randint(5, 40)))
+        if conditions and rng.random() < 0.25:
+            message += ' ' + rng.choice(conditions)[0]
+        messages.append(message)
+    return messages
+
+
+def naive(conditions, messages):
+    return {goal_id for condition, goal_id in conditions if any(condition in message for message in messages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--goals', type=int, nargs='+', default=[10, 50, 100, 1000])
+    parser.add_argument('--commits', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f'{"goals":>6} {"naive us":>10} {"automaton us":>13} {"compiled us":>12} {"build us":>10} {"speedup":>8}')
+    for goal_count in args.goals:
+        conditions = make_conditions(goal_count, rng)
+        messages = make_messages(args.commits, conditions, rng)
+        automaton = AhoCorasick(conditions)
+        compiled = compile_matcher(conditions)
+        assert automaton.search_all(messages) == compiled.search_all(messages) == naive(conditions, messages)
+
+        naive_us = timeit.timeit(lambda: naive(conditions, messages), number=args.repeat) / args.repeat * 1e6
+        cached_us = timeit.timeit(lambda: automaton.search_all(messages), number=args.repeat) / args.repeat * 1e6
+        compiled_us = timeit.timeit(lambda: compiled.search_all(messages), number=args.repeat) / args.repeat * 1e6
+        build_us = timeit.timeit(lambda: AhoCorasick(conditions), number=max(1, args.repeat // 10)) \
+            / max(1, args.repeat // 10) * 1e6
+        print(f'{goal_count:>6} {naive_us:>10.1f} {cached_us:>13.1f} {compiled_us:>12.1f} {build_us:>10.1f} '
+              f'{naive_us / compiled_us:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
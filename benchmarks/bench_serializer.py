@@ -0,0 +1,71 @@
+"""Compare Goal.to_dict() on ORM objects with the bulk row serializer used by GET /api/goals.
+
+Run from the repository root (uses an in-memory SQLite database):
+    python -m benchmarks.bench_serializer --sizes 10000 100000
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('WEBHOOK_WORKERS', '0')
+
+from application import GOAL_FIELD_COLUMNS, Goal, application, db, orjson, serialize_goal_rows  # noqa: E402
+
+
+def seed(count):
+    now = datetime.utcnow()
+    db.session.execute(Goal.__table__.delete())
+    db.session.execute(Goal.__table__.insert(), [{
+        'user_github_id': 'bench', 'title': f'Goal {index}', 'details': 'Benchmark goal details ' * 3,
+        'deadline': now + timedelta(minutes=index), 'deadline_display': None if index % 2 else '01/01/2030 12:00',
+        'repo_url': 'https://github.com/owner/repo', 'completion_condition': f'#{index}',
+        'completion_type': 'commit', 'status': 'active' if index % 3 else 'completed', 'created_at': now,
+        'completed_at': None if index % 3 else now, 'embed_token': f'token-{index}',
+        'repo_owner': 'owner', 'repo_name': 'repo', 'updated_at': now
+    } for index in range(count)])
+    db.session.commit()
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    fields = list(GOAL_FIELD_COLUMNS)
+    column_names = sorted({name for field in fields for name in GOAL_FIELD_COLUMNS[field]} | {'id', 'deadline'})
+    print(f'orjson installed: {orjson is not None}')
+    print(f'{"goals":>7} {"to_dict load+ser ms":>20} {"bulk load+ser ms":>17} {"json ms":>8} {"orjson ms":>10} {"speedup":>8}')
+    with application.app_context():
+        db.create_all()
+        for size in args.sizes:
+            seed(size)
+            db.session.expunge_all()
+            goals, orm_load = timed(lambda: Goal.query.order_by(Goal.deadline, Goal.id).all())
+            expected, to_dict_time = timed(lambda: [goal.to_dict() for goal in goals])
+            db.session.expunge_all()
+
+            columns = [getattr(Goal, name) for name in column_names]
+            rows, row_load = timed(lambda: db.session.query(*columns).order_by(Goal.deadline, Goal.id).all())
+            serialized, bulk_time = timed(lambda: serialize_goal_rows(rows, column_names, fields,
+                                                                      os.environ.get('BASE_URL', 'http://localhost:5000')))
+            assert serialized == expected
+
+            _, json_time = timed(lambda: json.dumps(serialized))
+            orjson_time = timed(lambda: orjson.dumps(serialized))[1] if orjson else None
+            baseline = orm_load + to_dict_time
+            bulk = row_load + bulk_time
+            print(f'{size:>7} {baseline * 1000:>20.1f} {bulk * 1000:>17.1f} {json_time * 1000:>8.1f} '
+                  f'{(orjson_time * 1000 if orjson_time else float("nan")):>10.1f} {baseline / bulk:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
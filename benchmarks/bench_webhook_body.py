@@ -0,0 +1,96 @@
+"""Compare buffering a webhook delivery (HMAC request.data, then json.loads) with WebhookBodyReader.
+
+Run from the repository root:
+    python -m benchmarks.bench_webhook_body --megabytes 25
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('WEBHOOK_WORKERS', '0')
+
+from application import WEBHOOK_BODY_CHUNK_SIZE  # noqa: E402
+from webhook_body import WebhookBodyReader, ijson, slim_webhook_payload  # noqa: E402
+
+SECRET = 'bench-secret'
+
+
+def build_push(megabytes):
+    """A push delivery padded with large commits until it reaches roughly `megabytes` MB."""
+    commit = {
+        'id': 'f' * 40, 'tree_id': 'e' * 40, 'distinct': True,
+        'message': 'Fix #42\n\n' + 'Long commit message body. ' * 40,
+        'timestamp': '2026-01-01T00:00:00Z', 'url': 'https://github.com/owner/repo/commit/' + 'f' * 40,
+        'author': {'name': 'Someone', 'email': 'someone@example.com', 'username': 'someone'},
+        'added': [f'src/module_{index}.py' for index in range(60)], 'removed': [], 'modified': [],
+    }
+    commit_size = len(json.dumps(commit))
+    payload = {
+        'ref': 'refs/heads/main', 'repository': {'full_name': 'owner/repo', 'description': 'Benchmark repo'},
+        'commits': [commit] * max(1, megabytes * 1024 * 1024 // commit_size),
+    }
+    return json.dumps(payload).encode('utf-8')
+
+
+def chunks(body):
+    for start in range(0, len(body), WEBHOOK_BODY_CHUNK_SIZE):
+        yield body[start:start + WEBHOOK_BODY_CHUNK_SIZE]
+
+
+def buffered(body, signature):
+    # What the endpoint used to do: collect the whole body, hash it, then parse all of it
+    data = b''.join(chunks(body))
+    expected = 'sha256=' + hmac.new(SECRET.encode('utf-8'), msg=data, digestmod=hashlib.sha256).hexdigest()
+    assert hmac.compare_digest(expected, signature)
+    return slim_webhook_payload(json.loads(data))
+
+
+def streamed(body, signature, incremental):
+    reader = WebhookBodyReader(SECRET, len(body), incremental=incremental)
+    for chunk in chunks(body):
+        reader.feed(chunk)
+    assert reader.verify(signature)
+    return reader.payload()
+
+
+def measure(function):
+    # Timed and traced in separate runs: tracemalloc slows allocation-heavy parsing considerably
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megabytes', type=int, nargs='+', default=[1, 25])
+    args = parser.parse_args()
+
+    print(f'ijson installed: {ijson is not None}' + (f' (backend {ijson.backend})' if ijson else ''))
+    print(f'{"MB":>4} {"mode":>12} {"ms":>9} {"peak MB":>9}')
+    for megabytes in args.megabytes:
+        body = build_push(megabytes)
+        signature = 'sha256=' + hmac.new(SECRET.encode('utf-8'), msg=body, digestmod=hashlib.sha256).hexdigest()
+        modes = [('buffered', lambda: buffered(body, signature)),
+                 ('reader', lambda: streamed(body, signature, False))]
+        if ijson is not None:
+            modes.append(('incremental', lambda: streamed(body, signature, True)))
+        expected = None
+        for name, function in modes:
+            result, elapsed, peak = measure(function)
+            expected = expected or result
+            assert result == expected
+            print(f'{len(body) / 1024 / 1024:>4.0f} {name:>12} {elapsed * 1000:>9.1f} {peak / 1024 / 1024:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Background timer that expires goals when their deadline passes."""
+from datetime import datetime
+import heapq
+import threading
+
+
+class DeadlineSweeper:
+    """Sleep until the earliest known deadline, then run `sweep`.
+
+    `sweep(now)` expires everything due at `now` and returns the next pending
+    deadline (or None). Writers call `schedule(deadline)` so a new, earlier
+    deadline wakes the thread sooner. Known deadlines live in a min-heap, and
+    sleeps are capped at `max_sleep` seconds so deadlines added by other
+    processes are still picked up.
+    """
+
+    def __init__(self, sweep, max_sleep=300, clock=datetime.utcnow):
+        self.sweep = sweep
+        self.max_sleep = max_sleep
+        self.clock = clock
+        self._heap = []
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def next_wakeup(self):
+        with self._condition:
+            return self._heap[0] if self._heap else None
+
+    def schedule(self, deadline):
+        """Make sure the sweeper wakes no later than `deadline`."""
+        if deadline is None:
+            return
+        with self._condition:
+            earlier = not self._heap or deadline < self._heap[0]
+            heapq.heappush(self._heap, deadline)
+            if earlier:
+                self._condition.notify()
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            # Catch up on anything that expired while no sweeper was running
+            heapq.heappush(self._heap, self.clock())
+            self._thread = threading.Thread(target=self._run, name='deadline-sweeper', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def run_once(self):
+        """Sweep now, drop the deadlines that have passed and remember the next one."""
+        now = self.clock()
+        next_deadline = self.sweep(now)
+        with self._condition:
+            while self._heap and self._heap[0] <= now:
+                heapq.heappop(self._heap)
+        self.schedule(next_deadline)
+        return next_deadline
+
+    def _seconds_until_due(self):
+        if not self._heap:
+            return self.max_sleep
+        return min(self.max_sleep, max(0.0, (self._heap[0] - self.clock()).total_seconds()))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopping:
+                    return
+                delay = self._seconds_until_due()
+                # wait() returns True when schedule() or stop() notified us: recompute the delay
+                if delay > 0 and self._condition.wait(delay):
+                    continue
+                if self._stopping:
+                    return
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Warning: deadline sweep failed: {e}")
+                with self._condition:
+                    self._condition.wait(min(self.max_sleep, 30))
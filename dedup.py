@@ -0,0 +1,46 @@
+"""Bounded in-memory record of recently seen keys, used to drop duplicate webhook deliveries."""
+from collections import OrderedDict
+import threading
+import time
+
+
+class RecentKeys:
+    """Thread-safe LRU set whose entries expire `ttl` seconds after they were added.
+
+    Hit and miss counters record how often `seen()` found a key, which is how much
+    duplicate work was absorbed without going to the database.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, key):
+        """True if `key` was added less than `ttl` seconds ago."""
+        now = self.clock()
+        with self._lock:
+            added_at = self._entries.get(key)
+            if added_at is not None and now - added_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if added_at is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False
+
+    def add(self, key):
+        with self._lock:
+            self._entries[key] = self.clock()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,77 @@
+"""In-process fan-out of goal changes to open embed widget connections."""
+from contextlib import contextmanager
+import threading
+
+
+class _Channel:
+    __slots__ = ('condition', 'version', 'listeners')
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.listeners = 0
+
+
+class Listener:
+    """One open connection waiting for changes to a single embed token."""
+
+    def __init__(self, channel):
+        self._channel = channel
+        self._version = channel.version
+
+    def wait(self, timeout):
+        """Block until the token is published or `timeout` seconds pass.
+        Returns True if there was a publish since the previous call.
+        """
+        channel = self._channel
+        with channel.condition:
+            if channel.version == self._version:
+                channel.condition.wait(timeout)
+            changed = channel.version != self._version
+            self._version = channel.version
+        return changed
+
+
+class EmbedHub:
+    """Wakes every listener of an embed token when that goal changes.
+
+    Listeners of the same token share one Condition and a version counter, so an
+    idle connection costs a counter check rather than a queue or a timer of its own.
+    Channels are created on the first listener and dropped with the last.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    @contextmanager
+    def listen(self, token):
+        with self._lock:
+            channel = self._channels.get(token)
+            if channel is None:
+                channel = self._channels[token] = _Channel()
+            channel.listeners += 1
+        try:
+            yield Listener(channel)
+        finally:
+            with self._lock:
+                channel.listeners -= 1
+                if channel.listeners == 0 and self._channels.get(token) is channel:
+                    del self._channels[token]
+
+    def publish(self, token):
+        """Wake the listeners of `token`; a no-op when nobody is listening."""
+        with self._lock:
+            channel = self._channels.get(token)
+        if channel is None:
+            return
+        with channel.condition:
+            channel.version += 1
+            channel.condition.notify_all()
+
+    def listener_count(self, token=None):
+        with self._lock:
+            if token is not None:
+                channel = self._channels.get(token)
+                return channel.listeners if channel else 0
+            return sum(channel.listeners for channel in self._channels.values())
@@ -0,0 +1,200 @@
+"""Shared GitHub HTTP client: pooled sessions, default timeouts, retries and rate-limit accounting."""
+import hashlib
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Safe to send twice: repeating one of these cannot create a second resource or spend a one-time code
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'})
+
+
+class RateLimitDeferred(requests.RequestException):
+    """Raised instead of calling GitHub when a token has too little quota left before its reset."""
+
+    def __init__(self, reset_at):
+        self.reset_at = reset_at
+        super().__init__(f'GitHub rate limit nearly exhausted; retry after {int(reset_at - time.time())}s')
+
+
+class GitHubClient:
+    """Thin wrapper around requests for the GitHub REST API.
+
+    - One pooled `requests.Session` per thread, created lazily (so it is never shared across a fork).
+    - Every call gets a (connect, read) timeout unless it passes its own.
+    - Idempotent methods are retried on 5xx responses, connection errors and timeouts with
+      full-jitter exponential backoff. A POST may have taken effect on GitHub by then (a created
+      hook, a spent OAuth code), so it is only retried when the connection was never made.
+    - Rate-limit rejections (403/429 with Retry-After or an exhausted quota) are retried for every
+      method; a wait longer than `max_backoff` is returned to the caller instead.
+    - X-RateLimit-Remaining/Reset of REST API calls are recorded per token, and calls are refused
+      with RateLimitDeferred once fewer than `rate_limit_reserve` requests remain before the reset.
+      Token-less calls share the egress IP's much smaller quota (60 an hour) and keep only
+      `anonymous_rate_limit_reserve`. URLs outside `api_url` (the OAuth token exchange) are not
+      subject to the REST rate limit and are never deferred.
+    - `observer(method, url, status, seconds)` is called after every attempt, with status None
+      when the request failed to get a response.
+    """
+
+    def __init__(self, api_url='https://api.github.com', oauth_url='https://github.com', timeout=(3.05, 10),
+                 max_retries=3, backoff=0.5, max_backoff=30, rate_limit_reserve=50, anonymous_rate_limit_reserve=5,
+                 pool_size=10, user_agent='git-done', sleep=time.sleep, observer=None):
+        self.api_url = api_url.rstrip('/')
+        self.oauth_url = oauth_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limit_reserve = rate_limit_reserve
+        self.anonymous_rate_limit_reserve = anonymous_rate_limit_reserve
+        self.pool_size = pool_size
+        self.user_agent = user_agent
+        self.sleep = sleep
+        self.observer = observer
+        self._local = threading.local()
+        self._rate_limits = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = self.user_agent
+            self._local.session = session
+        return session
+
+    @staticmethod
+    def _token_key(token):
+        # Never keep raw tokens around as dictionary keys
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()[:16] if token else 'anonymous'
+
+    def rate_limit(self, token=None):
+        """Last seen (remaining, reset epoch) for a token, or None if nothing is known yet."""
+        with self._lock:
+            return self._rate_limits.get(self._token_key(token))
+
+    def _check_budget(self, key):
+        with self._lock:
+            known = self._rate_limits.get(key)
+        if known is None:
+            return
+        remaining, reset_at = known
+        if reset_at <= time.time():
+            with self._lock:
+                self._rate_limits.pop(key, None)
+            return
+        reserve = self.anonymous_rate_limit_reserve if key == 'anonymous' else self.rate_limit_reserve
+        if remaining <= reserve:
+            raise RateLimitDeferred(reset_at)
+
+    def _record_rate_limit(self, key, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_at = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset_at is None:
+            return
+        try:
+            with self._lock:
+                self._rate_limits[key] = (int(remaining), int(reset_at))
+        except ValueError:
+            pass
+
+    def _backoff_delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    @staticmethod
+    def _never_sent(error):
+        """Whether a request failed before a connection to the server was established."""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+
+    def _retry_delay(self, method, response, attempt):
+        """Seconds to wait before retrying `response`, or None if it should be returned as is."""
+        if response.status_code >= 500:
+            return self._backoff_delay(attempt) if method in IDEMPOTENT_METHODS else None
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                return None
+            return delay if delay <= self.max_backoff else None
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            # Primary limit: only worth waiting for if the window resets soon
+            try:
+                delay = int(response.headers.get('X-RateLimit-Reset', 0)) - time.time()
+            except ValueError:
+                return None
+            return max(0, delay) if delay <= self.max_backoff else None
+        if 'secondary rate limit' in response.text.lower():
+            return self._backoff_delay(attempt)
+        return None
+
+    def request(self, method, path, token=None, retries=None, **kwargs):
+        """Send a request and return the final `requests.Response`.
+        `path` is relative to `api_url` unless it is already an absolute URL.
+        """
+        method = method.upper()
+        url = path if path.startswith(('http://', 'https://')) else f'{self.api_url}{path}'
+        headers = {'Accept': 'application/vnd.github.v3+json'}
+        if token:
+            headers['Authorization'] = f'token {token}'
+        headers.update(kwargs.pop('headers', None) or {})
+        kwargs.setdefault('timeout', self.timeout)
+        max_retries = self.max_retries if retries is None else retries
+
+        # Only REST API calls count against (and are held back by) the rate limit
+        key = self._token_key(token) if url.startswith(self.api_url + '/') else None
+        if key is not None:
+            self._check_budget(key)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._observe(method, url, None, started)
+                if attempt >= max_retries or (method not in IDEMPOTENT_METHODS and not self._never_sent(e)):
+                    raise
+                self.sleep(self._backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            self._observe(method, url, response.status_code, started)
+            if key is not None:
+                self._record_rate_limit(key, response)
+            delay = self._retry_delay(method, response, attempt)
+            if delay is None or attempt >= max_retries:
+                return response
+            self.sleep(delay)
+            attempt += 1
+
+    def _observe(self, method, url, status, started):
+        if self.observer is not None:
+            try:
+                self.observer(method, url, status, time.perf_counter() - started)
+            except Exception as e:
+                print(f"Warning: GitHub request observer failed: {e}")
+
+    def get(self, path, token=None, **kwargs):
+        return self.request('GET', path, token=token, **kwargs)
+
+    def post(self, path, token=None, **kwargs):
+        return self.request('POST', path, token=token, **kwargs)
+
+    def patch(self, path, token=None, **kwargs):
+        return self.request('PATCH', path, token=token, **kwargs)
+
+    def delete(self, path, token=None, **kwargs):
+        return self.request('DELETE', path, token=token, **kwargs)
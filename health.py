@@ -0,0 +1,99 @@
+"""Health checks that run off the request path and are served from their last result."""
+import threading
+import time
+from datetime import datetime
+
+
+class HealthMonitor:
+    """Run registered probes on demand or from a worker, and report their cached results.
+
+    A probe is a function that returns a short detail string when the dependency is
+    healthy and raises when it is not. Critical probes decide readiness; the others
+    are reported but never take the node out of rotation. A result older than
+    `max_age` seconds counts as stale, and a stale critical check is not ready.
+    """
+
+    def __init__(self, max_age=45, clock=time.monotonic):
+        self.max_age = max_age
+        self.clock = clock
+        self._probes = {}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def register(self, name, probe, critical=True):
+        self._probes[name] = (probe, critical)
+
+    def refresh(self):
+        """Run every probe once and store the outcome. Returns 0 so a WorkerPool idles between rounds."""
+        if not self._refreshing.acquire(blocking=False):
+            # Another thread is already probing; its results will do
+            return 0
+        try:
+            for name, (probe, critical) in self._probes.items():
+                started = self.clock()
+                try:
+                    detail, healthy = probe(), True
+                except Exception as e:
+                    detail, healthy = str(e) or e.__class__.__name__, False
+                finished = self.clock()
+                with self._lock:
+                    self._results[name] = {
+                        'healthy': healthy,
+                        'critical': critical,
+                        'detail': detail,
+                        'latency_ms': round((finished - started) * 1000, 1),
+                        'checked_at': finished,
+                        'checked_at_iso': datetime.utcnow().isoformat()
+                    }
+        finally:
+            self._refreshing.release()
+        return 0
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def is_stale(self):
+        """True when some probe has no result yet or its result is older than max_age."""
+        now = self.clock()
+        with self._lock:
+            return any(name not in self._results or now - self._results[name]['checked_at'] > self.max_age
+                       for name in self._probes)
+
+    def report(self):
+        """(ready, status, checks) from the stored results, without doing any I/O."""
+        now = self.clock()
+        with self._lock:
+            results = dict(self._results)
+        checks = {}
+        ready, degraded = True, False
+        for name, (_, critical) in self._probes.items():
+            result = results.get(name)
+            if result is None:
+                checks[name] = {'status': 'unknown', 'critical': critical, 'latency_ms': None, 'age_seconds': None}
+                healthy = False
+            else:
+                age = now - result['checked_at']
+                healthy = result['healthy'] and age <= self.max_age
+                if not result['healthy']:
+                    status = 'unhealthy'
+                elif age > self.max_age:
+                    status = 'stale'
+                else:
+                    status = 'healthy'
+                checks[name] = {
+                    'status': status,
+                    'critical': critical,
+                    'detail': result['detail'],
+                    'latency_ms': result['latency_ms'],
+                    'age_seconds': round(age, 1),
+                    'checked_at': result['checked_at_iso']
+                }
+            if not healthy:
+                if critical:
+                    ready = False
+                else:
+                    degraded = True
+        status = 'healthy' if ready and not degraded else ('degraded' if ready else 'unhealthy')
+        return ready, status, checks
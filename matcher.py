@@ -0,0 +1,163 @@
+"""Multi-pattern substring matching used to check commit messages against goal conditions."""
+from collections import OrderedDict, deque
+import threading
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton built from (pattern, value) pairs.
+
+    `search(text)` returns the set of values whose pattern occurs anywhere in
+    `text`, in a single pass over the text regardless of how many patterns
+    there are. An empty pattern matches every text, like `'' in text`.
+    """
+
+    def __init__(self, patterns):
+        goto = [{}]
+        outputs = [set()]
+        self._always = set()
+
+        for pattern, value in patterns:
+            if not pattern:
+                self._always.add(value)
+                continue
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(value)
+
+        # Breadth-first pass: resolve failure links into a full transition table so
+        # search() never has to follow fallbacks, and merge outputs along the links
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(delta[fail[state]])
+            for char, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(next_state)
+            transitions.update(goto[state])
+            delta[state] = transitions
+            outputs[state] |= outputs[fail[state]]
+
+        self._delta = delta
+        self._outputs = [frozenset(output) if output else None for output in outputs]
+
+    def search(self, text):
+        found = set(self._always)
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state] is not None:
+                found |= outputs[state]
+        return found
+
+    def search_all(self, texts):
+        """Values whose pattern occurs in at least one of the texts."""
+        found = set()
+        for text in texts:
+            found |= self.search(text)
+        return found
+
+
+class SubstringMatcher:
+    """Per-pattern `in` checks; faster than the automaton for a handful of patterns."""
+
+    def __init__(self, patterns):
+        self._patterns = list(patterns)
+
+    def search(self, text):
+        return {value for pattern, value in self._patterns if pattern in text}
+
+    def search_all(self, texts):
+        texts = list(texts)
+        return {value for pattern, value in self._patterns if any(pattern in text for text in texts)}
+
+
+class ExactMatcher:
+    """Dictionary lookup for conditions that must equal a reference, such as an issue number or tag name.
+    `normalize` is applied to patterns and texts alike, so '#7' and '7' can be made to match.
+    """
+
+    def __init__(self, patterns, normalize=None):
+        self._normalize = normalize or (lambda text: text)
+        self._values = {}
+        for pattern, value in patterns:
+            self._values.setdefault(self._normalize(pattern), set()).add(value)
+
+    def search(self, text):
+        return set(self._values.get(self._normalize(text), ()))
+
+    def search_all(self, texts):
+        found = set()
+        for text in texts:
+            found |= self.search(text)
+        return found
+
+
+def compile_matcher(patterns, automaton_threshold=50):
+    """Build the cheapest matcher for a list of (pattern, value) pairs.
+    Scanning every pattern with C-level `in` wins until the pattern count makes
+    the single-pass automaton cheaper (see benchmarks/bench_matcher.py).
+    """
+    patterns = list(patterns)
+    if len(patterns) < automaton_threshold:
+        return SubstringMatcher(patterns)
+    return AhoCorasick(patterns)
+
+
+class MatcherCache:
+    """Thread-safe bounded LRU of compiled matchers.
+
+    Each entry remembers the signature (the pattern set) it was built from, so a
+    stale entry left behind by another process is rebuilt rather than trusted.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, signature, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        matcher = build()
+        with self._lock:
+            self._entries[key] = (signature, matcher)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return matcher
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
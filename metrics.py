@@ -0,0 +1,256 @@
+"""Counters and histograms rendered in the Prometheus text format, aggregated across worker processes.
+
+Each process records into its own in-memory registry, which is cheap enough for the
+request path. Every `flush_interval` seconds (and on every scrape) the process
+writes its cumulative values to a store under its own instance id. A scrape sums
+the values of every instance, so the totals are the same whichever worker serves
+/metrics. The rows of instances whose process has exited are folded into a single
+'retired' instance, which keeps the counters monotonic across worker restarts
+without adding a copy of every series per restart.
+"""
+from collections import defaultdict
+import json
+import math
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+# Seconds; suits both in-process work and calls to GitHub
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SUFFIXES = {'counter': ('_total',), 'histogram': ('_bucket', '_sum', '_count')}
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    def __init__(self, registry, name, labelnames):
+        self.registry = registry
+        self.name = name
+        self.labelnames = labelnames
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, str(labels[name])) for name in self.labelnames)
+        self.registry.add([(f'{self.name}_total', key, amount)])
+
+
+class Histogram:
+    def __init__(self, registry, name, labelnames, buckets):
+        self.registry = registry
+        self.name = name
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = tuple((name, str(labels[name])) for name in self.labelnames)
+        updates = [(f'{self.name}_bucket', key + (('le', _format_value(bound)),), 1)
+                   for bound in self.buckets if value <= bound]
+        updates.append((f'{self.name}_sum', key, value))
+        updates.append((f'{self.name}_count', key, 1))
+        self.registry.add(updates)
+
+
+class MemoryMetricsStore:
+    """Keeps nothing beyond the registry itself: a scrape sees only the serving process."""
+
+    backend = 'memory'
+
+    def write(self, instance, values):
+        return True
+
+    def totals(self):
+        return None
+
+
+class SQLiteMetricsStore:
+    """Per-instance cumulative values in a SQLite file shared by the workers on the host."""
+
+    backend = 'sqlite'
+    RETIRED = 'retired'
+
+    def __init__(self, path, retire_interval=60, clock=time.monotonic):
+        self.path = path
+        self.retire_interval = retire_interval
+        self.clock = clock
+        self._next_retire = 0.0
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS metric_sample (instance TEXT NOT NULL, sample TEXT NOT NULL, '
+            'labels TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (instance, sample, labels))'
+        )
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def write(self, instance, values):
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN')
+            connection.executemany(
+                'INSERT OR REPLACE INTO metric_sample (instance, sample, labels, value) VALUES (?, ?, ?, ?)',
+                [(instance, sample, json.dumps(labels), value) for (sample, labels), value in values.items()]
+            )
+            connection.execute('COMMIT')
+            return True
+        except sqlite3.Error as e:
+            print(f"Warning: metrics flush failed: {e}")
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            return False
+
+    def retire_exited(self):
+        """Fold the rows of instances whose process is gone into the 'retired' instance; returns how many."""
+        connection = self._connect()
+        try:
+            # IMMEDIATE takes the write lock first, so two workers never fold the same rows twice
+            connection.execute('BEGIN IMMEDIATE')
+            instances = [row[0] for row in connection.execute('SELECT DISTINCT instance FROM metric_sample')]
+            exited = [instance for instance in instances if instance != self.RETIRED and not _instance_alive(instance)]
+            if exited:
+                marks = ','.join('?' * len(exited))
+                connection.execute(
+                    f'INSERT INTO metric_sample (instance, sample, labels, value) '
+                    f'SELECT ?, sample, labels, SUM(value) FROM metric_sample WHERE instance IN ({marks}) '
+                    f'GROUP BY sample, labels '
+                    f'ON CONFLICT (instance, sample, labels) DO UPDATE SET value = value + excluded.value',
+                    [self.RETIRED] + exited
+                )
+                connection.execute(f'DELETE FROM metric_sample WHERE instance IN ({marks})', exited)
+            connection.execute('COMMIT')
+            return len(exited)
+        except sqlite3.Error as e:
+            print(f"Warning: retiring exited metrics instances failed: {e}")
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            return 0
+
+    def totals(self):
+        if self.clock() >= self._next_retire:
+            self._next_retire = self.clock() + self.retire_interval
+            self.retire_exited()
+        try:
+            rows = self._connect().execute(
+                'SELECT sample, labels, SUM(value) FROM metric_sample GROUP BY sample, labels'
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: metrics read failed: {e}")
+            return None
+        return {(sample, tuple(tuple(pair) for pair in json.loads(labels))): value for sample, labels, value in rows}
+
+
+def _instance_alive(instance):
+    """Whether the process an instance id ('<pid>-<random>') belongs to is still running on this host."""
+    try:
+        pid = int(instance.split('-', 1)[0])
+    except ValueError:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, but as another user
+        return True
+    return True
+
+
+class MetricsRegistry:
+    def __init__(self, store=None, flush_interval=5, clock=time.monotonic):
+        self.store = store or MemoryMetricsStore()
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._families = {}
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # A forked child must not reuse its parent's instance id or values
+        self._pid = os.getpid()
+        self.instance = f'{self._pid}-{secrets.token_hex(4)}'
+        self._values = defaultdict(float)
+        self._dirty = set()
+        self._next_flush = self.clock() + self.flush_interval
+
+    def counter(self, name, documentation, labelnames=()):
+        self._families[name] = ('counter', documentation)
+        return Counter(self, name, tuple(labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self._families[name] = ('histogram', documentation)
+        return Histogram(self, name, tuple(labelnames), buckets)
+
+    def add(self, updates):
+        flush = False
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._reset()
+            for sample, labels, amount in updates:
+                self._values[(sample, labels)] += amount
+                self._dirty.add((sample, labels))
+            if self.clock() >= self._next_flush:
+                flush = True
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Write this process's changed values to the shared store."""
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._reset()
+            changed = {key: self._values[key] for key in self._dirty}
+            self._dirty = set()
+            self._next_flush = self.clock() + self.flush_interval
+        if changed and not self.store.write(self.instance, changed):
+            # Try these again on the next flush
+            with self._lock:
+                self._dirty.update(changed)
+
+    def render(self):
+        """Every family in the Prometheus text exposition format (version 0.0.4)."""
+        self.flush()
+        totals = self.store.totals()
+        if totals is None:
+            with self._lock:
+                totals = dict(self._values)
+
+        samples_by_family = defaultdict(list)
+        for (sample, labels), value in totals.items():
+            for family, (kind, _) in self._families.items():
+                if sample[len(family):] in SUFFIXES[kind] and sample.startswith(family):
+                    samples_by_family[family].append((sample, labels, value))
+                    break
+
+        lines = []
+        for family in sorted(self._families):
+            kind, documentation = self._families[family]
+            # The 0.0.4 text format names a counter family after its _total sample
+            exposed = f'{family}_total' if kind == 'counter' else family
+            lines.append(f'# HELP {exposed} {documentation}')
+            lines.append(f'# TYPE {exposed} {kind}')
+            for sample, labels, value in sorted(samples_by_family[family], key=_sample_order):
+                label_text = ','.join(f'{name}="{_escape(label)}"' for name, label in labels)
+                lines.append(f'{sample}{{{label_text}}} {_format_value(value)}' if label_text
+                             else f'{sample} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _sample_order(item):
+    sample, labels, _ = item
+    series = tuple(pair for pair in labels if pair[0] != 'le')
+    bound = next((float(label) for name, label in labels if name == 'le'), 0.0)
+    return series, not sample.endswith('_bucket'), sample, bound
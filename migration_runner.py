@@ -0,0 +1,225 @@
+"""Versioned schema migrations, applied from the CLI at deploy time and recorded in a schema_version table.
+
+Each migration is a file `migrations/<version>_<name>.py` with a docstring and an
+`upgrade(ctx)` function. The runner reflects the database once per run and hands
+every migration a MigrationContext whose helpers (add_column, create_index, ...)
+consult and update that catalog. The helpers are idempotent, so a migration that
+was interrupted part way can simply be run again.
+"""
+from datetime import datetime
+import importlib.util
+import os
+import re
+import time
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.py$')
+# Arbitrary key for the Postgres advisory lock that keeps two deploys from migrating at once
+ADVISORY_LOCK_KEY = 7_340_021
+
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+class Migration:
+    def __init__(self, version, name, upgrade, description=''):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+        self.description = description
+
+
+def load_migrations(directory):
+    """Migrations found in `directory`, ordered by version."""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version, name = int(match.group(1)), match.group(2)
+        if version in migrations:
+            raise ValueError(f'Duplicate migration version {version}: {filename}')
+        spec = importlib.util.spec_from_file_location(f'migration_{match.group(1)}_{name}',
+                                                      os.path.join(directory, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        description = (module.__doc__ or '').strip().splitlines()
+        migrations[version] = Migration(version, name, module.upgrade, description[0] if description else '')
+    return [migrations[version] for version in sorted(migrations)]
+
+
+class SchemaCatalog:
+    """Tables, columns and indexes reflected in one pass, kept current as migrations change them."""
+
+    def __init__(self, connection):
+        inspector = inspect(connection)
+        self.tables = set(inspector.get_table_names())
+        # get_multi_* reads the whole catalog in one round trip on Postgres instead of a query per table
+        self.columns = {table: {column['name'] for column in columns}
+                        for (_, table), columns in inspector.get_multi_columns().items()}
+        self.indexes = {table: {index['name'] for index in indexes}
+                        for (_, table), indexes in inspector.get_multi_indexes().items()}
+
+    def has_column(self, table, column):
+        return column in self.columns.get(table, ())
+
+    def has_index(self, table, index):
+        return index in self.indexes.get(table, ())
+
+
+class MigrationContext:
+    """What a migration's upgrade() works with. Every statement runs in its own short transaction."""
+
+    def __init__(self, engine, connection, catalog, metadata, batch_size, backfill_pause=0, echo=print):
+        self.engine = engine
+        self.connection = connection
+        self.catalog = catalog
+        self.metadata = metadata
+        self.batch_size = batch_size
+        self.backfill_pause = backfill_pause
+        self.echo = echo
+
+    @property
+    def dialect(self):
+        return self.engine.dialect.name
+
+    def quote(self, identifier):
+        return self.engine.dialect.identifier_preparer.quote(identifier)
+
+    def execute(self, sql, params=None):
+        with self.connection.begin():
+            return self.connection.execute(text(sql), params or {})
+
+    def create_missing_tables(self, names=None):
+        """Create the model tables (or just `names`) that do not exist yet."""
+        tables = [table for table in self.metadata.sorted_tables
+                  if table.name not in self.catalog.tables and (names is None or table.name in names)]
+        if tables:
+            with self.connection.begin():
+                self.metadata.create_all(self.connection, tables=tables)
+            for table in tables:
+                self.catalog.tables.add(table.name)
+                self.catalog.columns[table.name] = {column.name for column in table.columns}
+                self.catalog.indexes[table.name] = {index.name for index in table.indexes}
+                self.echo(f"  created table '{table.name}'")
+        return [table.name for table in tables]
+
+    def add_column(self, table, column, ddl_type):
+        if self.catalog.has_column(table, column):
+            return False
+        self.execute(f'ALTER TABLE {self.quote(table)} ADD COLUMN {self.quote(column)} {ddl_type}')
+        self.catalog.columns.setdefault(table, set()).add(column)
+        self.echo(f"  added column '{table}.{column}'")
+        return True
+
+    def drop_column(self, table, column):
+        if not self.catalog.has_column(table, column):
+            return False
+        self.execute(f'ALTER TABLE {self.quote(table)} DROP COLUMN {self.quote(column)}')
+        self.catalog.columns[table].discard(column)
+        self.echo(f"  dropped column '{table}.{column}'")
+        return True
+
+    def create_index(self, name, table, columns):
+        """Create an index if missing; on Postgres it is built CONCURRENTLY so writes to `table` carry on."""
+        if self.catalog.has_index(table, name):
+            return False
+        column_list = ', '.join(self.quote(column) for column in columns)
+        if self.dialect == 'postgresql':
+            # CONCURRENTLY cannot run inside a transaction block
+            with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(text(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.quote(name)} ON {self.quote(table)} ({column_list})'
+                ))
+        else:
+            self.execute(f'CREATE INDEX IF NOT EXISTS {self.quote(name)} ON {self.quote(table)} ({column_list})')
+        self.catalog.indexes.setdefault(table, set()).add(name)
+        self.echo(f"  created index '{name}'")
+        return True
+
+    def backfill(self, table, assignments, where, batch_size=None):
+        """UPDATE `table` SET `assignments` for rows matching `where`, a batch of ids per transaction.
+
+        Only a batch of rows is locked at a time, so a large table stays writable while
+        this runs. `assignments` must make `where` false for the updated rows, otherwise
+        the same rows would be picked again.
+        """
+        batch_size = batch_size or self.batch_size
+        quoted = self.quote(table)
+        statement = (f'UPDATE {quoted} SET {assignments} WHERE id IN '
+                     f'(SELECT id FROM {quoted} WHERE {where} ORDER BY id LIMIT :batch_size)')
+        total = 0
+        while True:
+            updated = self.execute(statement, {'batch_size': batch_size}).rowcount
+            total += updated
+            if updated < batch_size:
+                break
+            if self.backfill_pause:
+                time.sleep(self.backfill_pause)
+        self.echo(f"  backfilled {total} row(s) of '{table}' in batches of {batch_size}")
+        return total
+
+
+class MigrationRunner:
+    def __init__(self, engine, migrations, metadata, batch_size=1000, backfill_pause=0, echo=print):
+        self.engine = engine
+        self.migrations = migrations
+        self.metadata = metadata
+        self.batch_size = batch_size
+        self.backfill_pause = backfill_pause
+        self.echo = echo
+
+    def applied(self):
+        """{version: applied_at} for the migrations recorded in schema_version."""
+        with self.engine.connect() as connection:
+            if not inspect(connection).has_table(schema_version.name):
+                return {}
+            rows = connection.execute(select(schema_version.c.version, schema_version.c.applied_at))
+            return {version: applied_at for version, applied_at in rows}
+
+    def pending(self):
+        applied = self.applied()
+        return [migration for migration in self.migrations if migration.version not in applied]
+
+    def run(self, target=None):
+        """Apply pending migrations up to and including `target` (all of them by default), in order."""
+        with self.engine.connect() as connection:
+            locked = self.engine.dialect.name == 'postgresql'
+            if locked:
+                connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ADVISORY_LOCK_KEY})
+                connection.commit()
+            try:
+                return self._run(connection, target)
+            finally:
+                if locked:
+                    connection.rollback()
+                    connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_LOCK_KEY})
+                    connection.commit()
+
+    def _run(self, connection, target):
+        with connection.begin():
+            schema_version.create(connection, checkfirst=True)
+            applied = {row[0] for row in connection.execute(select(schema_version.c.version))}
+            catalog = SchemaCatalog(connection)
+        context = MigrationContext(self.engine, connection, catalog, self.metadata, self.batch_size,
+                                   self.backfill_pause, self.echo)
+
+        done = []
+        for migration in self.migrations:
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+            self.echo(f'Applying {migration.version:04d} {migration.name}: {migration.description}')
+            started = time.perf_counter()
+            migration.upgrade(context)
+            with connection.begin():
+                connection.execute(schema_version.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                ))
+            self.echo(f'  done in {time.perf_counter() - started:.2f}s')
+            done.append(migration)
+        return done
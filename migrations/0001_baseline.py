@@ -0,0 +1,5 @@
+"""Create the model tables that do not exist yet."""
+
+
+def upgrade(ctx):
+    ctx.create_missing_tables()
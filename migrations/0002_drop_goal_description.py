@@ -0,0 +1,5 @@
+"""Drop the legacy goal.description column (replaced by title and details)."""
+
+
+def upgrade(ctx):
+    ctx.drop_column('goal', 'description')
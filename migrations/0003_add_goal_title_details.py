@@ -0,0 +1,7 @@
+"""Add goal.title, goal.details and goal.updated_at."""
+
+
+def upgrade(ctx):
+    ctx.add_column('goal', 'title', 'VARCHAR(255)')
+    ctx.add_column('goal', 'details', 'TEXT')
+    ctx.add_column('goal', 'updated_at', 'TIMESTAMP')
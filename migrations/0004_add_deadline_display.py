@@ -0,0 +1,13 @@
+"""Add goal.deadline_display and fill it in for existing goals."""
+
+# Same format as create_goal writes: DD/MM/YYYY HH:MM
+DEADLINE_DISPLAY = {
+    'postgresql': "TO_CHAR(deadline, 'DD/MM/YYYY HH24:MI')",
+    'sqlite': "strftime('%d/%m/%Y %H:%M', deadline)",
+}
+
+
+def upgrade(ctx):
+    ctx.add_column('goal', 'deadline_display', 'VARCHAR(25)')
+    ctx.backfill('goal', f'deadline_display = {DEADLINE_DISPLAY[ctx.dialect]}',
+                 'deadline_display IS NULL AND deadline IS NOT NULL')
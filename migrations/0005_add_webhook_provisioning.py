@@ -0,0 +1,8 @@
+"""Track background webhook provisioning on goals and shared repo hooks."""
+
+
+def upgrade(ctx):
+    ctx.add_column('goal', 'webhook_status', 'VARCHAR(20)')
+    ctx.add_column('repo_webhook', 'provision_attempts', 'INTEGER NOT NULL DEFAULT 0')
+    ctx.add_column('repo_webhook', 'provision_after', 'TIMESTAMP')
+    ctx.add_column('repo_webhook', 'provision_error', 'TEXT')
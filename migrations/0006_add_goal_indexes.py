@@ -0,0 +1,7 @@
+"""Index goals for webhook dispatch, the per-user list and the deadline sweeper."""
+
+
+def upgrade(ctx):
+    ctx.create_index('ix_goal_repo_dispatch', 'goal', ['repo_owner', 'repo_name', 'status', 'completion_type'])
+    ctx.create_index('ix_goal_user_deadline', 'goal', ['user_github_id', 'deadline', 'id'])
+    ctx.create_index('ix_goal_status_deadline', 'goal', ['status', 'deadline'])
@@ -0,0 +1,60 @@
+"""Responses whose body is fixed once built, kept in memory alongside their compressed variants."""
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class PrecompressedAsset:
+    """A body compressed once up front (gzip, and brotli when installed) instead of per request.
+
+    `response(request, response_class)` picks the best variant the client accepts,
+    answers a matching If-None-Match with a 304, and sets ETag and Vary. Each encoding
+    has its own strong ETag, since the bytes on the wire differ.
+    """
+
+    def __init__(self, body, mimetype, cache_control=None, min_size=256, compress=True):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        self.digest = digest
+        self.variants = {'identity': body}
+        # Tiny or already-compressed bodies (images, fonts) are not worth a decompression step on the client
+        if compress and len(body) >= min_size:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=11)
+        self.etags = {
+            encoding: digest if encoding == 'identity' else f'{digest}-{encoding}'
+            for encoding in self.variants
+        }
+
+    def choose_encoding(self, accept_encodings):
+        """Smallest variant the client accepts (werkzeug's request.accept_encodings)."""
+        acceptable = [
+            encoding for encoding in self.variants
+            if encoding != 'identity' and accept_encodings[encoding] > 0
+        ]
+        if not acceptable:
+            return 'identity'
+        return min(acceptable, key=lambda encoding: len(self.variants[encoding]))
+
+    def response(self, request, response_class):
+        encoding = self.choose_encoding(request.accept_encodings)
+        etag = self.etags[encoding]
+        if request.if_none_match.contains(etag):
+            response = response_class(status=304)
+        else:
+            response = response_class(self.variants[encoding], mimetype=self.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        if self.cache_control:
+            response.headers['Cache-Control'] = self.cache_control
+        return response
@@ -0,0 +1,88 @@
+"""Record the SQL statements a unit of work runs, and spot the same statement repeated (the N+1 pattern)."""
+from contextlib import contextmanager
+from collections import Counter
+import re
+import time
+
+from sqlalchemy import event
+
+# Expanded IN lists differ only in their number of placeholders
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_statement(statement):
+    """The statement with whitespace collapsed and IN lists reduced to one placeholder."""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More statements than the budget allowed, or one statement repeated too often."""
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements = []
+
+    def record(self, statement, seconds):
+        self.statements.append((statement, seconds))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_seconds(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold):
+        """[(statement, times)] for statements run at least `threshold` times, most repeated first."""
+        counts = Counter(normalize_statement(statement) for statement, _ in self.statements)
+        return [(statement, times) for statement, times in counts.most_common() if times >= threshold]
+
+    def summary(self):
+        return f'{self.count} queries, {self.total_seconds * 1000:.1f} ms'
+
+    def describe(self):
+        lines = [self.summary()]
+        lines.extend(f'  {seconds * 1000:7.2f} ms  {normalize_statement(statement)}'
+                     for statement, seconds in self.statements)
+        return '\n'.join(lines)
+
+    def check(self, max_queries=None, repeat_threshold=None):
+        """Raise QueryBudgetExceeded if the log goes over either limit."""
+        if max_queries is not None and self.count > max_queries:
+            raise QueryBudgetExceeded(f'Expected at most {max_queries} queries, ran {self.describe()}')
+        if repeat_threshold is not None:
+            repeated = self.repeated(repeat_threshold)
+            if repeated:
+                statement, times = repeated[0]
+                raise QueryBudgetExceeded(f'Possible N+1: ran {times} times: {statement}\n{self.describe()}')
+
+
+@contextmanager
+def record_queries(engine):
+    """Yield a QueryLog that collects every statement `engine` runs until the block exits."""
+    log = QueryLog()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_log_started', []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        log.record(statement, time.perf_counter() - conn.info['query_log_started'].pop())
+
+    event.listen(engine, 'before_cursor_execute', before)
+    event.listen(engine, 'after_cursor_execute', after)
+    try:
+        yield log
+    finally:
+        event.remove(engine, 'before_cursor_execute', before)
+        event.remove(engine, 'after_cursor_execute', after)
+
+
+@contextmanager
+def query_budget(engine, max_queries=None, repeat_threshold=None):
+    """Fail the block if it runs more than `max_queries` statements or repeats one `repeat_threshold` times."""
+    with record_queries(engine) as log:
+        yield log
+    log.check(max_queries, repeat_threshold)
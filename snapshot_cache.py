@@ -0,0 +1,190 @@
+"""Small key/value caches for JSON-serializable snapshots, with a TTL and hit/miss counters."""
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+import time
+
+
+class SnapshotCache:
+    """Interface shared by the backends. Values are JSON-serializable; every entry expires after `ttl` seconds."""
+
+    backend = 'none'
+
+    def __init__(self, ttl=300, clock=time.time):
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_many(self, keys):
+        """{key: value} for the keys that are cached and still fresh."""
+        return {}
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, values):
+        pass
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def delete_many(self, keys):
+        pass
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'backend': self.backend,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'ttl_seconds': self.ttl
+        }
+
+
+class NullSnapshotCache(SnapshotCache):
+    """Caching disabled: every lookup is a miss."""
+
+    def get_many(self, keys):
+        for _ in keys:
+            self._count(False)
+        return {}
+
+
+class MemorySnapshotCache(SnapshotCache):
+    """Per-process bounded LRU. Invalidations only reach this process, so it suits a single worker or tests."""
+
+    backend = 'memory'
+
+    def __init__(self, ttl=300, maxsize=10000, clock=time.time):
+        super().__init__(ttl, clock)
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = self.clock()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                elif entry is not None:
+                    del self._entries[key]
+        for key in keys:
+            self._count(key in found)
+        return found
+
+    def set_many(self, values):
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteSnapshotCache(SnapshotCache):
+    """Cache in a local SQLite file, shared by every worker process on the host.
+
+    WAL mode lets readers proceed while a worker writes, and an invalidation made by
+    one worker is seen by all of them on their next lookup. Each thread keeps its own
+    connection. Expired rows are skipped on read and purged from time to time on write.
+    """
+
+    backend = 'sqlite'
+    PURGE_EVERY = 500
+
+    def __init__(self, path, ttl=300, clock=time.time):
+        super().__init__(ttl, clock)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS snapshot (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit; every statement is its own short transaction
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        if keys:
+            try:
+                rows = self._connect().execute(
+                    f"SELECT key, value FROM snapshot WHERE expires_at > ? AND key IN ({','.join('?' * len(keys))})",
+                    [self.clock(), *keys]
+                ).fetchall()
+                found = {key: json.loads(value) for key, value in rows}
+            except sqlite3.Error as e:
+                # A cache that cannot be read is a cache miss, never an error for the caller
+                print(f"Warning: snapshot cache read failed: {e}")
+        for key in keys:
+            self._count(key in found)
+        return found
+
+    def set_many(self, values):
+        if not values:
+            return
+        expires_at = self.clock() + self.ttl
+        try:
+            connection = self._connect()
+            connection.executemany(
+                'INSERT OR REPLACE INTO snapshot (key, value, expires_at) VALUES (?, ?, ?)',
+                [(key, json.dumps(value), expires_at) for key, value in values.items()]
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                connection.execute('DELETE FROM snapshot WHERE expires_at <= ?', (self.clock(),))
+        except sqlite3.Error as e:
+            print(f"Warning: snapshot cache write failed: {e}")
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            self._connect().execute(f"DELETE FROM snapshot WHERE key IN ({','.join('?' * len(keys))})", keys)
+        except sqlite3.Error as e:
+            print(f"Warning: snapshot cache invalidation failed: {e}")
+
+    def clear(self):
+        self._connect().execute('DELETE FROM snapshot')
@@ -234,20 +234,37 @@ class GitDoneApp {
 
     async loadGoals() {
         try {
-            const response = await fetch('/api/goals');
-            if (response.ok) {
-                const goalsData = await response.json();
-                this.goals = goalsData;
-                console.log('Loaded goals:', this.goals);
-                this.renderGoals();
-            } else {
-                console.error('Failed to load goals:', response.status);
+            // Goals come back one page at a time; follow the cursor until the last page.
+            // Pages carry an ETag, so the browser revalidates unchanged ones with a 304.
+            const goalsData = [];
+            let url = '/api/goals';
+            while (url) {
+                const response = await fetch(url);
+                if (!response.ok) {
+                    console.error('Failed to load goals:', response.status);
+                    return;
+                }
+                goalsData.push(...await response.json());
+                const nextCursor = response.headers.get('X-Next-Cursor');
+                url = nextCursor ? `/api/goals?cursor=${encodeURIComponent(nextCursor)}` : null;
             }
+            this.goals = goalsData;
+            console.log('Loaded goals:', this.goals);
+            this.renderGoals();
+            this.watchWebhookProvisioning();
         } catch (error) {
             console.error('Error loading goals:', error);
         }
     }
 
+    watchWebhookProvisioning() {
+        // Webhooks are created in the background; reload until none is left pending
+        clearTimeout(this.provisioningTimer);
+        if (this.goals.some(g => g.webhook_status === 'pending')) {
+            this.provisioningTimer = setTimeout(() => this.loadGoals(), 5000);
+        }
+    }
+
     renderGoals() {
         const container = document.getElementById('goals-container');
         container.innerHTML = '';
@@ -285,7 +302,7 @@ class GitDoneApp {
         if (goal.status === 'completed') {
             statusText = '🎉 Completed! Well done.';
             statusClass = 'completed';
-        } else if (goal.status === 'failed') {
+        } else if (goal.status === 'failed' || goal.status === 'overdue') {
             statusText = "⏰ Time's up!";
             statusClass = 'urgent';
         }
@@ -315,6 +332,13 @@ class GitDoneApp {
                 completionTypeDisplay = `Completion condition: ${goal.completion_condition}`;
         }
 
+        let webhookDisplay = '';
+        if (goal.webhook_status === 'pending') {
+            webhookDisplay = '⏳ Connecting to GitHub...';
+        } else if (goal.webhook_status === 'failed') {
+            webhookDisplay = '⚠️ Could not create the GitHub webhook. Check that you have admin access to the repository.';
+        }
+
 
         widget.innerHTML = `
             <h3>${goal.title}</h3>
@@ -326,6 +350,7 @@ class GitDoneApp {
             <p style="margin-bottom: 1rem; color: var(--text-secondary);">
                 ${completionTypeDisplay}
             </p>
+            ${webhookDisplay ? `<p class="webhook-status ${goal.webhook_status}" style="margin-bottom: 1rem; color: var(--text-muted);">${webhookDisplay}</p>` : ''}
             <div class="countdown ${goal.status === 'completed' ? 'completed' : ''}" id="countdown-${goal.id}">--:--:--</div>
             <div class="goal-status ${statusClass}" id="status-${goal.id}">${statusText}</div>
             <div class="goal-actions" style="margin-top: 1rem; display: flex; gap: .5rem;">
@@ -388,6 +413,8 @@ class GitDoneApp {
             setTimeout(() => this.startCountdown(goal), 100);
         } else if (goal.status === 'completed') {
             widget.querySelector(`#countdown-${goal.id}`).textContent = '✅ DONE';
+        } else if (goal.status === 'overdue') {
+            widget.querySelector(`#countdown-${goal.id}`).textContent = '⏰ TIME\'S UP';
         }
 
         return widget;
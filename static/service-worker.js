@@ -1,9 +1,20 @@
-const CACHE_NAME = 'git-done-v3';
+const CACHE_NAME = 'git-done-v4';
+// Fingerprinted assets (/static/dist/name.<hash>.ext) never change, so they are cached on first use
+const FINGERPRINTED_PREFIX = '/static/dist/';
+const assetStem = (pathname) => pathname.replace(/\.[0-9a-f]{12}(\.\w+)$/, '$1');
+
+// Drop earlier versions of a fingerprinted file once its replacement is cached
+const pruneOldVersions = (cache, request) => {
+  const stem = assetStem(new URL(request.url).pathname);
+  return cache.keys().then((keys) => Promise.all(
+    keys
+      .filter((key) => key.url !== request.url && assetStem(new URL(key.url).pathname) === stem)
+      .map((key) => cache.delete(key))
+  ));
+};
+
 const STATIC_ASSETS = [
   '/',
-  '/static/css/style.css',
-  '/static/js/app.js',
-  '/static/images/GD-Logo.png',
   '/manifest.json'
 ];
 
@@ -81,6 +92,27 @@ self.addEventListener('fetch', (event) => {
   // Network-first strategy for the root page (to handle login/logout properly)
   const url = new URL(event.request.url);
 
+  if (url.pathname.startsWith(FINGERPRINTED_PREFIX)) {
+    // Cache-first is safe here: a new version of a file gets a new URL
+    event.respondWith(
+      caches.open(CACHE_NAME).then((cache) =>
+        cache.match(event.request).then((cachedResponse) => {
+          if (cachedResponse) {
+            return cachedResponse;
+          }
+          return fetch(event.request).then((response) => {
+            if (response && response.status === 200) {
+              cache.put(event.request, response.clone()).then(() => pruneOldVersions(cache, event.request));
+            }
+            return response;
+          });
+        })
+      )
+    );
+    return;
+  }
+
+  // Unversioned scripts and styles could be stale in the cache, so always go to the network
   if (url.pathname.endsWith('.js') || url.pathname.endsWith('.css')) {
     event.respondWith(fetch(event.request));
     return;
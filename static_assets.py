@@ -0,0 +1,146 @@
+"""Content-hashed static assets served with immutable caching.
+
+`flask build-assets` writes fingerprinted copies (plus .gz/.br siblings for CDNs and
+reverse proxies) and an assets.json manifest into static/dist. When no manifest has
+been built, the same fingerprints are computed in memory at startup, so
+url_for('static', ...) always points at a URL whose content can never change.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from flask import abort, current_app, request
+
+from precompressed import PrecompressedAsset
+
+MANIFEST_NAME = 'assets.json'
+FINGERPRINT_EXTENSIONS = ('.css', '.js', '.png', '.svg', '.ico', '.webp', '.woff2')
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg')
+# Served from fixed URLs on purpose: browsers look these up by name
+UNVERSIONED = ('manifest.json', 'service-worker.js')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MIMETYPES = {
+    '.css': 'text/css', '.js': 'text/javascript', '.png': 'image/png', '.svg': 'image/svg+xml',
+    '.ico': 'image/x-icon', '.webp': 'image/webp', '.woff2': 'font/woff2',
+}
+
+
+def fingerprinted_name(filename, content):
+    root, extension = os.path.splitext(filename)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+
+
+def iter_source_assets(static_folder, build_dir='dist'):
+    """Yield (filename relative to static/, absolute path) for every file worth fingerprinting."""
+    for directory, subdirectories, files in os.walk(static_folder):
+        relative_dir = os.path.relpath(directory, static_folder)
+        if relative_dir == build_dir or relative_dir.startswith(build_dir + os.sep):
+            subdirectories[:] = []
+            continue
+        for name in sorted(files):
+            filename = os.path.normpath(os.path.join(relative_dir, name)).replace(os.sep, '/')
+            if filename in UNVERSIONED or not name.endswith(FINGERPRINT_EXTENSIONS):
+                continue
+            yield filename, os.path.join(directory, name)
+
+
+def build_assets(static_folder, build_dir='dist'):
+    """Write hashed copies and their compressed variants to static/<build_dir> and return the manifest."""
+    output = os.path.join(static_folder, build_dir)
+    shutil.rmtree(output, ignore_errors=True)
+    manifest = {}
+    for filename, path in iter_source_assets(static_folder, build_dir):
+        with open(path, 'rb') as source:
+            content = source.read()
+        hashed = fingerprinted_name(filename, content)
+        target = os.path.join(output, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as out:
+            out.write(content)
+        asset = PrecompressedAsset(content, None, compress=filename.endswith(COMPRESSIBLE_EXTENSIONS))
+        for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+            if encoding in asset.variants:
+                with open(target + suffix, 'wb') as out:
+                    out.write(asset.variants[encoding])
+        manifest[filename] = hashed
+    with open(os.path.join(output, MANIFEST_NAME), 'w') as out:
+        json.dump(manifest, out, indent=2, sort_keys=True)
+    return manifest
+
+
+class StaticAssets:
+    """Flask extension that rewrites url_for('static', filename=...) to fingerprinted URLs.
+
+    Hashed files are served under <static_url_path>/<build_dir>/ with a one-year immutable
+    Cache-Control and a precompressed variant picked from Accept-Encoding.
+    """
+
+    def __init__(self, app=None, build_dir='dist'):
+        self.build_dir = build_dir
+        self.manifest = {}
+        self._sources = {}
+        self._assets = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.load()
+        app.url_defaults(self._fingerprint_url)
+        app.add_url_rule(f'{app.static_url_path}/{self.build_dir}/<path:filename>',
+                         endpoint='fingerprinted_static', view_func=self.serve)
+        app.extensions['static_assets'] = self
+
+    def load(self):
+        """Read the built manifest, or fingerprint the source files in memory if there is none."""
+        output = os.path.join(self.static_folder, self.build_dir)
+        manifest_path = os.path.join(output, MANIFEST_NAME)
+        manifest, sources = {}, {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as source:
+                manifest = json.load(source)
+            sources = {hashed: os.path.join(output, hashed) for hashed in manifest.values()}
+        else:
+            for filename, path in iter_source_assets(self.static_folder, self.build_dir):
+                with open(path, 'rb') as source:
+                    hashed = fingerprinted_name(filename, source.read())
+                manifest[filename] = hashed
+                sources[hashed] = path
+        with self._lock:
+            self.manifest = manifest
+            self._sources = sources
+            self._assets = {}
+
+    def _fingerprint_url(self, endpoint, values):
+        if endpoint == 'static':
+            hashed = self.manifest.get(values.get('filename'))
+            if hashed:
+                values['filename'] = f'{self.build_dir}/{hashed}'
+
+    def _asset(self, hashed):
+        asset = self._assets.get(hashed)
+        if asset is None:
+            path = self._sources.get(hashed)
+            if path is None:
+                return None
+            with self._lock:
+                asset = self._assets.get(hashed)
+                if asset is None:
+                    with open(path, 'rb') as source:
+                        content = source.read()
+                    extension = os.path.splitext(hashed)[1]
+                    asset = self._assets[hashed] = PrecompressedAsset(
+                        content, MIMETYPES.get(extension, 'application/octet-stream'), cache_control=IMMUTABLE,
+                        compress=extension in COMPRESSIBLE_EXTENSIONS
+                    )
+        return asset
+
+    def serve(self, filename):
+        asset = self._asset(filename)
+        if asset is None:
+            abort(404)
+        return asset.response(request, current_app.response_class)
+
@@ -5,6 +5,13 @@ import os
 os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
 os.environ['SECRET_KEY'] = 'test-secret-key'
 os.environ['BASE_URL'] = 'http://localhost:5000'
+os.environ['WEBHOOK_WORKERS'] = '0'
+os.environ['WEBHOOK_PROVISION_WORKERS'] = '0'
+os.environ['GOAL_RECONCILE_WORKERS'] = '0'
+os.environ['DEADLINE_SWEEPER_ENABLED'] = 'false'
+os.environ['EMBED_SNAPSHOT_CACHE'] = 'memory'
+os.environ['HEALTH_CHECK_INTERVAL'] = '0'
+os.environ['METRICS_STORE'] = 'memory'
 
 from application import application, db
 
@@ -35,4 +42,84 @@ def session(app):
         yield db.session
 
         # Rollback the transaction after the test
-        db.session.rollback()
\ No newline at end of file
+        db.session.rollback()
+
+@pytest.fixture(scope='function')
+def clean_db(app):
+    """Recreate all tables so each test starts from an empty database."""
+    from application import embed_snapshots
+
+    embed_snapshots.clear()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture(scope='function')
+def post_webhook(client):
+    """Post a GitHub webhook delivery signed with the app secret."""
+    import hashlib
+    import hmac
+    import json
+
+    def _post(event_type, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        signature = 'sha256=' + hmac.new(
+            application.config['SECRET_KEY'].encode('utf-8'), msg=body, digestmod=hashlib.sha256
+        ).hexdigest()
+        request_headers = {'X-GitHub-Event': event_type, 'X-Hub-Signature-256': signature}
+        request_headers.update(headers or {})
+        return client.post('/api/github-webhook', data=body, content_type='application/json',
+                           headers=request_headers)
+
+    return _post
+
+
+@pytest.fixture(scope='function')
+def fake_github(monkeypatch):
+    """Point the app's GitHub client at a local fake server with fast retries."""
+    from application import github
+    from tests.fake_github import FakeGitHub
+
+    server = FakeGitHub().start()
+    monkeypatch.setattr(github, 'api_url', server.url)
+    monkeypatch.setattr(github, 'oauth_url', server.url)
+    monkeypatch.setattr(github, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(github, '_rate_limits', {})
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope='function')
+def logged_in(client, clean_db):
+    """Create a user and log the shared test client in as them."""
+    from application import User
+
+    user = User(github_id='test123', username='tester', access_token='tok')
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['user_github_id'] = 'test123'
+        sess['username'] = 'tester'
+    yield user
+    with client.session_transaction() as sess:
+        sess.clear()
+
+
+@pytest.fixture(scope='function')
+def query_budget(app):
+    """Fail the test when a block runs more SQL than allowed or repeats a statement (N+1).
+
+        with query_budget(3):
+            client.get('/api/goals')
+    """
+    from query_log import query_budget as budget
+
+    def _budget(max_queries, repeat_threshold=5):
+        with app.app_context():
+            engine = db.engine
+        return budget(engine, max_queries, repeat_threshold)
+
+    return _budget
@@ -0,0 +1,84 @@
+"""A tiny local stand-in for the GitHub API used by tests that exercise real HTTP calls."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import json
+import threading
+import time
+
+
+class FakeGitHub:
+    """Serve scripted responses per (method, path) and record every request.
+
+    Responses queued with `add()` are returned in order; the last one repeats.
+    Unscripted routes answer 404 like GitHub does, and a 200 scripted with an
+    ETag header answers 304 to a request carrying that ETag in If-None-Match.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def add(self, method, path, status=200, json_body=None, headers=None, delay=0):
+        self.routes.setdefault((method, path), []).append((status, json_body, headers or {}, delay))
+
+    def calls(self, method=None, path=None):
+        return [r for r in self.requests if (method is None or r['method'] == method)
+                and (path is None or r['path'] == path)]
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                fake.requests.append({
+                    'method': self.command,
+                    'path': parts.path,
+                    'query': parts.query,
+                    'headers': dict(self.headers),
+                    'json': json.loads(body) if body else None,
+                    'client_port': self.client_address[1]
+                })
+                queue = fake.routes.get((self.command, parts.path))
+                if queue:
+                    status, json_body, headers, delay = queue.pop(0) if len(queue) > 1 else queue[0]
+                else:
+                    status, json_body, headers, delay = 404, {'message': 'Not Found'}, {}, 0
+                if delay:
+                    time.sleep(delay)
+                # Conditional requests: a matching If-None-Match gets an empty 304 like GitHub sends
+                etag = headers.get('ETag')
+                if etag and status == 200 and self.headers.get('If-None-Match') == etag:
+                    status, json_body = 304, None
+                payload = b'' if json_body is None else json.dumps(json_body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, str(value))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _respond
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,31 @@
+"""Factories for goals and goal request bodies shared by the test modules."""
+from datetime import datetime, timedelta
+
+from application import Goal, db
+
+
+def goal_payload(repo='owner/repo', condition='#done', **overrides):
+    """A JSON body for POST /api/goals (or one item of /api/goals/bulk)."""
+    payload = {
+        'title': 'Ship it',
+        'details': 'Test goal',
+        'deadline': (datetime.utcnow() + timedelta(days=2)).strftime('%Y-%m-%dT%H:%M'),
+        'repo_url': f'https://github.com/{repo}',
+        'completion_condition': condition
+    }
+    payload.update(overrides)
+    return payload
+
+
+def make_goal(condition='#done', completion_type='commit', repo='owner/repo', **overrides):
+    """Insert an active goal straight into the database and return it; keyword overrides set any column."""
+    repo_owner, repo_name = repo.split('/', 1)
+    values = dict(user_github_id='12345', title='Ship it', details='Test goal',
+                  deadline=datetime.utcnow() + timedelta(days=7), repo_url=f'https://github.com/{repo}',
+                  completion_condition=condition, completion_type=completion_type,
+                  repo_owner=repo_owner, repo_name=repo_name)
+    values.update(overrides)
+    goal = Goal(**values)
+    db.session.add(goal)
+    db.session.commit()
+    return goal
@@ -0,0 +1,85 @@
+import threading
+from datetime import datetime, timedelta
+
+from application import Goal, db, sweep_overdue_goals
+from deadline_sweeper import DeadlineSweeper
+from tests.helpers import make_goal
+
+NOW = datetime(2030, 1, 1, 12, 0)
+
+
+def test_sweep_expires_only_active_goals_past_deadline(clean_db):
+    expired = make_goal(embed_token='expired', deadline=NOW - timedelta(minutes=1)).id
+    due_now = make_goal(embed_token='due-now', deadline=NOW).id
+    upcoming = make_goal(embed_token='upcoming', deadline=NOW + timedelta(hours=2)).id
+    done = make_goal(embed_token='done', deadline=NOW - timedelta(hours=1), status='completed').id
+
+    next_deadline = sweep_overdue_goals(NOW, batch_size=1)
+
+    db.session.expire_all()
+    statuses = {goal_id: db.session.get(Goal, goal_id).status for goal_id in (expired, due_now, upcoming, done)}
+    assert statuses == {expired: 'overdue', due_now: 'overdue', upcoming: 'active', done: 'completed'}
+    assert next_deadline == NOW + timedelta(hours=2)
+
+
+def test_sweep_returns_none_when_nothing_is_pending(clean_db):
+    make_goal(embed_token='expired', deadline=NOW - timedelta(minutes=1))
+    assert sweep_overdue_goals(NOW) is None
+
+
+def test_moving_an_overdue_deadline_forward_reactivates_the_goal(client, logged_in):
+    goal_id = make_goal(user_github_id='test123', embed_token='late',
+                        deadline=datetime.utcnow() - timedelta(minutes=5), status='overdue').id
+
+    response = client.put(f'/api/goals/{goal_id}',
+                          json={'deadline': (datetime.utcnow() + timedelta(days=1)).isoformat()})
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'active'
+
+
+def test_embed_data_reports_swept_goal_as_overdue(client, clean_db):
+    make_goal(embed_token='embed-late', deadline=datetime.utcnow() - timedelta(minutes=1))
+    sweep_overdue_goals()
+
+    data = client.get('/api/embed/embed-late/data').get_json()
+    assert data['status'] == 'overdue'
+    assert data['is_overdue'] is True
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_run_once_drops_passed_wakeups_and_keeps_the_next_deadline():
+    clock = FakeClock(NOW)
+    sweeper = DeadlineSweeper(lambda now: NOW + timedelta(minutes=10), clock=clock)
+    sweeper.schedule(NOW - timedelta(minutes=1))
+
+    assert sweeper.run_once() == NOW + timedelta(minutes=10)
+    assert sweeper.next_wakeup == NOW + timedelta(minutes=10)
+
+
+def test_schedule_wakes_a_sleeping_sweeper_early():
+    swept = threading.Event()
+    calls = []
+
+    def sweep(now):
+        calls.append(now)
+        if len(calls) > 1:
+            swept.set()
+        return None
+
+    sweeper = DeadlineSweeper(sweep, max_sleep=60)
+    sweeper.start()
+    try:
+        # The catch-up sweep runs straight away, then the thread sleeps for max_sleep
+        sweeper.schedule(datetime.utcnow() + timedelta(milliseconds=50))
+        assert swept.wait(5)
+    finally:
+        sweeper.stop(timeout=5)
+    assert not sweeper.running
@@ -0,0 +1,49 @@
+from application import complete_goals
+from tests.helpers import make_goal
+
+
+def test_active_goal_is_briefly_cacheable_with_stable_validators(clean_db, client):
+    make_goal(embed_token='embed-token')
+    first = client.get('/api/embed/embed-token/data')
+    second = client.get('/api/embed/embed-token/data')
+
+    assert first.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['Last-Modified']
+    assert first.headers['Cache-Control'] == 'public, max-age=15, s-maxage=15'
+    assert first.get_json()['server_time_utc'].endswith('Z')
+
+
+def test_matching_etag_returns_304_without_body(clean_db, client):
+    make_goal(embed_token='embed-token')
+    etag = client.get('/api/embed/embed-token/data').headers['ETag']
+
+    response = client.get('/api/embed/embed-token/data', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+
+
+def test_if_modified_since_returns_304(clean_db, client):
+    make_goal(embed_token='embed-token')
+    last_modified = client.get('/api/embed/embed-token/data').headers['Last-Modified']
+
+    response = client.get('/api/embed/embed-token/data', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_completion_changes_validators(clean_db, client):
+    goal = make_goal(embed_token='embed-token')
+    etag = client.get('/api/embed/embed-token/data').headers['ETag']
+
+    complete_goals([goal.id])
+    response = client.get('/api/embed/embed-token/data', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['status'] == 'completed'
+    assert response.headers['Cache-Control'] == 'public, max-age=3600, s-maxage=3600'
+
+
+def test_unknown_token_is_404(clean_db, client):
+    assert client.get('/api/embed/missing/data').status_code == 404
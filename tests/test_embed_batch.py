@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from application import complete_goals, db
+from tests.helpers import make_goal
+
+
+@contextmanager
+def recorded_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_batch_returns_token_keyed_payloads_from_one_query(clean_db, client):
+    make_goal(embed_token='one')
+    make_goal(embed_token='two')
+    single = client.get('/api/embed/one/data').get_json()
+
+    with recorded_statements() as statements:
+        response = client.get('/api/embed/batch?tokens=one,two,missing,one')
+    goal_selects = [sql for sql in statements if 'FROM goal' in sql]
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert set(data) == {'one', 'two', 'missing'}
+    assert data['missing'] is None
+    assert set(data['one']) == set(single)
+    assert data['one']['title'] == single['title']
+    assert len(goal_selects) == 1 and ' IN ' in goal_selects[0]
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+    assert response.headers['Cache-Control'] == 'public, max-age=15, s-maxage=15'
+
+
+def test_combined_etag_changes_when_any_goal_changes(clean_db, client):
+    make_goal(embed_token='one')
+    second_id = make_goal(embed_token='two').id
+    etag = client.get('/api/embed/batch?tokens=one,two').headers['ETag']
+
+    assert client.get('/api/embed/batch?tokens=one,two', headers={'If-None-Match': etag}).status_code == 304
+
+    complete_goals([second_id])
+    response = client.get('/api/embed/batch?tokens=one,two', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['two']['status'] == 'completed'
+
+
+def test_post_form_and_json_bodies(clean_db, client):
+    make_goal(embed_token='one')
+
+    form = client.post('/api/embed/batch', data={'tokens': 'one,nope'})
+    as_json = client.post('/api/embed/batch', json={'tokens': ['one']})
+
+    assert form.status_code == 200 and set(form.get_json()) == {'one', 'nope'}
+    assert as_json.status_code == 200 and list(as_json.get_json()) == ['one']
+    assert 'POST' in form.headers['Access-Control-Allow-Methods']
+
+
+
+def test_cross_origin_json_post_passes_its_preflight(client):
+    response = client.options('/api/embed/batch', headers={
+        'Origin': 'https://blog.example', 'Access-Control-Request-Method': 'POST',
+        'Access-Control-Request-Headers': 'content-type'
+    })
+
+    assert response.status_code == 200
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+    assert 'POST' in response.headers['Access-Control-Allow-Methods']
+    assert 'Content-Type' in response.headers['Access-Control-Allow-Headers']
+
+
+def test_batch_size_is_capped(clean_db, client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'EMBED_BATCH_MAX_TOKENS', 2)
+
+    assert client.get('/api/embed/batch?tokens=a,b,c').status_code == 413
+    assert client.get('/api/embed/batch?tokens=').status_code == 400
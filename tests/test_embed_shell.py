@@ -0,0 +1,49 @@
+import gzip
+
+from application import embed_shells
+from precompressed import PrecompressedAsset
+
+
+def test_shell_is_rendered_once_per_theme_and_shared_by_goals(client):
+    embed_shells.clear()
+    first = client.get('/embed/token-one', headers={'Accept-Encoding': 'identity'})
+    second = client.get('/embed/token-two', headers={'Accept-Encoding': 'identity'})
+    light = client.get('/embed/token-one?theme=light', headers={'Accept-Encoding': 'identity'})
+
+    assert first.status_code == 200
+    assert first.data == second.data
+    assert first.headers['ETag'] == second.headers['ETag'] != light.headers['ETag']
+    assert b'data-theme="dark"' in first.data and b'data-theme="light"' in light.data
+    assert b'token-one' not in first.data
+    assert set(embed_shells) == {'dark', 'light'}
+    assert first.headers['X-Frame-Options'] == 'ALLOWALL'
+    assert 'max-age=86400' in first.headers['Cache-Control']
+
+
+def test_gzip_variant_is_served_when_accepted(client):
+    plain = client.get('/embed/tok', headers={'Accept-Encoding': 'identity'})
+    compressed = client.get('/embed/tok', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+    assert len(compressed.data) < len(plain.data) / 3
+
+
+def test_matching_etag_revalidates_with_304(client):
+    etag = client.get('/embed/tok', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+    response = client.get('/embed/other', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_encoding_choice_respects_q_values():
+    from werkzeug.datastructures import Accept
+    asset = PrecompressedAsset('x' * 1000, 'text/plain')
+
+    assert asset.choose_encoding(Accept([('gzip', 0)])) == 'identity'
+    assert asset.choose_encoding(Accept([('gzip', 1), ('identity', 1)])) == 'gzip'
+    assert PrecompressedAsset('tiny', 'text/plain').choose_encoding(Accept([('gzip', 1)])) == 'identity'
@@ -0,0 +1,104 @@
+import json
+import threading
+import pytest
+from application import Goal, application, complete_goals, db, embed_hub
+from embed_hub import EmbedHub
+from tests.helpers import make_goal
+
+
+@pytest.fixture
+def stream_config(monkeypatch):
+    monkeypatch.setitem(application.config, 'EMBED_LIVE_UPDATES', 'stream')
+    monkeypatch.setitem(application.config, 'EMBED_STREAM_HEARTBEAT', 0.05)
+    monkeypatch.setitem(application.config, 'EMBED_STREAM_RECHECK_INTERVAL', 0.05)
+    monkeypatch.setitem(application.config, 'EMBED_STREAM_MAX_SECONDS', 5)
+    monkeypatch.setitem(application.config, 'EMBED_LONG_POLL_TIMEOUT', 0.2)
+
+
+def next_event(chunks):
+    for chunk in chunks:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith('event:'):
+            lines = dict(line.split(': ', 1) for line in text.strip().splitlines())
+            return lines['event'], json.loads(lines['data'])
+    raise AssertionError('stream ended without an event')
+
+
+def test_stream_pushes_initial_state_and_completion(clean_db, client, stream_config):
+    goal_id = make_goal(embed_token='stream-token').id
+    response = client.get('/api/embed/stream-token/stream', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    event, data = next_event(chunks)
+    assert (event, data['status']) == ('goal', 'active')
+    assert embed_hub.listener_count('stream-token') == 1
+
+    complete_goals([goal_id])
+    event, data = next_event(chunks)
+    assert (event, data['status']) == ('goal', 'completed')
+
+    response.close()
+    assert embed_hub.listener_count('stream-token') == 0
+
+
+def test_stream_reports_deleted_goal(clean_db, client, stream_config):
+    goal_id = make_goal(embed_token='stream-token').id
+    response = client.get('/api/embed/stream-token/stream', buffered=False)
+    chunks = iter(response.response)
+    next_event(chunks)
+
+    db.session.delete(db.session.get(Goal, goal_id))
+    db.session.commit()
+    event, _ = next_event(chunks)
+    assert event == 'deleted'
+
+
+def test_stream_for_unknown_token_is_404(clean_db, client, stream_config):
+    assert client.get('/api/embed/missing/stream').status_code == 404
+
+
+def test_live_updates_are_off_unless_enabled(clean_db, client):
+    make_goal(embed_token='stream-token')
+
+    assert application.config['EMBED_LIVE_UPDATES'] == 'poll'
+    assert client.get('/api/embed/stream-token/stream').status_code == 404
+    assert client.get('/api/embed/stream-token/poll').status_code == 404
+    assert b'data-live-updates="poll"' in client.get('/embed/stream-token').data
+
+
+def test_long_poll_returns_immediately_for_stale_etag_and_304_when_unchanged(clean_db, client, stream_config):
+    make_goal(embed_token='stream-token')
+    first = client.get('/api/embed/stream-token/poll')
+    assert first.status_code == 200
+    etag = first.headers['ETag'].strip('"')
+
+    unchanged = client.get(f'/api/embed/stream-token/poll?etag={etag}')
+    assert unchanged.status_code == 304
+
+
+def test_hub_wakes_all_listeners_of_a_token():
+    hub = EmbedHub()
+    woken = []
+
+    def listen():
+        with hub.listen('token') as listener:
+            ready.wait()
+            woken.append(listener.wait(2))
+
+    ready = threading.Event()
+    threads = [threading.Thread(target=listen) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while hub.listener_count('token') < 3:
+        pass
+    hub.publish('token')
+    hub.publish('other-token')
+    ready.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert woken == [True, True, True]
+    assert hub.listener_count() == 0
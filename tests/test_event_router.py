@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from application import WEBHOOK_EVENT_HANDLERS, application, drain_webhook_queue, process_webhook_event
+from tests.helpers import make_goal
+from tests.test_webhook import statuses
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'github'
+
+
+def fixture(name):
+    return json.loads((FIXTURES / f'{name}.json').read_text())
+
+
+def deliver(post_webhook, event_type, name):
+    assert post_webhook(event_type, fixture(name)).status_code == 202
+    drain_webhook_queue()
+
+
+def test_every_subscribed_event_has_a_handler():
+    assert set(application.config['GITHUB_WEBHOOK_EVENTS']) == set(WEBHOOK_EVENT_HANDLERS)
+
+
+def test_push_completes_commit_goals_only(clean_db, post_webhook):
+    commit_goal = make_goal('#ship-login').id
+    tag_goal = make_goal('#ship-login', completion_type='tag').id
+
+    deliver(post_webhook, 'push', 'push_commits')
+
+    assert statuses(commit_goal, tag_goal) == ['completed', 'active']
+
+
+@pytest.mark.parametrize('event_type, name', [('push', 'push_tag'), ('create', 'create_tag')])
+def test_tag_goals_complete_on_tag_push_or_create(clean_db, post_webhook, event_type, name):
+    tag_goal = make_goal('v1.2.0', completion_type='tag').id
+    other_tag = make_goal('v2.0.0', completion_type='tag').id
+    commit_goal = make_goal('v1.2.0').id
+
+    deliver(post_webhook, event_type, name)
+
+    assert statuses(tag_goal, other_tag, commit_goal) == ['completed', 'active', 'active']
+
+
+def test_branch_creation_does_not_complete_tag_goals(clean_db, post_webhook):
+    tag_goal = make_goal('v1.2.0', completion_type='tag').id
+    deliver(post_webhook, 'create', 'create_branch')
+    assert statuses(tag_goal) == ['active']
+
+
+def test_merged_pull_request_completes_pr_goals(clean_db, post_webhook):
+    with_hash = make_goal('#7', completion_type='pr').id
+    bare = make_goal('7', completion_type='pr').id
+    issue_goal = make_goal('#7', completion_type='issue').id
+    unrelated = make_goal('#8', completion_type='pr').id
+
+    deliver(post_webhook, 'pull_request', 'pull_request_merged')
+
+    assert statuses(with_hash, bare, issue_goal, unrelated) == ['completed', 'completed', 'active', 'active']
+
+
+def test_unmerged_pull_request_is_ignored(clean_db, post_webhook):
+    pr_goal = make_goal('#8', completion_type='pr').id
+    deliver(post_webhook, 'pull_request', 'pull_request_closed_unmerged')
+    assert statuses(pr_goal) == ['active']
+
+
+def test_closed_issue_completes_issue_goals(clean_db, post_webhook):
+    issue_goal = make_goal('#42', completion_type='issue').id
+    pr_goal = make_goal('#42', completion_type='pr').id
+
+    deliver(post_webhook, 'issues', 'issues_closed')
+
+    assert statuses(issue_goal, pr_goal) == ['completed', 'active']
+
+
+def test_unknown_events_are_ignored(clean_db):
+    assert process_webhook_event('star', fixture('create_tag')) == 0
@@ -0,0 +1,128 @@
+import time
+import pytest
+import requests
+from application import application, create_github_webhook, delete_github_webhook, github
+from github_client import GitHubClient, RateLimitDeferred
+
+
+def test_retries_server_errors_with_backoff(fake_github):
+    fake_github.add('GET', '/user', status=502)
+    fake_github.add('GET', '/user', status=503)
+    fake_github.add('GET', '/user', json_body={'id': 1, 'login': 'octocat'})
+
+    response = github.get('/user', token='tok')
+    assert response.status_code == 200
+    assert len(fake_github.calls('GET', '/user')) == 3
+    assert fake_github.calls()[0]['headers']['Authorization'] == 'token tok'
+
+
+def test_gives_up_after_max_retries(fake_github):
+    fake_github.add('GET', '/user', status=500)
+    response = github.get('/user', token='tok')
+    assert response.status_code == 500
+    assert len(fake_github.calls()) == github.max_retries + 1
+
+
+
+def test_post_is_not_repeated_after_a_server_error_or_timeout(fake_github):
+    fake_github.add('POST', '/repos/o/r/hooks', status=502)
+    fake_github.add('POST', '/login/oauth/access_token', json_body={'access_token': 'x'}, delay=1)
+
+    assert create_github_webhook('tok', 'o', 'r', 'http://localhost/api/github-webhook', 'secret') is None
+    with pytest.raises(requests.Timeout):
+        github.post(f'{fake_github.url}/login/oauth/access_token', timeout=(1, 0.2))
+    assert len(fake_github.calls('POST', '/repos/o/r/hooks')) == 1
+    assert len(fake_github.calls('POST', '/login/oauth/access_token')) == 1
+
+
+def test_post_is_retried_when_the_connection_was_never_made():
+    attempts = []
+    client = GitHubClient(api_url='http://127.0.0.1:9', max_retries=2, sleep=lambda seconds: None,
+                          observer=lambda *args: attempts.append(args))
+    with pytest.raises(requests.ConnectionError):
+        client.post('/repos/o/r/hooks', token='tok')
+    assert len(attempts) == 3
+
+
+def test_secondary_rate_limit_honours_short_retry_after(fake_github, monkeypatch):
+    waits = []
+    monkeypatch.setattr(github, 'sleep', waits.append)
+    fake_github.add('POST', '/repos/o/r/hooks', status=403, json_body={'message': 'You have exceeded a secondary rate limit'},
+                    headers={'Retry-After': '2'})
+    fake_github.add('POST', '/repos/o/r/hooks', status=201, json_body={'id': 99})
+
+    assert create_github_webhook('tok', 'o', 'r', 'http://localhost/api/github-webhook', 'secret') == {'id': 99}
+    assert waits == [2.0]
+
+
+def test_long_retry_after_is_returned_to_caller(fake_github):
+    fake_github.add('GET', '/user', status=429, headers={'Retry-After': '3600'})
+    assert github.get('/user', token='tok').status_code == 429
+    assert len(fake_github.calls()) == 1
+
+
+def test_defers_calls_when_token_quota_is_nearly_spent(fake_github):
+    reset_at = int(time.time()) + 600
+    fake_github.add('GET', '/user', json_body={'id': 1, 'login': 'octocat'},
+                    headers={'X-RateLimit-Remaining': '3', 'X-RateLimit-Reset': str(reset_at)})
+
+    assert github.get('/user', token='tok').status_code == 200
+    assert github.rate_limit('tok') == (3, reset_at)
+    with pytest.raises(RateLimitDeferred) as excinfo:
+        github.get('/user', token='tok')
+    assert excinfo.value.reset_at == reset_at
+    # Other tokens have their own budget
+    assert github.get('/user', token='other').status_code == 200
+    assert len(fake_github.calls()) == 2
+
+
+
+def test_anonymous_quota_never_blocks_the_oauth_exchange(fake_github):
+    reset_at = int(time.time()) + 600
+    oauth_url = fake_github.url.replace('127.0.0.1', 'localhost')
+    client = GitHubClient(api_url=fake_github.url, oauth_url=oauth_url, max_retries=0)
+    fake_github.add('GET', '/rate_limit', json_body={}, headers={'X-RateLimit-Remaining': '20',
+                                                                 'X-RateLimit-Reset': str(reset_at)})
+    fake_github.add('POST', '/login/oauth/access_token', json_body={'access_token': 'new-token'},
+                    headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset_at)})
+
+    # Well below the per-token reserve, but token-less calls only keep a small one
+    assert client.get('/rate_limit').status_code == 200
+    assert client.get('/rate_limit').status_code == 200
+    assert client.post(f'{oauth_url}/login/oauth/access_token').status_code == 200
+    assert client.post(f'{oauth_url}/login/oauth/access_token').status_code == 200
+    assert client.rate_limit() == (20, reset_at)
+
+
+def test_read_timeout_is_enforced(fake_github):
+    client = GitHubClient(api_url=fake_github.url, timeout=(1, 0.2), max_retries=0)
+    fake_github.add('GET', '/zen', json_body='slow', delay=1)
+    with pytest.raises(requests.Timeout):
+        client.get('/zen')
+
+
+def test_session_reuses_connections(fake_github):
+    fake_github.add('GET', '/zen', json_body='Keep it logically awesome.')
+    client = GitHubClient(api_url=fake_github.url)
+    for _ in range(5):
+        client.get('/zen')
+    assert len({call['client_port'] for call in fake_github.calls()}) == 1
+
+
+def test_delete_webhook_treats_missing_hook_as_deleted(fake_github):
+    fake_github.add('DELETE', '/repos/o/r/hooks/1', status=204)
+    assert delete_github_webhook('tok', 'o', 'r', '1') is True
+    assert delete_github_webhook('tok', 'o', 'r', '2') is True
+
+
+def test_oauth_callback_uses_client(clean_db, client, fake_github, monkeypatch):
+    monkeypatch.setitem(application.config, 'GITHUB_CLIENT_ID', 'id')
+    monkeypatch.setitem(application.config, 'GITHUB_CLIENT_SECRET', 'secret')
+    fake_github.add('POST', '/login/oauth/access_token', json_body={'access_token': 'new-token'})
+    fake_github.add('GET', '/user', json_body={'id': 42, 'login': 'octocat'})
+
+    response = client.get('/auth/callback?code=abc')
+    assert response.status_code == 302
+    assert fake_github.calls('POST', '/login/oauth/access_token')[0]['json']['code'] == 'abc'
+    with client.session_transaction() as sess:
+        assert sess['username'] == 'octocat'
@@ -0,0 +1,87 @@
+import application as app_module
+from application import Goal, RepoWebhook, db, provision_pending_webhooks
+from tests.helpers import goal_payload
+
+
+def test_bulk_goals_are_queued_for_the_background_provisioner(client, logged_in, fake_github):
+    repos = ['owner/one', 'owner/two', 'owner/three']
+    for index, repo in enumerate(repos):
+        fake_github.add('POST', f'/repos/{repo}/hooks', status=201, json_body={'id': index + 1})
+
+    response = client.post('/api/goals/bulk', json={'goals': [
+        goal_payload(repo, condition=f'#{n}') for repo in repos for n in range(2)
+    ]})
+
+    assert response.status_code == 201
+    results = response.get_json()['results']
+    assert [result['index'] for result in results] == list(range(6))
+    assert all(result['webhook'] == 'pending' for result in results)
+    assert fake_github.calls('POST') == []
+
+    assert provision_pending_webhooks() == 3
+    for repo in repos:
+        assert len(fake_github.calls('POST', f'/repos/{repo}/hooks')) == 1
+    db.session.expire_all()
+    assert Goal.query.count() == 6
+    hook = RepoWebhook.query.filter_by(repo_owner='owner', repo_name='two').first()
+    assert hook.goal_count == 2 and hook.hook_id == '2'
+    assert {(goal.webhook_id, goal.webhook_status) for goal in Goal.query.filter_by(repo_name='two')} == {('2', 'active')}
+
+
+def test_one_invalid_item_rejects_the_whole_batch(client, logged_in, fake_github):
+    response = client.post('/api/goals/bulk', json=[
+        goal_payload(),
+        goal_payload(deadline='yesterday-ish'),
+        goal_payload(repo_url='not-a-url'),
+    ])
+
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['results']] == [1, 2]
+    assert Goal.query.count() == 0
+    assert RepoWebhook.query.count() == 0
+    assert fake_github.calls('POST') == []
+
+
+
+def test_null_fields_are_rejected_with_their_index(client, logged_in):
+    response = client.post('/api/goals/bulk', json=[goal_payload(), goal_payload(title=None),
+                                                    goal_payload(completion_condition='  ')])
+
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['results']] == [1, 2]
+    assert RepoWebhook.query.count() == 0
+
+
+def test_failed_batch_leaves_hook_counts_unchanged(client, logged_in, monkeypatch):
+    client.post('/api/goals', json=goal_payload('owner/a'))
+    # Every goal in the batch gets the same embed token, so the insert fails
+    monkeypatch.setattr(app_module.secrets, 'token_urlsafe', lambda size: 'same-token')
+
+    response = client.post('/api/goals/bulk', json=[goal_payload('owner/a'), goal_payload('owner/a'),
+                                                    goal_payload('owner/b')])
+
+    assert response.status_code == 500
+    db.session.expire_all()
+    assert Goal.query.count() == 1
+    assert [(hook.repo_name, hook.goal_count) for hook in RepoWebhook.query.all()] == [('a', 1)]
+
+
+def test_failed_hook_is_retried_by_the_provisioner(client, logged_in, fake_github):
+    fake_github.add('POST', '/repos/owner/flaky/hooks', status=502)
+    fake_github.add('POST', '/repos/owner/flaky/hooks', status=201, json_body={'id': 9})
+
+    goal = client.post('/api/goals/bulk', json=[goal_payload('owner/flaky')]).get_json()['results'][0]['goal']
+    provision_pending_webhooks()
+    assert db.session.get(Goal, goal['id']).webhook_status == 'pending'
+
+    RepoWebhook.query.update({'provision_after': None})
+    db.session.commit()
+    provision_pending_webhooks()
+    db.session.expire_all()
+    assert (db.session.get(Goal, goal['id']).webhook_status, db.session.get(Goal, goal['id']).webhook_id) == ('active', '9')
+
+
+def test_bulk_create_limits_batch_size(client, logged_in, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'GOALS_BULK_MAX_ITEMS', 2)
+    response = client.post('/api/goals/bulk', json=[goal_payload()] * 3)
+    assert response.status_code == 413
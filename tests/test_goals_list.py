@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from application import Goal, db
+from tests.helpers import make_goal
+
+BASE = datetime(2030, 1, 1, 12, 0)
+
+
+def add_goals(count, user='test123', **overrides):
+    for index in range(count):
+        values = dict(condition=f'#{index}', user_github_id=user, title=f'Goal {index}',
+                      deadline=BASE + timedelta(hours=index // 2), embed_token=f'{user}-{index}')
+        values.update(overrides)
+        make_goal(**values)
+
+
+def fetch_all(client, query=''):
+    pages, url = [], f'/api/goals?{query}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/goals?{query}&cursor={cursor}' if cursor else None
+    return pages
+
+
+def test_pages_cover_every_goal_once_in_deadline_order(client, logged_in):
+    add_goals(7)
+    add_goals(2, user='someone-else')
+
+    pages = fetch_all(client, 'limit=3')
+    assert [len(page) for page in pages] == [3, 3, 1]
+    goals = [goal for page in pages for goal in page]
+    assert len({goal['id'] for goal in goals}) == 7
+    assert [(goal['deadline'], goal['id']) for goal in goals] == sorted((goal['deadline'], goal['id']) for goal in goals)
+    assert all(goal['user_github_id'] == 'test123' for goal in goals)
+
+
+def test_full_goal_shape_matches_to_dict(client, logged_in):
+    add_goals(1)
+    listed = client.get('/api/goals').get_json()[0]
+    assert listed == db.session.get(Goal, listed['id']).to_dict()
+
+
+def test_link_header_keeps_filters(client, logged_in):
+    add_goals(3)
+    response = client.get('/api/goals?limit=2&status=active')
+    assert 'status=active' in response.headers['Link']
+    assert 'rel="next"' in response.headers['Link']
+
+
+def test_status_and_completion_type_filters(client, logged_in):
+    add_goals(2)
+    add_goals(1, status='completed', embed_token='done-1')
+    add_goals(1, completion_type='issue', embed_token='issue-1')
+
+    assert len(client.get('/api/goals?status=completed').get_json()) == 1
+    assert len(client.get('/api/goals?completion_type=issue').get_json()) == 1
+    assert len(client.get('/api/goals?status=active&completion_type=commit').get_json()) == 2
+
+
+def test_fields_projection(client, logged_in):
+    add_goals(1)
+    goal = client.get('/api/goals?fields=id,title,embed_url').get_json()[0]
+    assert set(goal) == {'id', 'title', 'embed_url'}
+    assert goal['embed_url'].endswith('/embed/test123-0')
+
+    assert client.get('/api/goals?fields=id,access_token').status_code == 400
+
+
+def test_weak_etag_revalidates_unchanged_page(client, logged_in):
+    add_goals(2)
+    first = client.get('/api/goals')
+    assert first.headers['ETag'].startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    cached = client.get('/api/goals', headers={'If-None-Match': first.headers['ETag']})
+    assert cached.status_code == 304
+
+    add_goals(1, embed_token='late-1')
+    assert client.get('/api/goals', headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+
+
+def test_bad_cursor_and_limit_are_rejected(client, logged_in):
+    assert client.get('/api/goals?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/goals?limit=abc').status_code == 400
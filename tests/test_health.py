@@ -0,0 +1,79 @@
+import pytest
+
+from application import health_monitor
+from health import HealthMonitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def monitor_reset():
+    health_monitor.clear()
+    yield health_monitor
+    health_monitor.clear()
+
+
+def test_liveness_does_no_io(client, fake_github, monitor_reset):
+    response = client.get('/api/health/live')
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'alive'
+    assert fake_github.requests == []
+
+
+def test_readiness_is_served_from_cached_probes(client, fake_github, monitor_reset):
+    fake_github.add('GET', '/rate_limit', json_body={'resources': {}})
+
+    first = client.get('/api/health/ready')
+    second = client.get('/api/health/ready')
+
+    assert first.status_code == second.status_code == 200
+    data = second.get_json()
+    assert data['status'] == 'healthy'
+    assert set(data['checks']) == {'database', 'github_api'}
+    assert data['checks']['github_api']['latency_ms'] >= 0
+    assert data['checks']['database']['age_seconds'] >= 0
+    assert len(fake_github.calls('GET', '/rate_limit')) == 1
+
+
+def test_github_outage_degrades_without_failing_readiness(client, fake_github, monitor_reset):
+    fake_github.add('GET', '/rate_limit', status=503)
+
+    response = client.get('/api/health')
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'degraded'
+    assert response.get_json()['checks']['github_api']['status'] == 'unhealthy'
+
+
+def test_critical_failures_and_stale_results_are_not_ready():
+    clock = FakeClock()
+    monitor = HealthMonitor(max_age=30, clock=clock)
+    state = {'up': True}
+
+    def database():
+        if not state['up']:
+            raise ConnectionError('connection refused')
+        return 'ok'
+
+    monitor.register('database', database)
+    assert monitor.report()[0] is False and monitor.is_stale()
+
+    monitor.refresh()
+    assert monitor.report()[:2] == (True, 'healthy')
+
+    clock.now += 31
+    ready, status, checks = monitor.report()
+    assert (ready, checks['database']['status'], checks['database']['age_seconds']) == (False, 'stale', 31)
+
+    state['up'] = False
+    monitor.refresh()
+    ready, status, checks = monitor.report()
+    assert (ready, status) == (False, 'unhealthy')
+    assert checks['database']['detail'] == 'connection refused'
@@ -0,0 +1,68 @@
+import random
+import string
+from application import goal_matchers, drain_webhook_queue
+from matcher import AhoCorasick, MatcherCache, SubstringMatcher, compile_matcher
+from tests.helpers import make_goal
+
+
+def naive(patterns, texts):
+    return {value for pattern, value in patterns if any(pattern in text for text in texts)}
+
+
+def test_automaton_handles_overlapping_and_nested_patterns():
+    patterns = [('he', 1), ('she', 2), ('his', 3), ('hers', 4), ('', 5)]
+    automaton = AhoCorasick(patterns)
+    assert automaton.search('ushers') == {1, 2, 4, 5}
+    assert automaton.search('') == {5}
+    assert automaton.search_all(['xx', 'this']) == {3, 5}
+
+
+def test_automaton_agrees_with_naive_substring_checks():
+    rng = random.Random(7)
+    alphabet = 'ab#c '
+    for _ in range(200):
+        patterns = [(''.join(rng.choices(alphabet, k=rng.randint(1, 4))), index) for index in range(rng.randint(1, 12))]
+        texts = [''.join(rng.choices(alphabet, k=rng.randint(0, 30))) for _ in range(rng.randint(1, 5))]
+        assert AhoCorasick(patterns).search_all(texts) == naive(patterns, texts)
+
+
+def test_compile_matcher_picks_implementation_by_pattern_count():
+    few = [(string.ascii_lowercase[i], i) for i in range(3)]
+    many = [(f'#{i}', i) for i in range(60)]
+    assert isinstance(compile_matcher(few), SubstringMatcher)
+    assert isinstance(compile_matcher(many), AhoCorasick)
+    assert compile_matcher(many).search_all(['closes #42']) == {4, 42}
+
+
+def test_cache_evicts_least_recently_used_and_rebuilds_on_new_signature():
+    cache = MatcherCache(maxsize=2)
+    builds = []
+
+    def build(name):
+        builds.append(name)
+        return name
+
+    cache.get('a', (1,), lambda: build('a'))
+    cache.get('b', (1,), lambda: build('b'))
+    cache.get('a', (1,), lambda: build('a'))
+    cache.get('c', (1,), lambda: build('c'))
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+
+    assert cache.get('a', (2,), lambda: build('a2')) == 'a2'
+    assert builds == ['a', 'b', 'c', 'a2']
+    assert cache.hits == 1
+
+
+def test_goal_changes_invalidate_repo_matcher(clean_db, client, post_webhook):
+    goal_matchers.clear()
+    goal = make_goal('#ship')
+
+    post_webhook('push', {'repository': {'full_name': 'owner/repo'}, 'commits': [{'message': 'wip'}]})
+    drain_webhook_queue()
+    assert ('owner', 'repo', 'commit') in goal_matchers
+
+    with client.session_transaction() as sess:
+        sess['user_github_id'] = '12345'
+    response = client.put(f'/api/goals/{goal.id}', json={'completion_condition': '#shipped'})
+    assert response.status_code == 200
+    assert ('owner', 'repo', 'commit') not in goal_matchers
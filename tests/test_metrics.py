@@ -0,0 +1,93 @@
+from application import drain_webhook_queue, github
+from metrics import MetricsRegistry, SQLiteMetricsStore
+from tests.helpers import make_goal
+
+
+def sample(client, name):
+    """Current value of one exposed sample (0 when it has not been recorded yet)."""
+    for line in client.get('/metrics').get_data(as_text=True).splitlines():
+        if line.startswith(name + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram('job_seconds', 'Job latency.', ['kind'], buckets=(0.1, 1))
+    runs = registry.counter('job_runs', 'Jobs run.', ['kind'])
+
+    latency.observe(0.05, kind='a')
+    latency.observe(0.5, kind='a')
+    runs.inc(kind='a "quoted"')
+
+    text = registry.render()
+    assert '# TYPE job_seconds histogram' in text
+    assert 'job_seconds_bucket{kind="a",le="0.1"} 1.0' in text
+    assert 'job_seconds_bucket{kind="a",le="1.0"} 2.0' in text
+    assert 'job_seconds_bucket{kind="a",le="+Inf"} 2.0' in text
+    assert 'job_seconds_count{kind="a"} 2.0' in text
+    assert 'job_runs_total{kind="a \\"quoted\\""} 1.0' in text
+
+
+def test_sqlite_store_sums_every_worker(tmp_path):
+    path = str(tmp_path / 'metrics.sqlite3')
+    workers = [MetricsRegistry(SQLiteMetricsStore(path)) for _ in range(2)]
+    counters = [worker.counter('deliveries', 'Deliveries.') for worker in workers]
+
+    counters[0].inc(3)
+    counters[1].inc(2)
+    workers[1].flush()
+
+    assert 'deliveries_total 5.0' in workers[0].render()
+    counters[1].inc()
+    assert 'deliveries_total 6.0' in workers[1].render()
+
+
+
+def test_rows_of_exited_workers_are_folded_into_one_retired_instance(tmp_path):
+    store = SQLiteMetricsStore(str(tmp_path / 'metrics.sqlite3'))
+    live = MetricsRegistry(store)
+    # Two restarted workers whose processes are gone (no such pid)
+    store.write('99999999-a', {('deliveries_total', ()): 3})
+    store.write('99999998-b', {('deliveries_total', ()): 2})
+    live.counter('deliveries', 'Deliveries.').inc()
+
+    assert 'deliveries_total 6.0' in live.render()
+    instances = store._connect().execute('SELECT DISTINCT instance FROM metric_sample ORDER BY instance').fetchall()
+    assert instances == sorted([(live.instance,), ('retired',)])
+
+    store.write('99999997-c', {('deliveries_total', ()): 4})
+    assert store.retire_exited() == 1
+    assert store.totals()[('deliveries_total', ())] == 10
+
+
+def test_requests_are_timed_per_route_with_their_queries(clean_db, client):
+    before = sample(client, 'http_request_duration_seconds_count{method="GET",endpoint="embed_data"}')
+    client.get('/api/embed/nope/data')
+
+    assert sample(client, 'http_request_duration_seconds_count{method="GET",endpoint="embed_data"}') == before + 1
+    assert sample(client, 'http_requests_total{method="GET",endpoint="embed_data",status="404"}') >= 1
+    assert sample(client, 'http_request_db_queries_sum{endpoint="embed_data"}') >= 1
+    assert client.get('/metrics').content_type.startswith('text/plain; version=0.0.4')
+
+
+def test_github_calls_are_labelled_by_path_template(client, fake_github):
+    fake_github.add('DELETE', '/repos/owner/repo/hooks/42', status=204)
+    name = 'github_api_requests_total{method="DELETE",path="/repos/{owner}/{repo}/hooks/{id}",status="204"}'
+    before = sample(client, name)
+
+    github.delete('/repos/owner/repo/hooks/42', token='tok')
+
+    assert sample(client, name) == before + 1
+
+
+def test_webhook_processing_and_completions_are_counted(clean_db, client, post_webhook):
+    make_goal('#ship')
+    processed = 'webhook_processing_seconds_count{event="push",outcome="done"}'
+    completed = 'webhook_goals_completed_total{completion_type="commit"}'
+    before = sample(client, processed), sample(client, completed)
+
+    post_webhook('push', {'repository': {'full_name': 'owner/repo'}, 'commits': [{'message': 'Done #ship'}]})
+    drain_webhook_queue()
+
+    assert (sample(client, processed), sample(client, completed)) == (before[0] + 1, before[1] + 1)
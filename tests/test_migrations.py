@@ -0,0 +1,82 @@
+import os
+
+from sqlalchemy import create_engine, inspect, text
+
+from application import application, db
+from migration_runner import MigrationRunner, load_migrations
+
+MIGRATIONS_DIR = os.path.join(application.root_path, 'migrations')
+
+# The goal table as it looked before title/details, deadline_display and the provisioning columns
+LEGACY_SCHEMA = [
+    'CREATE TABLE user (id INTEGER PRIMARY KEY, github_id VARCHAR(100) UNIQUE NOT NULL, '
+    'username VARCHAR(100) NOT NULL, access_token VARCHAR(200))',
+    'CREATE TABLE goal (id INTEGER PRIMARY KEY, user_github_id VARCHAR(100) NOT NULL, description TEXT, '
+    'deadline DATETIME NOT NULL, repo_url VARCHAR(200) NOT NULL, completion_condition VARCHAR(200) NOT NULL, '
+    "completion_type VARCHAR(20) NOT NULL DEFAULT 'commit', status VARCHAR(20) DEFAULT 'active', "
+    'created_at DATETIME, completed_at DATETIME, embed_token VARCHAR(64), repo_owner VARCHAR(100), '
+    'repo_name VARCHAR(100), webhook_id INTEGER)',
+    'CREATE TABLE repo_webhook (id INTEGER PRIMARY KEY, repo_owner VARCHAR(100) NOT NULL, '
+    'repo_name VARCHAR(100) NOT NULL, hook_id INTEGER, owner_github_id VARCHAR(100), '
+    'ref_count INTEGER NOT NULL DEFAULT 0, created_at DATETIME)',
+]
+
+
+def make_runner(tmp_path, batch_size=1000):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    messages = []
+    runner = MigrationRunner(engine, load_migrations(MIGRATIONS_DIR), db.metadata,
+                             batch_size=batch_size, echo=messages.append)
+    return engine, runner, messages
+
+
+def test_fresh_database_is_created_and_versioned(tmp_path):
+    engine, runner, _ = make_runner(tmp_path)
+
+    done = runner.run()
+
+    assert [migration.version for migration in done] == [m.version for m in runner.migrations]
+    assert set(runner.applied()) == {m.version for m in runner.migrations}
+    assert {table.name for table in db.metadata.sorted_tables} <= set(inspect(engine).get_table_names())
+    assert runner.run() == [] and runner.pending() == []
+
+
+def test_legacy_database_is_upgraded_with_a_batched_backfill(tmp_path):
+    engine, runner, messages = make_runner(tmp_path, batch_size=2)
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        for index in range(5):
+            connection.execute(text(
+                "INSERT INTO goal (user_github_id, description, deadline, repo_url, completion_condition) "
+                f"VALUES ('u', 'old', '2030-01-0{index + 1} 09:30:00', 'https://github.com/o/r', '#x')"
+            ))
+
+    runner.run()
+
+    columns = {column['name'] for column in inspect(engine).get_columns('goal')}
+    assert {'title', 'details', 'deadline_display', 'webhook_status'} <= columns
+    assert 'description' not in columns
+    assert 'ix_goal_status_deadline' in {index['name'] for index in inspect(engine).get_indexes('goal')}
+    assert 'provision_attempts' in {column['name'] for column in inspect(engine).get_columns('repo_webhook')}
+    with engine.connect() as connection:
+        displays = connection.execute(text('SELECT deadline_display FROM goal ORDER BY id')).scalars().all()
+    assert displays == [f'0{day}/01/2030 09:30' for day in range(1, 6)]
+    assert "  backfilled 5 row(s) of 'goal' in batches of 2" in messages
+
+
+def test_run_stops_at_the_target_version(tmp_path):
+    _, runner, _ = make_runner(tmp_path)
+
+    runner.run(target=2)
+
+    assert set(runner.applied()) == {1, 2}
+    assert [migration.version for migration in runner.pending()][0] == 3
+
+
+def test_cli_reports_status_and_the_endpoint_is_gone(client):
+    result = application.test_cli_runner().invoke(args=['migrate-schema', '--status'])
+
+    assert result.exit_code == 0
+    assert '0001 baseline' in result.output and 'pending' in result.output
+    assert client.post('/api/migrate/schema').status_code == 404
@@ -0,0 +1,71 @@
+import pytest
+
+from query_log import QueryBudgetExceeded, QueryLog, normalize_statement
+from tests.helpers import goal_payload
+
+
+def make_goals(client, count):
+    return [client.post('/api/goals', json=goal_payload(condition=f'#{n}')).get_json()
+            for n in range(count)]
+
+
+def test_in_lists_of_any_length_normalize_to_one_statement():
+    assert normalize_statement('SELECT * FROM goal\n  WHERE id IN (?, ?, ?)') == \
+        normalize_statement('SELECT * FROM goal WHERE id IN (?)')
+
+
+def test_repeated_statements_are_reported_as_n_plus_one():
+    log = QueryLog()
+    log.record('SELECT * FROM goal', 0.001)
+    for goal_id in range(4):
+        log.record('SELECT * FROM user WHERE user.id = ?', 0.001)
+
+    assert log.repeated(4) == [('SELECT * FROM user WHERE user.id = ?', 4)]
+    assert log.summary() == '5 queries, 5.0 ms'
+    with pytest.raises(QueryBudgetExceeded, match='Possible N\\+1'):
+        log.check(max_queries=10, repeat_threshold=4)
+    with pytest.raises(QueryBudgetExceeded, match='at most 3 queries'):
+        log.check(max_queries=3)
+
+
+# (method, url, body, max queries); {id} and {token} are filled from a goal created for the test
+ENDPOINT_BUDGETS = [
+    ('GET', '/api/goals', None, 1),
+    ('POST', '/api/goals', goal_payload(condition='#budget'), 5),
+    ('PUT', '/api/goals/{id}', {'title': 'Renamed'}, 3),
+    ('DELETE', '/api/goals/{id}', None, 6),
+    ('GET', '/api/embed/{token}/data', None, 1),
+    ('GET', '/api/embed/batch?tokens={token},missing', None, 1),
+]
+
+
+@pytest.mark.parametrize('method,url,body,max_queries', ENDPOINT_BUDGETS)
+def test_endpoint_query_budgets(client, logged_in, query_budget, method, url, body, max_queries):
+    goal = make_goals(client, 3)[0]
+    url = url.format(id=goal['id'], token=goal['embed_url'].rstrip('/').rsplit('/', 1)[-1])
+
+    with query_budget(max_queries):
+        response = client.open(url, method=method, json=body)
+
+    assert response.status_code < 400
+
+
+def test_bulk_create_reads_do_not_grow_with_the_batch(client, logged_in, query_budget):
+    selects = []
+    for size in (2, 20):
+        # One INSERT per goal is expected; every other statement is a fixed cost
+        with query_budget(11 + size, repeat_threshold=None) as log:
+            response = client.post('/api/goals/bulk', json=[goal_payload(f'owner/repo{size}', f'#{n}') for n in range(size)])
+        assert response.status_code == 201
+        selects.append(len([sql for sql, _ in log.statements if sql.startswith('SELECT')]))
+
+    assert selects[0] == selects[1]
+
+
+def test_debug_mode_summarizes_queries_in_headers(client, logged_in, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'SQL_QUERY_DEBUG', True)
+
+    response = client.get('/api/goals')
+
+    assert response.headers['X-SQL-Queries'].startswith('1 queries, ')
+    assert response.headers['Server-Timing'].startswith('db;dur=')
@@ -0,0 +1,38 @@
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from application import Goal, active_goals_query, db
+
+
+def compiled_sql(query, dialect):
+    return str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+
+def test_sqlite_dispatch_lookup_uses_composite_index(clean_db):
+    query = active_goals_query('owner', 'repo', 'commit')
+    plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + compiled_sql(query, db.engine.dialect))).fetchall()
+    details = ' '.join(str(row[-1]) for row in plan)
+    assert 'ix_goal_repo_dispatch' in details
+    assert 'SCAN goal' not in details
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'), reason='TEST_POSTGRES_URL not set')
+def test_postgres_dispatch_lookup_uses_composite_index(app):
+    engine = create_engine(os.environ['TEST_POSTGRES_URL'])
+    with app.app_context():
+        query = active_goals_query('owner', 'repo', 'commit')
+        sql = compiled_sql(query, engine.dialect)
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            # Work in a throwaway schema so an existing goal table is never touched
+            conn.execute(text('CREATE SCHEMA IF NOT EXISTS gitdone_plan_test'))
+            conn.execute(text('SET LOCAL search_path TO gitdone_plan_test'))
+            Goal.__table__.create(conn, checkfirst=True)
+            # The table is empty, so forbid sequential scans to see which index the planner picks
+            conn.execute(text('SET LOCAL enable_seqscan = off'))
+            plan = conn.execute(text('EXPLAIN ' + sql)).fetchall()
+        finally:
+            trans.rollback()
+    details = ' '.join(row[0] for row in plan)
+    assert 'ix_goal_repo_dispatch' in details
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+from application import Goal, RepoPollState, User, application, db, reconcile_goals
+from tests.helpers import make_goal
+
+CREATED = datetime(2030, 1, 1, 12, 0)
+LATER = '2030-01-01T13:00:00Z'
+EARLIER = '2030-01-01T11:00:00Z'
+
+
+def add_goal(completion_type, condition, repo='repo', webhook_status='failed', webhook_id=None):
+    return make_goal(condition, completion_type, repo=f'owner/{repo}', user_github_id='u1',
+                     deadline=CREATED + timedelta(days=7), created_at=CREATED,
+                     webhook_status=webhook_status, webhook_id=webhook_id).id
+
+
+def status_of(goal_id):
+    db.session.expire_all()
+    return db.session.get(Goal, goal_id).status
+
+
+def allow_next_poll():
+    RepoPollState.query.update({'polled_at': None})
+    db.session.commit()
+
+
+def test_polling_completes_each_kind_of_goal_once_per_repo(clean_db, fake_github):
+    db.session.add(User(github_id='u1', username='one', access_token='tok1'))
+    commit_goal = add_goal('commit', 'fix #12')
+    early_commit_goal = add_goal('commit', 'old work')
+    issue_goal = add_goal('issue', '#7')
+    pr_goal = add_goal('pr', '3')
+    tag_goal = add_goal('tag', 'v1.0')
+    hooked_goal = add_goal('commit', 'fix #12', webhook_status='active', webhook_id='9')
+
+    fake_github.add('GET', '/repos/owner/repo/commits', json_body=[
+        {'commit': {'message': 'fix #12: the bug', 'committer': {'date': LATER}}},
+        {'commit': {'message': 'old work', 'committer': {'date': EARLIER}}},
+    ])
+    fake_github.add('GET', '/repos/owner/repo/issues', json_body=[
+        {'number': 7, 'closed_at': LATER},
+        {'number': 3, 'closed_at': LATER, 'pull_request': {}},
+    ])
+    fake_github.add('GET', '/repos/owner/repo/pulls', json_body=[{'number': 3, 'merged_at': LATER}])
+    fake_github.add('GET', '/repos/owner/repo/tags', json_body=[{'name': 'v1.0'}])
+
+    assert reconcile_goals() == 1
+
+    assert [status_of(goal_id) for goal_id in (commit_goal, issue_goal, pr_goal, tag_goal)] == ['completed'] * 4
+    assert status_of(early_commit_goal) == 'active'
+    assert status_of(hooked_goal) == 'active'
+    assert len(fake_github.calls('GET')) == 4
+    assert 'since=2030-01-01T12' in fake_github.calls('GET', '/repos/owner/repo/commits')[0]['query']
+
+
+def test_unchanged_listings_are_revalidated_with_etags(clean_db, fake_github):
+    db.session.add(User(github_id='u1', username='one', access_token='tok1'))
+    goal_id = add_goal('commit', 'ship it', webhook_status=None)
+    fake_github.add('GET', '/repos/owner/repo/commits', json_body=[], headers={'ETag': '"abc"'})
+
+    reconcile_goals()
+    allow_next_poll()
+    reconcile_goals()
+
+    first, second = fake_github.calls('GET', '/repos/owner/repo/commits')
+    assert 'If-None-Match' not in first['headers']
+    assert second['headers']['If-None-Match'] == '"abc"'
+    assert status_of(goal_id) == 'active'
+    assert RepoPollState.query.one().etags == '{"/repos/owner/repo/commits?per_page=100&since=2030-01-01T12:00:00Z": "\\"abc\\""}'
+
+
+def test_recently_polled_repos_are_skipped(clean_db, fake_github):
+    db.session.add(User(github_id='u1', username='one', access_token='tok1'))
+    add_goal('tag', 'v2')
+    fake_github.add('GET', '/repos/owner/repo/tags', json_body=[])
+
+    assert reconcile_goals() == 1
+    assert reconcile_goals() == 0
+    assert len(fake_github.calls('GET')) == 1
+
+
+def test_failed_requests_are_recorded_and_retried_next_round(clean_db, fake_github):
+    db.session.add(User(github_id='u1', username='one', access_token='tok1'))
+    goal_id = add_goal('tag', 'v2')
+    fake_github.add('GET', '/repos/owner/repo/tags', status=404, json_body={'message': 'Not Found'})
+    fake_github.add('GET', '/repos/owner/repo/tags', json_body=[{'name': 'v2'}])
+
+    reconcile_goals()
+    assert 'HTTP 404' in RepoPollState.query.one().last_error
+    allow_next_poll()
+    reconcile_goals()
+    assert status_of(goal_id) == 'completed'
+
+
+def test_reconcile_cli_command(clean_db, fake_github):
+    db.session.add(User(github_id='u1', username='one', access_token='tok1'))
+    add_goal('tag', 'v2', repo='other')
+    fake_github.add('GET', '/repos/owner/other/tags', json_body=[])
+
+    result = application.test_cli_runner().invoke(args=['reconcile-goals'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Polled 1 repo(s)' in result.output
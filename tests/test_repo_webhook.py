@@ -0,0 +1,143 @@
+import time
+from datetime import datetime, timedelta
+from application import Goal, RepoWebhook, User, application, db, github, provision_pending_webhooks
+from tests.helpers import goal_payload, make_goal
+
+
+def repo_hook(repo_owner='owner', repo_name='repo'):
+    db.session.expire_all()
+    return RepoWebhook.query.filter_by(repo_owner=repo_owner, repo_name=repo_name).first()
+
+
+def test_goals_on_one_repo_share_a_single_webhook(client, logged_in, fake_github):
+    fake_github.add('POST', '/repos/owner/repo/hooks', status=201, json_body={'id': 77})
+    fake_github.add('DELETE', '/repos/owner/repo/hooks/77', status=204)
+
+    first = client.post('/api/goals', json=goal_payload()).get_json()
+    second = client.post('/api/goals', json=goal_payload(condition='#again')).get_json()
+    assert (first['webhook_status'], second['webhook_status']) == ('pending', 'pending')
+    assert provision_pending_webhooks() == 1
+
+    assert len(fake_github.calls('POST', '/repos/owner/repo/hooks')) == 1
+    assert repo_hook().hook_id == '77'
+    assert repo_hook().goal_count == 2
+    assert db.session.get(Goal, second['id']).webhook_id == '77'
+    assert {goal.webhook_status for goal in Goal.query.all()} == {'active'}
+
+    assert client.delete(f"/api/goals/{first['id']}").status_code == 200
+    assert repo_hook().goal_count == 1
+    assert fake_github.calls('DELETE') == []
+
+    assert client.delete(f"/api/goals/{second['id']}").status_code == 200
+    assert repo_hook() is None
+    assert len(fake_github.calls('DELETE', '/repos/owner/repo/hooks/77')) == 1
+
+
+
+def test_legacy_goals_are_counted_when_the_shared_record_is_created(client, logged_in, fake_github):
+    fake_github.add('DELETE', '/repos/owner/repo/hooks/11', status=204)
+    legacy = client.post('/api/goals', json=goal_payload()).get_json()
+    # A goal from before shared hooks: its own hook and no repo record
+    RepoWebhook.query.delete()
+    Goal.query.filter_by(id=legacy['id']).update({'webhook_id': '11', 'webhook_status': 'active'})
+    db.session.commit()
+
+    current = client.post('/api/goals', json=goal_payload(condition='#again')).get_json()
+    assert (repo_hook().hook_id, repo_hook().goal_count) == ('11', 2)
+    assert provision_pending_webhooks() == 1
+    assert fake_github.calls('POST', '/repos/owner/repo/hooks') == []
+    assert db.session.get(Goal, current['id']).webhook_id == '11'
+
+    assert client.delete(f"/api/goals/{legacy['id']}").status_code == 200
+    assert repo_hook().goal_count == 1
+    assert fake_github.calls('DELETE') == []
+
+    assert client.delete(f"/api/goals/{current['id']}").status_code == 200
+    assert len(fake_github.calls('DELETE', '/repos/owner/repo/hooks/11')) == 1
+
+
+def test_failed_hook_creation_is_retried_after_a_backoff(client, logged_in, fake_github):
+    fake_github.add('POST', '/repos/owner/repo/hooks', status=422, json_body={'message': 'Validation Failed'})
+    fake_github.add('POST', '/repos/owner/repo/hooks', status=201, json_body={'id': 5})
+
+    client.post('/api/goals', json=goal_payload())
+    client.post('/api/goals', json=goal_payload())
+    assert provision_pending_webhooks() == 1
+    assert repo_hook().hook_id is None
+    assert repo_hook().provision_attempts == 1
+    # Still backing off
+    assert provision_pending_webhooks() == 0
+
+    RepoWebhook.query.update({'provision_after': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    assert provision_pending_webhooks() == 1
+    assert repo_hook().hook_id == '5'
+    assert repo_hook().goal_count == 2
+    assert repo_hook().provision_attempts == 0
+    assert {goal.webhook_status for goal in Goal.query.all()} == {'active'}
+
+
+def test_goals_are_marked_failed_after_the_last_attempt(client, logged_in, fake_github, monkeypatch):
+    monkeypatch.setitem(application.config, 'WEBHOOK_PROVISION_MAX_ATTEMPTS', 1)
+    fake_github.add('POST', '/repos/owner/repo/hooks', status=404, json_body={'message': 'Not Found'})
+
+    goal = client.post('/api/goals', json=goal_payload()).get_json()
+    provision_pending_webhooks()
+
+    assert db.session.get(Goal, goal['id']).webhook_status == 'failed'
+    assert 'refused' in repo_hook().provision_error
+    assert provision_pending_webhooks() == 0
+
+
+
+def test_a_later_hook_recovers_goals_marked_failed(client, logged_in, fake_github, monkeypatch):
+    monkeypatch.setitem(application.config, 'WEBHOOK_PROVISION_MAX_ATTEMPTS', 1)
+    fake_github.add('POST', '/repos/owner/repo/hooks', status=404, json_body={'message': 'Not Found'})
+    fake_github.add('POST', '/repos/owner/repo/hooks', status=201, json_body={'id': 8})
+    failed = client.post('/api/goals', json=goal_payload()).get_json()
+    provision_pending_webhooks()
+
+    later = client.post('/api/goals', json=goal_payload(condition='#later')).get_json()
+    provision_pending_webhooks()
+
+    db.session.expire_all()
+    assert [(goal.webhook_status, goal.webhook_id) for goal in
+            (db.session.get(Goal, failed['id']), db.session.get(Goal, later['id']))] == [('active', '8')] * 2
+
+
+def test_rate_limited_provisioning_waits_for_the_reset_without_using_an_attempt(client, logged_in, fake_github):
+    reset_at = int(time.time()) + 3600
+    fake_github.add('GET', '/user', json_body={}, headers={'X-RateLimit-Remaining': '1',
+                                                           'X-RateLimit-Reset': str(reset_at)})
+    github.get('/user', token='tok')
+    goal = client.post('/api/goals', json=goal_payload()).get_json()
+
+    assert provision_pending_webhooks() == 1
+
+    assert fake_github.calls('POST') == []
+    assert (repo_hook().provision_attempts, repo_hook().provision_after) == (0, datetime.utcfromtimestamp(reset_at))
+    assert db.session.get(Goal, goal['id']).webhook_status == 'pending'
+
+
+def test_goal_creation_does_not_wait_for_github(client, logged_in, fake_github):
+    fake_github.add('POST', '/repos/owner/repo/hooks', status=201, json_body={'id': 1}, delay=2)
+
+    response = client.post('/api/goals', json=goal_payload())
+
+    assert response.status_code == 201
+    assert fake_github.calls('POST') == []
+
+
+def test_consolidate_webhooks_keeps_one_hook_per_repo(clean_db, fake_github):
+    db.session.add(User(github_id='u1', username='one', access_token='tok1'))
+    for index, hook_id in enumerate(['10', '11', '12']):
+        make_goal(f'#{index}', user_github_id='u1', webhook_id=hook_id)
+    fake_github.add('DELETE', '/repos/owner/repo/hooks/11', status=204)
+    fake_github.add('DELETE', '/repos/owner/repo/hooks/12', status=204)
+
+    result = application.test_cli_runner().invoke(args=['consolidate-webhooks'])
+
+    assert result.exit_code == 0, result.output
+    assert 'removed 2 duplicate hook(s)' in result.output
+    assert (repo_hook().hook_id, repo_hook().goal_count) == ('10', 3)
+    assert {goal.webhook_id for goal in Goal.query.all()} == {'10'}
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+import application as app_module
+from application import GOAL_FIELD_COLUMNS, Goal, db, json_response, serialize_goal_rows
+
+
+def project(fields):
+    column_names = sorted({name for field in fields for name in GOAL_FIELD_COLUMNS[field]} | {'id', 'deadline'})
+    rows = db.session.query(*(getattr(Goal, name) for name in column_names)).order_by(Goal.id).all()
+    return rows, column_names
+
+
+def test_bulk_serializer_matches_to_dict(clean_db):
+    now = datetime(2030, 5, 6, 7, 8, 9, 123456)
+    db.session.add_all([
+        Goal(user_github_id='u', title='With display', details='d', deadline=now, deadline_display='06/05/2030 07:08',
+             repo_url='https://github.com/o/r', completion_condition='#a', embed_token='tok-a'),
+        Goal(user_github_id='u', title='Completed, no display', details='d', deadline=now + timedelta(days=1),
+             repo_url='https://github.com/o/r', completion_condition='#b', status='completed', completed_at=now),
+    ])
+    db.session.commit()
+
+    fields = list(GOAL_FIELD_COLUMNS)
+    rows, column_names = project(fields)
+    serialized = serialize_goal_rows(rows, column_names, fields, 'http://localhost:5000')
+    assert serialized == [goal.to_dict() for goal in Goal.query.order_by(Goal.id)]
+
+
+def test_bulk_serializer_projects_single_and_derived_fields(clean_db):
+    db.session.add(Goal(user_github_id='u', title='t', details='d', deadline=datetime(2030, 1, 2, 3, 4),
+                        repo_url='https://github.com/o/r', completion_condition='#a', embed_token='tok'))
+    db.session.commit()
+
+    rows, column_names = project(['title'])
+    assert serialize_goal_rows(rows, column_names, ['title'], 'x') == [{'title': 't'}]
+    rows, column_names = project(['deadline_display', 'embed_url'])
+    assert serialize_goal_rows(rows, column_names, ['deadline_display', 'embed_url'], 'https://gd') == [
+        {'deadline_display': '02/01/2030 03:04', 'embed_url': 'https://gd/embed/tok'}
+    ]
+
+
+def test_json_response_falls_back_to_jsonify(app, monkeypatch):
+    with app.test_request_context():
+        fast = json_response([{'b': 1, 'a': None}])
+        monkeypatch.setattr(app_module, 'orjson', None)
+        plain = json_response([{'b': 1, 'a': None}])
+    assert fast.mimetype == plain.mimetype == 'application/json'
+    assert fast.get_json() == plain.get_json() == [{'a': None, 'b': 1}]
@@ -0,0 +1,73 @@
+from application import complete_goals, embed_snapshots
+from snapshot_cache import MemorySnapshotCache, SQLiteSnapshotCache
+from tests.helpers import make_goal
+from tests.test_embed_batch import recorded_statements
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sqlite_cache_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'snapshots.sqlite3')
+    worker_a = SQLiteSnapshotCache(path)
+    worker_b = SQLiteSnapshotCache(path)
+
+    worker_a.set('tok', {'status': 'active'})
+    assert worker_b.get('tok') == {'status': 'active'}
+
+    worker_b.delete('tok')
+    assert worker_a.get('tok') is None
+    assert worker_a.stats()['hits'] == 0 and worker_a.stats()['misses'] == 1
+    assert worker_b.stats()['hit_rate'] == 1.0
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    clock = FakeClock()
+    for cache in (SQLiteSnapshotCache(str(tmp_path / 's.sqlite3'), ttl=10, clock=clock),
+                  MemorySnapshotCache(ttl=10, clock=clock)):
+        cache.set('tok', 1)
+        clock.now += 9
+        assert cache.get('tok') == 1
+        clock.now += 2
+        assert cache.get('tok') is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemorySnapshotCache(maxsize=2)
+    cache.set_many({'a': 1, 'b': 2})
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+
+
+def test_repeat_widget_views_skip_the_database(clean_db, client, logged_in):
+    make_goal(embed_token='cached')
+    first = client.get('/api/embed/cached/data')
+
+    with recorded_statements() as statements:
+        second = client.get('/api/embed/cached/data')
+
+    assert [sql for sql in statements if 'FROM goal' in sql] == []
+    assert second.get_json()['title'] == first.get_json()['title']
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert client.get('/api/embed/cache').get_json()['hits'] >= 1
+
+
+def test_cache_stats_require_login(clean_db, client):
+    assert client.get('/api/embed/cache').status_code == 401
+
+
+def test_goal_writes_invalidate_the_snapshot(clean_db, client):
+    goal_id = make_goal(embed_token='changing').id
+    assert client.get('/api/embed/changing/data').get_json()['status'] == 'active'
+    assert embed_snapshots.get('changing') is not None
+
+    complete_goals([goal_id])
+
+    assert embed_snapshots.get('changing') is None
+    assert client.get('/api/embed/changing/data').get_json()['status'] == 'completed'
@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+
+from flask import Flask, url_for
+
+from static_assets import StaticAssets, build_assets
+
+
+def make_static(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'js').mkdir(parents=True)
+    (static / 'js' / 'app.js').write_text('console.log("hello");\n' * 50)
+    (static / 'manifest.json').write_text('{}')
+    return static
+
+
+def make_app(static):
+    app = Flask(__name__, static_folder=str(static))
+    assets = StaticAssets(app)
+    return app, assets
+
+
+def test_url_for_points_at_the_fingerprinted_copy(client):
+    with client.application.test_request_context():
+        script = url_for('static', filename='js/app.js')
+        manifest = url_for('static', filename='manifest.json')
+
+    assert script.startswith('/static/dist/js/app.') and script.endswith('.js')
+    assert manifest == '/static/manifest.json'
+    assert script.encode() in client.get('/').data
+
+
+def test_fingerprinted_assets_are_immutable_and_precompressed(client):
+    with client.application.test_request_context():
+        script = url_for('static', filename='js/app.js')
+
+    response = client.get(script, headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/javascript'
+    with open(os.path.join(client.application.static_folder, 'js', 'app.js'), 'rb') as source:
+        assert gzip.decompress(response.data) == source.read()
+    assert client.get('/static/dist/js/app.000000000000.js').status_code == 404
+
+
+def test_build_writes_hashed_copies_variants_and_manifest(tmp_path):
+    static = make_static(tmp_path)
+
+    manifest = build_assets(str(static))
+
+    hashed = manifest['js/app.js']
+    assert 'manifest.json' not in manifest
+    assert (static / 'dist' / hashed).read_bytes() == (static / 'js' / 'app.js').read_bytes()
+    assert gzip.decompress((static / 'dist' / (hashed + '.gz')).read_bytes()) == (static / 'js' / 'app.js').read_bytes()
+    assert json.loads((static / 'dist' / 'assets.json').read_text()) == manifest
+
+
+def test_extension_serves_a_built_manifest(tmp_path):
+    static = make_static(tmp_path)
+    manifest = build_assets(str(static))
+    app, assets = make_app(static)
+
+    with app.test_request_context():
+        assert url_for('static', filename='js/app.js') == f"/static/dist/{manifest['js/app.js']}"
+    assert app.test_client().get(f"/static/dist/{manifest['js/app.js']}").status_code == 200
+
+
+def test_changed_content_gets_a_new_url(tmp_path):
+    static = make_static(tmp_path)
+    app, assets = make_app(static)
+    with app.test_request_context():
+        before = url_for('static', filename='js/app.js')
+
+    (static / 'js' / 'app.js').write_text('console.log("changed");\n')
+    assets.load()
+    with app.test_request_context():
+        assert url_for('static', filename='js/app.js') != before
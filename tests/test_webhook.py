@@ -0,0 +1,59 @@
+from application import Goal, db, drain_webhook_queue
+from tests.helpers import make_goal
+
+
+def statuses(*goal_ids):
+    db.session.expire_all()
+    return [db.session.get(Goal, goal_id).status for goal_id in goal_ids]
+
+
+def test_push_completes_every_matching_goal(clean_db, post_webhook):
+    first = make_goal('#done').id
+    second = make_goal('release v1').id
+    unmatched = make_goal('never mentioned').id
+    other_repo = make_goal('#done', repo='owner/other').id
+
+    response = post_webhook('push', {
+        'repository': {'full_name': 'owner/repo'},
+        'commits': [{'message': 'fix: tidy #done'}, {'message': 'chore: release v1'}]
+    })
+
+    assert response.status_code == 202
+    assert drain_webhook_queue() == 1
+    assert statuses(first, second, unmatched, other_repo) == ['completed', 'completed', 'active', 'active']
+
+
+def test_push_ignores_completed_and_issue_goals(clean_db, post_webhook):
+    done = make_goal('#done', status='completed').id
+    issue_goal = make_goal('#done', completion_type='issue').id
+
+    response = post_webhook('push', {
+        'repository': {'full_name': 'owner/repo'},
+        'commits': [{'message': '#done'}]
+    })
+
+    assert response.status_code == 202
+    drain_webhook_queue()
+    assert statuses(done, issue_goal) == ['completed', 'active']
+
+
+def test_closed_issue_completes_all_goals_for_that_issue(clean_db, post_webhook):
+    plain = make_goal('42', completion_type='issue').id
+    hashed = make_goal('#42', completion_type='issue').id
+    other_issue = make_goal('#7', completion_type='issue').id
+
+    response = post_webhook('issues', {
+        'action': 'closed',
+        'repository': {'full_name': 'owner/repo'},
+        'issue': {'number': 42}
+    })
+
+    assert response.status_code == 202
+    assert drain_webhook_queue() == 1
+    assert statuses(plain, hashed, other_issue) == ['completed', 'completed', 'active']
+
+
+def test_webhook_rejects_bad_signature(clean_db, client):
+    response = client.post('/api/github-webhook', data=b'{}', content_type='application/json',
+                           headers={'X-GitHub-Event': 'push', 'X-Hub-Signature-256': 'sha256=bad'})
+    assert response.status_code == 403
@@ -0,0 +1,92 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+
+import webhook_body
+from application import WebhookDelivery, application, db
+from webhook_body import WebhookBodyInvalid, WebhookBodyReader, WebhookBodyTooLarge
+
+PUSH = {
+    'ref': 'refs/heads/main',
+    'repository': {'full_name': 'owner/repo', 'description': 'x' * 500},
+    'commits': [
+        {'id': 'a1', 'message': 'Fix #1', 'author': {'name': 'someone'}},
+        {'id': 'b2', 'added': [], 'message': 'Docs'},
+        {'id': 'c3'},
+    ],
+    'head_commit': {'message': 'Docs'},
+    'sender': {'login': 'someone'},
+}
+
+
+def sign(body):
+    return 'sha256=' + hmac.new(application.config['SECRET_KEY'].encode('utf-8'), msg=body,
+                                digestmod=hashlib.sha256).hexdigest()
+
+
+def read(body, incremental, chunk_size=7, max_bytes=1024 * 1024):
+    reader = WebhookBodyReader(application.config['SECRET_KEY'], max_bytes, incremental=incremental)
+    for start in range(0, len(body), chunk_size):
+        reader.feed(body[start:start + chunk_size])
+    return reader
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_reader_verifies_and_slims_in_one_pass(incremental):
+    if incremental and webhook_body.ijson is None:
+        pytest.skip('ijson not installed')
+    body = json.dumps(PUSH).encode('utf-8')
+
+    reader = read(body, incremental)
+
+    assert reader.verify(sign(body))
+    assert not reader.verify(sign(body + b' '))
+    assert reader.payload() == {
+        'ref': 'refs/heads/main',
+        'repository': {'full_name': 'owner/repo'},
+        'commits': [{'message': 'Fix #1'}, {'message': 'Docs'}, {'message': ''}],
+    }
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_reader_rejects_invalid_bodies(incremental):
+    if incremental and webhook_body.ijson is None:
+        pytest.skip('ijson not installed')
+    for body in (b'{"ref": ', b'[1, 2]'):
+        with pytest.raises(WebhookBodyInvalid):
+            read(body, incremental).payload()
+    with pytest.raises(WebhookBodyTooLarge):
+        read(b'{"ref": "' + b'x' * 100 + b'"}', incremental, max_bytes=64)
+
+
+def test_oversize_delivery_is_refused_before_it_is_read(clean_db, client, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'WEBHOOK_MAX_BODY_BYTES', 64)
+    body = json.dumps(PUSH).encode('utf-8')
+
+    response = client.post('/api/github-webhook', data=body, content_type='application/json',
+                           headers={'X-GitHub-Event': 'push', 'X-Hub-Signature-256': sign(body)})
+
+    assert response.status_code == 413
+    assert WebhookDelivery.query.count() == 0
+
+
+def test_signature_is_checked_before_the_body_is_parsed(clean_db, client):
+    body = b'{"ref": '
+    headers = {'X-GitHub-Event': 'push'}
+
+    bad_signature = client.post('/api/github-webhook', data=body, headers={**headers, 'X-Hub-Signature-256': 'sha256=00'})
+    bad_json = client.post('/api/github-webhook', data=body, headers={**headers, 'X-Hub-Signature-256': sign(body)})
+
+    assert bad_signature.status_code == 403
+    assert bad_json.status_code == 400
+
+
+def test_only_the_handled_fields_are_queued(clean_db, post_webhook):
+    response = post_webhook('push', PUSH)
+
+    assert response.status_code == 202
+    stored = json.loads(db.session.get(WebhookDelivery, response.get_json()['delivery']).payload)
+    assert set(stored) == {'ref', 'repository', 'commits'}
+    assert stored['repository'] == {'full_name': 'owner/repo'}
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import application as app_module
+from application import SeenDelivery, WebhookDelivery, db, purge_seen_deliveries, recent_deliveries
+from dedup import RecentKeys
+
+PUSH = {'repository': {'full_name': 'owner/repo'}, 'commits': []}
+
+
+def reset_memory(monkeypatch):
+    monkeypatch.setattr(app_module, 'recent_deliveries', RecentKeys(maxsize=100, ttl=recent_deliveries.ttl))
+    monkeypatch.setattr(app_module, 'delivery_dedup_stats', {'table_hits': 0, 'purged': 0})
+
+
+def test_redelivery_is_acknowledged_without_queueing(clean_db, client, logged_in, post_webhook, monkeypatch):
+    reset_memory(monkeypatch)
+    first = post_webhook('push', PUSH, headers={'X-GitHub-Delivery': 'd-1'})
+    second = post_webhook('push', PUSH, headers={'X-GitHub-Delivery': 'd-1'})
+
+    assert first.status_code == 202
+    assert (second.status_code, second.get_json()['status']) == (200, 'duplicate')
+    assert WebhookDelivery.query.count() == 1
+    dedup = client.get('/api/github-webhook/queue').get_json()['dedup']
+    assert (dedup['memory_hits'], dedup['table_hits'], dedup['misses']) == (1, 0, 1)
+
+
+def test_table_catches_duplicates_the_memory_cache_has_not_seen(clean_db, client, logged_in, post_webhook, monkeypatch):
+    reset_memory(monkeypatch)
+    post_webhook('push', PUSH, headers={'X-GitHub-Delivery': 'd-2'})
+    # Simulate the redelivery landing on another worker process
+    reset_memory(monkeypatch)
+
+    response = post_webhook('push', PUSH, headers={'X-GitHub-Delivery': 'd-2'})
+    assert response.get_json()['status'] == 'duplicate'
+    assert WebhookDelivery.query.count() == 1
+    assert client.get('/api/github-webhook/queue').get_json()['dedup']['table_hits'] == 1
+
+
+def test_expired_delivery_id_is_processed_again(clean_db, post_webhook, monkeypatch):
+    reset_memory(monkeypatch)
+    db.session.add(SeenDelivery(delivery_id='d-3', received_at=datetime.utcnow() - timedelta(days=30)))
+    db.session.commit()
+
+    response = post_webhook('push', PUSH, headers={'X-GitHub-Delivery': 'd-3'})
+    assert response.status_code == 202
+    db.session.expire_all()
+    assert db.session.get(SeenDelivery, 'd-3').received_at > datetime.utcnow() - timedelta(minutes=1)
+
+
+def test_deliveries_without_an_id_are_always_queued(clean_db, post_webhook):
+    assert post_webhook('push', PUSH).status_code == 202
+    assert post_webhook('push', PUSH).status_code == 202
+    assert WebhookDelivery.query.count() == 2
+
+
+def test_purge_removes_only_expired_rows(clean_db):
+    db.session.add(SeenDelivery(delivery_id='old', received_at=datetime.utcnow() - timedelta(days=30)))
+    db.session.add(SeenDelivery(delivery_id='new'))
+    db.session.commit()
+
+    assert purge_seen_deliveries() == 1
+    assert [row.delivery_id for row in SeenDelivery.query.all()] == ['new']
+
+
+def test_recent_keys_expire_and_stay_bounded():
+    now = [0.0]
+    keys = RecentKeys(maxsize=2, ttl=10, clock=lambda: now[0])
+    keys.add('a')
+    keys.add('b')
+    assert keys.seen('a')
+    keys.add('c')
+    assert not keys.seen('b')
+    now[0] = 11
+    assert not keys.seen('a')
+    assert (keys.hits, keys.misses) == (1, 2)
@@ -0,0 +1,115 @@
+import threading
+from datetime import datetime, timedelta
+import application as app_module
+from application import WebhookDelivery, db, drain_webhook_queue, purge_webhook_deliveries, webhook_queue_stats
+from background import WorkerPool
+
+
+def queued(delivery_id):
+    db.session.expire_all()
+    return db.session.get(WebhookDelivery, delivery_id)
+
+
+def test_delivery_is_stored_and_acknowledged_before_processing(clean_db, post_webhook):
+    response = post_webhook('push', {'repository': {'full_name': 'owner/repo'}, 'commits': []},
+                            headers={'X-GitHub-Delivery': 'abc-123'})
+
+    assert response.status_code == 202
+    delivery = queued(response.get_json()['delivery'])
+    assert delivery.status == 'pending'
+    assert delivery.delivery_id == 'abc-123'
+    assert webhook_queue_stats()['pending'] == 1
+
+    assert drain_webhook_queue() == 1
+    assert queued(delivery.id).status == 'done'
+    assert drain_webhook_queue() == 0
+
+
+def test_malformed_payload_is_dead_lettered(clean_db, post_webhook):
+    response = post_webhook('push', {'commits': []})
+    drain_webhook_queue()
+
+    delivery = queued(response.get_json()['delivery'])
+    assert delivery.status == 'dead'
+    assert 'repository' in delivery.last_error
+
+
+def test_failed_delivery_is_retried_with_backoff_then_dead_lettered(clean_db, post_webhook, monkeypatch):
+    def explode(event_type, payload):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(app_module, 'process_webhook_event', explode)
+    monkeypatch.setitem(app_module.application.config, 'WEBHOOK_MAX_ATTEMPTS', 2)
+    delivery_id = post_webhook('push', {'repository': {'full_name': 'owner/repo'}}).get_json()['delivery']
+
+    drain_webhook_queue()
+    delivery = queued(delivery_id)
+    assert delivery.status == 'pending'
+    assert delivery.attempts == 1
+    assert delivery.available_at > datetime.utcnow()
+    assert drain_webhook_queue() == 0
+
+    delivery.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    drain_webhook_queue()
+    delivery = queued(delivery_id)
+    assert delivery.status == 'dead'
+    assert delivery.attempts == 2
+    assert webhook_queue_stats()['dead'] == 1
+
+
+def test_stale_processing_delivery_is_reclaimed(clean_db, post_webhook):
+    delivery_id = post_webhook('push', {'repository': {'full_name': 'owner/repo'}}).get_json()['delivery']
+    delivery = queued(delivery_id)
+    delivery.status = 'processing'
+    delivery.claimed_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+
+    assert drain_webhook_queue() == 1
+    assert queued(delivery_id).status == 'done'
+
+
+
+def test_processed_deliveries_are_purged_after_their_retention(clean_db, post_webhook):
+    ids = [post_webhook('push', {'repository': {'full_name': 'owner/repo'}}).get_json()['delivery'] for _ in range(2)]
+    dead_id = post_webhook('push', {'commits': []}).get_json()['delivery']
+    drain_webhook_queue()
+    pending_id = post_webhook('push', {'repository': {'full_name': 'owner/repo'}}).get_json()['delivery']
+    WebhookDelivery.query.filter(WebhookDelivery.id.in_([ids[0], dead_id])) \
+        .update({'processed_at': datetime.utcnow() - timedelta(days=2)}, synchronize_session=False)
+    db.session.commit()
+
+    # The old done row goes; dead letters are kept for a week
+    assert purge_webhook_deliveries() == 1
+    assert queued(ids[0]) is None
+    assert [queued(delivery_id).status for delivery_id in (ids[1], dead_id, pending_id)] == ['done', 'dead', 'pending']
+
+
+def test_queue_status_endpoint(clean_db, client, logged_in, post_webhook):
+    post_webhook('push', {'repository': {'full_name': 'owner/repo'}})
+    data = client.get('/api/github-webhook/queue').get_json()
+    assert data['pending'] == 1
+    assert data['dead'] == 0
+
+
+def test_queue_status_requires_login(clean_db, client):
+    assert client.get('/api/github-webhook/queue').status_code == 401
+
+
+def test_worker_pool_drains_until_stopped():
+    handled = []
+    drained = threading.Event()
+
+    def drain():
+        if len(handled) < 3:
+            handled.append(1)
+            return 1
+        drained.set()
+        return 0
+
+    pool = WorkerPool('test-worker', drain, workers=1, idle_interval=0.01)
+    pool.start()
+    assert drained.wait(2)
+    pool.stop(timeout=2)
+    assert len(handled) == 3
+    assert not pool.running
@@ -0,0 +1,133 @@
+"""Read a GitHub webhook body once: bounded, HMAC-verified as it streams in, and reduced to the fields we use."""
+import hashlib
+import hmac
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Scalar fields the event handlers read, as dotted paths (ijson prefixes)
+WEBHOOK_SCALAR_FIELDS = (
+    'action', 'ref', 'ref_type', 'deleted', 'number',
+    'repository.full_name', 'issue.number', 'pull_request.number', 'pull_request.merged',
+)
+COMMIT_MESSAGE_FIELD = 'commits.item.message'
+# Below this size a buffered json.loads is faster than event-by-event parsing
+INCREMENTAL_MIN_BYTES = 1024 * 1024
+
+
+class WebhookBodyTooLarge(ValueError):
+    """The delivery is bigger than the configured limit."""
+
+
+class WebhookBodyInvalid(ValueError):
+    """The delivery is not a JSON object."""
+
+
+def _set_path(target, path, value):
+    *parents, leaf = path.split('.')
+    for key in parents:
+        target = target.setdefault(key, {})
+    target[leaf] = value
+
+
+def slim_webhook_payload(payload):
+    """Keep only the fields the event handlers read, in the same nesting as GitHub sends them."""
+    if not isinstance(payload, dict):
+        raise WebhookBodyInvalid('Payload is not a JSON object')
+    slim = {}
+    for path in WEBHOOK_SCALAR_FIELDS:
+        value = payload
+        for key in path.split('.'):
+            value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                break
+        if value is not None and not isinstance(value, (dict, list)):
+            _set_path(slim, path, value)
+    commits = payload.get('commits')
+    if isinstance(commits, list):
+        slim['commits'] = [{'message': commit.get('message') or ''} for commit in commits if isinstance(commit, dict)]
+    return slim
+
+
+class WebhookBodyReader:
+    """Consume a delivery chunk by chunk, updating the HMAC and the parse as the bytes arrive.
+
+    With ijson installed, bodies of at least INCREMENTAL_MIN_BYTES (or of unknown size)
+    are parsed incrementally, so memory stays proportional to the extracted fields rather
+    than the payload; otherwise the chunks are buffered and parsed once at the end.
+    """
+
+    def __init__(self, secret, max_bytes, incremental=None, expected_size=None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hmac = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+        if incremental is None:
+            incremental = ijson is not None and (expected_size is None or expected_size >= INCREMENTAL_MIN_BYTES)
+        self.incremental = incremental
+        self._error = None
+        if self.incremental:
+            self._events = ijson.sendable_list()
+            self._parser = ijson.parse_coro(self._events)
+            self._slim = {}
+            self._commits = None
+            self._top_level = None
+        else:
+            self._chunks = []
+
+    def feed(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise WebhookBodyTooLarge(f'Payload exceeds {self.max_bytes} bytes')
+        self._hmac.update(chunk)
+        if not self.incremental:
+            self._chunks.append(chunk)
+        elif self._error is None:
+            try:
+                self._parser.send(chunk)
+                self._collect()
+            except Exception as e:
+                # Keep hashing: a bad signature must still win over a parse error
+                self._error = e
+
+    def _collect(self):
+        for prefix, event, value in self._events:
+            if self._top_level is None:
+                self._top_level = event
+            if prefix == COMMIT_MESSAGE_FIELD and event == 'string' and self._commits:
+                self._commits[-1]['message'] = value
+            elif prefix == 'commits' and event == 'start_array':
+                self._commits = []
+            elif prefix == 'commits.item' and event == 'start_map' and self._commits is not None:
+                self._commits.append({'message': ''})
+            elif prefix in WEBHOOK_SCALAR_FIELDS and event in ('string', 'number', 'boolean'):
+                _set_path(self._slim, prefix, int(value) if event == 'number' and value == int(value) else value)
+        del self._events[:]
+
+    def verify(self, signature_header):
+        """Constant-time check of an X-Hub-Signature-256 header against everything fed so far."""
+        expected = 'sha256=' + self._hmac.hexdigest()
+        return bool(signature_header) and hmac.compare_digest(expected, signature_header)
+
+    def payload(self):
+        """The slimmed payload. Call once, after the whole body has been fed."""
+        if not self.incremental:
+            try:
+                return slim_webhook_payload(json.loads(b''.join(self._chunks)))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise WebhookBodyInvalid(f'Payload is not valid JSON: {e}')
+        if self._error is None:
+            try:
+                self._parser.close()
+                self._collect()
+            except Exception as e:
+                self._error = e
+        if self._error is not None:
+            raise WebhookBodyInvalid(f'Payload is not valid JSON: {self._error}')
+        if self._top_level != 'start_map':
+            raise WebhookBodyInvalid('Payload is not a JSON object')
+        if self._commits is not None:
+            self._slim['commits'] = self._commits
+        return self._slim